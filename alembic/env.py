@@ -1,10 +1,11 @@
 from logging.config import fileConfig
 
 from sqlalchemy import create_engine, pool
+from sqlalchemy.engine import Connection
 
 from alembic import context
 
-from medsearch_api.app.config import settings
+from medsearch_api.app.config import get_settings
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -58,16 +59,27 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # a connection handed over by the caller, e.g. a test migrating SQLite
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations_on(connection)
+        return
+
+    settings = get_settings()
     connectable = create_engine(
         f"mysql://{settings.MYSQL_ADMIN_USER}:{settings.MYSQL_ADMIN_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DATABASE}",
         poolclass=pool.NullPool,
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        run_migrations_on(connection)
+
+
+def run_migrations_on(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
 
-        with context.begin_transaction():
-            context.run_migrations()
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
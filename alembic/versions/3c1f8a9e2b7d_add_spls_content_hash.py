@@ -0,0 +1,30 @@
+"""add spls content_hash
+
+Revision ID: 3c1f8a9e2b7d
+Revises: 07ae42fb5176
+Create Date: 2026-10-18 10:12:41.120934
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1f8a9e2b7d"
+down_revision: Union[str, None] = "07ae42fb5176"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "spls"
+
+
+def upgrade() -> None:
+    # nullable: rows ingested before this column existed are always rewritten once
+    op.add_column(TABLE_NAME, sa.Column("content_hash", sa.String(32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column(TABLE_NAME, "content_hash")
@@ -0,0 +1,37 @@
+"""add keyset pagination indexes
+
+Revision ID: 5f0b7c2e9d14
+Revises: e3a9c5f1d872
+Create Date: 2026-10-18 16:48:33.902117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f0b7c2e9d14"
+down_revision: Union[str, None] = "e3a9c5f1d872"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (sort column, id) for each list endpoint sort, see app/api/lists.py; sorting
+# meds by updated_at uses ix_meds_updated_at, which InnoDB extends with the id
+PAGINATION_INDEXES = [
+    ("ix_meds_name_id", "meds", ["name", "id"]),
+    ("ix_spls_published_date_id", "spls", ["published_date", "id"]),
+    ("ix_spls_updated_at_id", "spls", ["updated_at", "id"]),
+    ("ix_organizations_updated_at_id", "organizations", ["updated_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in PAGINATION_INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(PAGINATION_INDEXES):
+        op.drop_index(name, table_name=table)
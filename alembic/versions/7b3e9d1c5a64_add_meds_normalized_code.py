@@ -0,0 +1,85 @@
+"""add meds normalized_code
+
+Revision ID: 7b3e9d1c5a64
+Revises: d2b6f4a8c913
+Create Date: 2026-10-18 21:37:52.118406
+
+"""
+
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3e9d1c5a64"
+down_revision: Union[str, None] = "d2b6f4a8c913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "meds"
+INDEX_NAME = "ix_meds_normalized_code_deleted_at"
+BACKFILL_CHUNK_SIZE = 5_000
+
+# a frozen copy of ingestion/ndc.py's normalization as of this revision, so
+# later changes to the app don't change what the backfill writes
+NDC_CODE_SYSTEM = "2.16.840.1.113883.6.69"
+_LAYOUTS = {(4, 4), (5, 3), (5, 4), (4, 4, 2), (5, 3, 2), (5, 4, 1), (5, 4, 2)}
+
+
+def normalize_ndc(code: str) -> Optional[str]:
+    segments = code.strip().split("-")
+    if not all(segment.isascii() and segment.isdigit() for segment in segments):
+        return None
+    if len(segments) == 1:
+        digits = segments[0]
+        return digits[:9] if len(digits) in (9, 11) else None
+    if tuple(len(segment) for segment in segments) not in _LAYOUTS:
+        return None
+    return segments[0].zfill(5) + segments[1].zfill(4)
+
+
+def backfill() -> None:
+    # one pass over meds in id ranges; ingestion maintains the column from here on
+    conn = op.get_bind()
+    meds = sa.table(
+        TABLE_NAME,
+        sa.column("id"),
+        sa.column("code"),
+        sa.column("code_system"),
+        sa.column("normalized_code"),
+    )
+    max_id = conn.execute(sa.select(sa.func.max(meds.c.id))).scalar() or 0
+    for start in range(0, max_id + 1, BACKFILL_CHUNK_SIZE):
+        rows = conn.execute(
+            sa.select(meds.c.id, meds.c.code).where(
+                meds.c.id >= start,
+                meds.c.id < start + BACKFILL_CHUNK_SIZE,
+                meds.c.code_system == NDC_CODE_SYSTEM,
+            )
+        )
+        values = [
+            {"med_id": med_id, "normalized": normalize_ndc(code)}
+            for med_id, code in rows
+            if code is not None
+        ]
+        values = [value for value in values if value["normalized"] is not None]
+        if values:
+            conn.execute(
+                meds.update()
+                .where(meds.c.id == sa.bindparam("med_id"))
+                .values(normalized_code=sa.bindparam("normalized")),
+                values,
+            )
+
+
+def upgrade() -> None:
+    op.add_column(TABLE_NAME, sa.Column("normalized_code", sa.String(9), nullable=True))
+    backfill()
+    op.create_index(INDEX_NAME, TABLE_NAME, ["normalized_code", "deleted_at"])
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name=TABLE_NAME)
+    op.drop_column(TABLE_NAME, "normalized_code")
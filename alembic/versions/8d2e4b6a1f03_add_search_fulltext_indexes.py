@@ -0,0 +1,35 @@
+"""add search fulltext indexes
+
+Revision ID: 8d2e4b6a1f03
+Revises: 3c1f8a9e2b7d
+Create Date: 2026-10-18 11:02:17.553108
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2e4b6a1f03"
+down_revision: Union[str, None] = "3c1f8a9e2b7d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns); MATCH() must name exactly the columns of one index
+FULLTEXT_INDEXES = [
+    ("ft_meds_name_generic_name", "meds", ["name", "generic_name"]),
+    ("ft_ingredients_name", "ingredients", ["name"]),
+    ("ft_spls_title", "spls", ["title"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in FULLTEXT_INDEXES:
+        op.create_index(name, table, columns, mysql_prefix="FULLTEXT")
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(FULLTEXT_INDEXES):
+        op.drop_index(name, table_name=table)
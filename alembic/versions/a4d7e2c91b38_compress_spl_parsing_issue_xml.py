@@ -0,0 +1,103 @@
+"""compress spl_parsing_issues xml columns
+
+Revision ID: a4d7e2c91b38
+Revises: 5f0b7c2e9d14
+Create Date: 2026-10-18 18:02:47.553190
+
+"""
+
+import zlib
+from typing import Any, Callable, Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4d7e2c91b38"
+down_revision: Union[str, None] = "5f0b7c2e9d14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "spl_parsing_issues"
+XML_COLUMNS = ("xml_content", "xml_structure")
+# rows hold whole labels of up to several megabytes each, so a chunk is a few
+# dozen rows and each commits on its own
+CONVERT_CHUNK_SIZE = 25
+# zlib's default level, as app/database/types.py compresses with
+COMPRESSION_LEVEL = 6
+
+
+# frozen copies of app/database/types.py's helpers as of this revision, so
+# later changes to the app don't change what the migration writes
+def compress_text(value: Optional[str]) -> Optional[bytes]:
+    if value is None:
+        return None
+    return zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress_text(value: Optional[bytes]) -> Optional[str]:
+    if value is None:
+        return None
+    return zlib.decompress(value).decode("utf-8")
+
+
+def convert(column_type, transform: Callable[[Any], Any]) -> None:
+    """
+    Replaces each xml column with a column_type column holding transform of
+    its values, converting rows in id-range chunks.
+    """
+    for column in XML_COLUMNS:
+        op.add_column(TABLE_NAME, sa.Column(f"{column}_new", column_type))
+
+    issues = sa.table(
+        TABLE_NAME,
+        sa.column("id"),
+        *(sa.column(column) for column in XML_COLUMNS),
+        *(sa.column(f"{column}_new") for column in XML_COLUMNS),
+    )
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        max_id = conn.execute(sa.select(sa.func.max(issues.c.id))).scalar() or 0
+        for start in range(0, max_id + 1, CONVERT_CHUNK_SIZE):
+            rows = conn.execute(
+                sa.select(issues.c.id, *(issues.c[c] for c in XML_COLUMNS)).where(
+                    issues.c.id >= start, issues.c.id < start + CONVERT_CHUNK_SIZE
+                )
+            ).all()
+            if not rows:
+                continue
+            conn.execute(
+                issues.update()
+                .where(issues.c.id == sa.bindparam("issue_id"))
+                .values({f"{c}_new": sa.bindparam(f"{c}_value") for c in XML_COLUMNS}),
+                [
+                    {
+                        "issue_id": row.id,
+                        **{
+                            f"{c}_value": transform(getattr(row, c))
+                            for c in XML_COLUMNS
+                        },
+                    }
+                    for row in rows
+                ],
+            )
+
+    with op.batch_alter_table(TABLE_NAME) as batch_op:
+        for column in XML_COLUMNS:
+            batch_op.drop_column(column)
+            batch_op.alter_column(
+                f"{column}_new",
+                new_column_name=column,
+                existing_type=column_type,
+                nullable=False,
+            )
+
+
+def upgrade() -> None:
+    convert(sa.LargeBinary().with_variant(LONGBLOB(), "mysql"), compress_text)
+
+
+def downgrade() -> None:
+    convert(sa.Text().with_variant(LONGTEXT(), "mysql"), decompress_text)
@@ -0,0 +1,34 @@
+"""add updated_at indexes
+
+Revision ID: b57e1d9c4a20
+Revises: 8d2e4b6a1f03
+Create Date: 2026-10-18 13:40:52.218734
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b57e1d9c4a20"
+down_revision: Union[str, None] = "8d2e4b6a1f03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# incremental autocomplete refreshes read rows by updated_at
+UPDATED_AT_INDEXES = [
+    ("ix_meds_updated_at", "meds"),
+    ("ix_ingredients_updated_at", "ingredients"),
+]
+
+
+def upgrade() -> None:
+    for name, table in UPDATED_AT_INDEXES:
+        op.create_index(name, table, ["updated_at"])
+
+
+def downgrade() -> None:
+    for name, table in reversed(UPDATED_AT_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,168 @@
+"""deduplicate spl_parsing_issues
+
+Revision ID: c81f3a5d7e26
+Revises: a4d7e2c91b38
+Create Date: 2026-10-18 19:26:14.087352
+
+"""
+
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c81f3a5d7e26"
+down_revision: Union[str, None] = "a4d7e2c91b38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "spl_parsing_issues"
+CONSTRAINT_NAME = "uq_spl_parsing_issues_spl_id_error_content"
+# MySQL drops its implicit index on the spl_id foreign key once the unique
+# constraint leads with spl_id, and won't drop the constraint while the
+# foreign key needs it (error 1553); downgrade puts a plain index back first
+SPL_ID_INDEX_NAME = "ix_spl_parsing_issues_spl_id"
+# rows read with their xml_content, a whole label of up to several megabytes
+READ_CHUNK_SIZE = 25
+# ids and keys written back per statement
+WRITE_CHUNK_SIZE = 500
+
+# frozen copies of the app's hashing as of this revision (ingestion/hashing.py,
+# ingestion/issues.py and app/database/types.py), so later changes to the app
+# don't change the keys the backfill computes
+CONTENT_HASH_DIGEST_SIZE = 16
+_NUMBER = re.compile(r"\d+")
+_SPACE = re.compile(r"\s+")
+
+
+def content_hash(xml_content: bytes) -> str:
+    hasher = hashlib.blake2b(digest_size=CONTENT_HASH_DIGEST_SIZE)
+    hasher.update(zlib.decompress(xml_content))
+    return hasher.hexdigest()
+
+
+def error_fingerprint(error: str) -> str:
+    normalized = _SPACE.sub(" ", _NUMBER.sub("?", error)).strip()
+    hasher = hashlib.blake2b(digest_size=CONTENT_HASH_DIGEST_SIZE)
+    hasher.update(normalized.encode())
+    return hasher.hexdigest()
+
+
+def backfill() -> None:
+    """
+    Keys the existing issues and folds repeats of one issue into its oldest
+    row, with the repeats counted in occurrences and the newest one's time in
+    last_seen_at. Only the keys of kept rows stay in memory.
+    """
+    issues = sa.table(
+        TABLE_NAME,
+        sa.column("id"),
+        sa.column("spl_id"),
+        sa.column("error"),
+        sa.column("xml_content"),
+        sa.column("created_at"),
+        sa.column("error_fingerprint"),
+        sa.column("content_hash"),
+        sa.column("occurrences"),
+        sa.column("last_seen_at"),
+    )
+    # key -> [kept id, occurrences, last seen]
+    kept: Dict[Tuple, List] = {}
+    duplicates: List[int] = []
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        max_id = conn.execute(sa.select(sa.func.max(issues.c.id))).scalar() or 0
+        for start in range(0, max_id + 1, READ_CHUNK_SIZE):
+            rows = conn.execute(
+                sa.select(
+                    issues.c.id,
+                    issues.c.spl_id,
+                    issues.c.error,
+                    issues.c.xml_content,
+                    issues.c.created_at,
+                )
+                .where(issues.c.id >= start, issues.c.id < start + READ_CHUNK_SIZE)
+                .order_by(issues.c.id)
+            ).all()
+            for row in rows:
+                key = (
+                    row.spl_id,
+                    error_fingerprint(row.error),
+                    content_hash(row.xml_content),
+                )
+                if key in kept:
+                    kept[key][1] += 1
+                    kept[key][2] = row.created_at
+                    duplicates.append(row.id)
+                else:
+                    kept[key] = [row.id, 1, row.created_at]
+
+        updates = [
+            {
+                "issue_id": issue_id,
+                "fingerprint": key[1],
+                "hash": key[2],
+                "seen": occurrences,
+                "last_seen": last_seen,
+            }
+            for key, (issue_id, occurrences, last_seen) in kept.items()
+        ]
+        for start in range(0, len(updates), WRITE_CHUNK_SIZE):
+            conn.execute(
+                issues.update()
+                .where(issues.c.id == sa.bindparam("issue_id"))
+                .values(
+                    error_fingerprint=sa.bindparam("fingerprint"),
+                    content_hash=sa.bindparam("hash"),
+                    occurrences=sa.bindparam("seen"),
+                    last_seen_at=sa.bindparam("last_seen"),
+                ),
+                updates[start : start + WRITE_CHUNK_SIZE],
+            )
+        for start in range(0, len(duplicates), WRITE_CHUNK_SIZE):
+            conn.execute(
+                issues.delete().where(
+                    issues.c.id.in_(duplicates[start : start + WRITE_CHUNK_SIZE])
+                )
+            )
+
+
+def upgrade() -> None:
+    op.add_column(TABLE_NAME, sa.Column("error_fingerprint", sa.String(32)))
+    op.add_column(TABLE_NAME, sa.Column("content_hash", sa.String(32)))
+    op.add_column(
+        TABLE_NAME,
+        sa.Column("occurrences", sa.Integer, nullable=False, server_default="1"),
+    )
+    op.add_column(TABLE_NAME, sa.Column("last_seen_at", sa.DateTime))
+    backfill()
+    with op.batch_alter_table(TABLE_NAME) as batch_op:
+        for column in ("error_fingerprint", "content_hash"):
+            batch_op.alter_column(column, existing_type=sa.String(32), nullable=False)
+        # also the lookup ParsingIssueStore makes before writing an issue
+        batch_op.create_unique_constraint(
+            CONSTRAINT_NAME, ["spl_id", "error_fingerprint", "content_hash"]
+        )
+    # left by an earlier downgrade, and redundant again
+    existing = sa.inspect(op.get_bind()).get_indexes(TABLE_NAME)
+    if SPL_ID_INDEX_NAME in {index["name"] for index in existing}:
+        op.drop_index(SPL_ID_INDEX_NAME, table_name=TABLE_NAME)
+
+
+def downgrade() -> None:
+    # folded repeats are not restored; their count is dropped with occurrences
+    with op.batch_alter_table(TABLE_NAME) as batch_op:
+        batch_op.create_index(SPL_ID_INDEX_NAME, ["spl_id"])
+        batch_op.drop_constraint(CONSTRAINT_NAME, type_="unique")
+        for column in (
+            "last_seen_at",
+            "occurrences",
+            "content_hash",
+            "error_fingerprint",
+        ):
+            batch_op.drop_column(column)
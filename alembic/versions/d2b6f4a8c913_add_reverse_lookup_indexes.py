@@ -0,0 +1,62 @@
+"""add reverse lookup indexes
+
+Revision ID: d2b6f4a8c913
+Revises: c81f3a5d7e26
+Create Date: 2026-10-18 20:41:37.615028
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2b6f4a8c913"
+down_revision: Union[str, None] = "c81f3a5d7e26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# lookups from the other side of a foreign key, which the primary and unique
+# keys don't lead with; checked by tests/app/database/test_query_plans.py.
+# spl_parsing_issues.spl_id leads uq_spl_parsing_issues_spl_id_error_content.
+# MySQL drops the implicit index it made for each foreign key once one of
+# these can serve it.
+REVERSE_LOOKUP_INDEXES = [
+    (
+        "ix_med_ingredient_map_ingredient_id_deleted_at",
+        "med_ingredient_map",
+        ["ingredient_id", "deleted_at"],
+    ),
+    ("ix_med_organization_map_org_id", "med_organization_map", ["org_id"]),
+    ("ix_meds_med_form_id_deleted_at", "meds", ["med_form_id", "deleted_at"]),
+    ("ix_spl_data_issues_spl_id", "spl_data_issues", ["spl_id"]),
+]
+# MySQL won't drop an index a foreign key needs (error 1553), so downgrade
+# first gives each foreign key column a plain index of its own
+FOREIGN_KEY_INDEXES = {
+    "ix_med_ingredient_map_ingredient_id_deleted_at": (
+        "fk_med_ingredient_map_ingredient_id"
+    ),
+    "ix_med_organization_map_org_id": "fk_med_organization_map_org_id",
+    "ix_meds_med_form_id_deleted_at": "fk_meds_med_form_id",
+    "ix_spl_data_issues_spl_id": "fk_spl_data_issues_spl_id",
+}
+
+
+def upgrade() -> None:
+    for name, table, columns in REVERSE_LOOKUP_INDEXES:
+        existing = {
+            index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)
+        }
+        op.create_index(name, table, columns)
+        # left by an earlier downgrade, and redundant again
+        if FOREIGN_KEY_INDEXES[name] in existing:
+            op.drop_index(FOREIGN_KEY_INDEXES[name], table_name=table)
+
+
+def downgrade() -> None:
+    for name, table, columns in reversed(REVERSE_LOOKUP_INDEXES):
+        op.create_index(FOREIGN_KEY_INDEXES[name], table, columns[:1])
+        op.drop_index(name, table_name=table)
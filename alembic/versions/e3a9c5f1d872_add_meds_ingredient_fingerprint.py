@@ -0,0 +1,81 @@
+"""add meds ingredient_fingerprint
+
+Revision ID: e3a9c5f1d872
+Revises: b57e1d9c4a20
+Create Date: 2026-10-18 15:21:09.406215
+
+"""
+
+import hashlib
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3a9c5f1d872"
+down_revision: Union[str, None] = "b57e1d9c4a20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "meds"
+INDEX_NAME = "ix_meds_ingredient_fingerprint"
+BACKFILL_CHUNK_SIZE = 5_000
+CONTENT_HASH_DIGEST_SIZE = 16
+
+
+def ingredient_fingerprint(keys: Iterable[Tuple[str, str]]) -> Optional[str]:
+    # a frozen copy of ingestion/hashing.py's as of this revision, so later
+    # changes to the app don't change what the backfill writes
+    canonical = sorted({f"{code_system}:{code}" for code, code_system in keys})
+    if not canonical:
+        return None
+    hasher = hashlib.blake2b(digest_size=CONTENT_HASH_DIGEST_SIZE)
+    hasher.update("\n".join(canonical).encode())
+    return hasher.hexdigest()
+
+
+def backfill() -> None:
+    # one pass over meds in id ranges; ingestion maintains the column from here on
+    conn = op.get_bind()
+    meds = sa.table("meds", sa.column("id"), sa.column("ingredient_fingerprint"))
+    maps = sa.table(
+        "med_ingredient_map", sa.column("med_id"), sa.column("ingredient_id")
+    )
+    ingredients = sa.table(
+        "ingredients", sa.column("id"), sa.column("code"), sa.column("code_system")
+    )
+    max_id = conn.execute(sa.select(sa.func.max(meds.c.id))).scalar() or 0
+    for start in range(0, max_id + 1, BACKFILL_CHUNK_SIZE):
+        rows = conn.execute(
+            sa.select(maps.c.med_id, ingredients.c.code, ingredients.c.code_system)
+            .join(ingredients, ingredients.c.id == maps.c.ingredient_id)
+            .where(maps.c.med_id >= start, maps.c.med_id < start + BACKFILL_CHUNK_SIZE)
+        )
+        keys = {}
+        for med_id, code, code_system in rows:
+            keys.setdefault(med_id, []).append((code, code_system))
+        if keys:
+            conn.execute(
+                meds.update()
+                .where(meds.c.id == sa.bindparam("med_id"))
+                .values(ingredient_fingerprint=sa.bindparam("fingerprint")),
+                [
+                    {"med_id": med_id, "fingerprint": ingredient_fingerprint(med_keys)}
+                    for med_id, med_keys in keys.items()
+                ],
+            )
+
+
+def upgrade() -> None:
+    op.add_column(
+        TABLE_NAME, sa.Column("ingredient_fingerprint", sa.String(32), nullable=True)
+    )
+    backfill()
+    op.create_index(INDEX_NAME, TABLE_NAME, ["ingredient_fingerprint", "med_form_id"])
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name=TABLE_NAME)
+    op.drop_column(TABLE_NAME, "ingredient_fingerprint")
@@ -0,0 +1,85 @@
+"""
+Measures the in-process autocomplete index: build time and memory per name for
+a large index, keystroke lookup latency, and the cost of an incremental refresh.
+No database is needed; names come from benchmarks.synthetic.
+
+    poetry run python -m benchmarks.bench_autocomplete --names 1000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_drug_name
+from medsearch_api.app.search.autocomplete import PrefixIndex
+from medsearch_api.app.search.names import GENERIC_NAME, INGREDIENT_NAME, MED_NAME
+
+SOURCES = (MED_NAME, GENERIC_NAME, INGREDIENT_NAME)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--changes", type=int, default=1_000, help="rows per refresh")
+    args = parser.parse_args()
+
+    def rows():
+        for i in range(args.names):
+            yield SOURCES[i % 3], i, synthetic_drug_name(i).title()
+
+    started = time.perf_counter()
+    PrefixIndex().apply(rows())
+    build_seconds = time.perf_counter() - started
+
+    # built again under tracemalloc, which slows it down, to count what the index keeps
+    tracemalloc.start()
+    index = PrefixIndex()
+    index.apply(rows())
+    used, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"names: {len(index)}, build: {build_seconds:.2f}s")
+    print(
+        f"memory: {used / 2**20:.1f} MiB retained ({used / len(index):.0f} bytes per name), "
+        f"{peak / 2**20:.1f} MiB peak while building"
+    )
+
+    rng = random.Random(0)
+    print(f"{'prefix len':>10} {'p50 us':>8} {'p99 us':>8} {'uncached p99 us':>14}")
+    for length in (1, 2, 3, 5, 8):
+        prefixes = [
+            synthetic_drug_name(rng.randrange(args.names))[:length]
+            for _ in range(args.lookups)
+        ]
+        # uncached: what the first keystroke after a refresh pays
+        uncached, cached = [], []
+        for samples, complete in (
+            (uncached, index._complete),
+            (cached, index.complete),
+        ):
+            for prefix in prefixes:
+                started = time.perf_counter()
+                complete(prefix, 10)
+                samples.append((time.perf_counter() - started) * 1e6)
+        quantiles = statistics.quantiles(cached, n=100)
+        uncached_p99 = statistics.quantiles(uncached, n=100)[98]
+        print(
+            f"{length:>10} {quantiles[49]:>8.1f} {quantiles[98]:>8.1f} {uncached_p99:>14.1f}"
+        )
+
+    # a refresh: renames spread across the index plus as many brand new rows
+    renamed = rng.sample(range(args.names), args.changes)
+    refresh = [(SOURCES[i % 3], i, f"{synthetic_drug_name(i)} xr") for i in renamed]
+    refresh += [(MED_NAME, args.names + i, f"newname {i}") for i in range(args.changes)]
+    started = time.perf_counter()
+    index.apply(refresh)
+    print(
+        f"refresh of {len(refresh)} rows: {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measures typo-tolerant name lookups against the trigram index: build time and
+memory for a large index, then latency for queries with one or two random typos.
+No database is needed; names come from benchmarks.synthetic.
+
+    poetry run python -m benchmarks.bench_fuzzy --names 1000000
+"""
+
+import argparse
+import random
+import statistics
+import string
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_drug_name
+from medsearch_api.app.search.names import (
+    GENERIC_NAME,
+    INGREDIENT_NAME,
+    MED_NAME,
+    NameRows,
+)
+from medsearch_api.app.search.trigram import TrigramIndex
+
+SOURCES = (MED_NAME, GENERIC_NAME, INGREDIENT_NAME)
+
+
+def misspell(name: str, typos: int, rng: random.Random) -> str:
+    for _ in range(typos):
+        i = rng.randrange(len(name))
+        edit = rng.choice("sdi")
+        if edit == "s":
+            name = name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1 :]
+        elif edit == "d":
+            name = name[:i] + name[i + 1 :]
+        else:
+            name = name[:i] + rng.choice(string.ascii_lowercase) + name[i:]
+    return name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rows = NameRows()
+    delta = rows.diff(
+        (SOURCES[i % 3], i, synthetic_drug_name(i)) for i in range(args.names)
+    )
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = TrigramIndex()
+    index.update(delta)
+    build_seconds = time.perf_counter() - started
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"names: {len(index)}, build: {build_seconds:.2f}s (under tracemalloc), "
+        f"memory: {used / 2**20:.1f} MiB, {used / len(index):.0f} bytes per name"
+    )
+
+    rng = random.Random(0)
+    print(f"{'typos':>5} {'p50 ms':>8} {'p99 ms':>8} {'found':>6}")
+    for typos in (1, 2):
+        samples = []
+        found = 0
+        for _ in range(args.queries):
+            name = synthetic_drug_name(rng.randrange(args.names))
+            query = misspell(name, typos, rng)
+            started = time.perf_counter()
+            matches = index.search(query)
+            samples.append((time.perf_counter() - started) * 1000)
+            found += any(match.text == name for match in matches)
+        quantiles = statistics.quantiles(samples, n=100)
+        print(
+            f"{typos:>5} {quantiles[49]:>8.2f} {quantiles[98]:>8.2f} "
+            f"{found / args.queries:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmarks how SPL parsing throughput scales with the number of worker
+processes. Parsed batches go to a no-op sink, so no database is needed.
+
+    poetry run python -m benchmarks.bench_ingest_pool --documents 2000 --workers 1,2,4,8
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.synthetic import write_synthetic_spl
+from medsearch_api.app.ingestion.pool import iter_spl_sources, run_ingestion
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument(
+        "--filler-sections",
+        type=int,
+        default=40,
+        help="narrative sections per label, ~2.8 KB each",
+    )
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.documents):
+            write_synthetic_spl(
+                os.path.join(tmp, f"{i:07d}.xml"),
+                product_code=f"{i:05d}-001",
+                filler_sections=args.filler_sections,
+            )
+        sources = list(iter_spl_sources(tmp))
+
+        print(f"CPUs: {os.cpu_count()}, documents: {len(sources)}")
+        print(f"{'workers':>8} {'docs/sec':>10} {'speedup':>8}")
+        baseline = None
+        for workers in worker_counts:
+            stats = run_ingestion(
+                sources, lambda batch: None, workers=workers, batch_size=args.batch_size
+            )
+            assert stats.failed == 0
+            baseline = baseline or stats.documents_per_second
+            print(
+                f"{workers:>8} {stats.documents_per_second:>10.1f} "
+                f"{stats.documents_per_second / baseline:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
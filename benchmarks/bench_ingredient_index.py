@@ -0,0 +1,136 @@
+"""
+Measures the in-process ingredient posting lists: build time and memory, then
+latency of all/any/none queries over common and rare ingredients. With
+--compare-sql the same queries also run as self-joins on an in-memory SQLite
+med_ingredient_map for reference.
+
+    poetry run python -m benchmarks.bench_ingredient_index --meds 1000000 --compare-sql
+"""
+
+import argparse
+from itertools import accumulate
+import random
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, text
+
+from medsearch_api.app.search.ingredient_index import IngredientPostings
+
+
+def synthetic_med_ingredients(meds: int, ingredients: int, rng: random.Random):
+    # ingredient popularity is heavily skewed, like real labels where a few
+    # excipient-like actives appear everywhere
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(ingredients)))
+    population = range(1, ingredients + 1)
+    for med_id in range(1, meds + 1):
+        chosen = rng.choices(population, cum_weights=cum_weights, k=rng.randint(1, 4))
+        yield med_id, set(chosen)
+
+
+def sql_query(all_of, any_of, none_of) -> str:
+    # the relational form the index replaces: one self-join per required
+    # ingredient, EXISTS for the rest
+    joins = "".join(
+        f" JOIN med_ingredient_map m{i} ON m{i}.med_id = m0.med_id AND m{i}.ingredient_id = {ingredient}"
+        for i, ingredient in enumerate(all_of[1:], 1)
+    )
+    conditions = [f"m0.ingredient_id = {all_of[0]}"]
+    if any_of:
+        conditions.append(
+            "EXISTS (SELECT 1 FROM med_ingredient_map a WHERE a.med_id = m0.med_id "
+            f"AND a.ingredient_id IN ({','.join(map(str, any_of))}))"
+        )
+    if none_of:
+        conditions.append(
+            "NOT EXISTS (SELECT 1 FROM med_ingredient_map n WHERE n.med_id = m0.med_id "
+            f"AND n.ingredient_id IN ({','.join(map(str, none_of))}))"
+        )
+    return f"SELECT m0.med_id FROM med_ingredient_map m0{joins} WHERE {' AND '.join(conditions)}"
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meds", type=int, default=1_000_000)
+    parser.add_argument("--ingredients", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare-sql", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    meds = dict(synthetic_med_ingredients(args.meds, args.ingredients, rng))
+    rows = sum(len(ingredient_ids) for ingredient_ids in meds.values())
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = IngredientPostings()
+    index.replace(meds)
+    build_seconds = time.perf_counter() - started
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"meds: {len(index)}, map rows: {rows}, build: {build_seconds:.1f}s (under tracemalloc), "
+        f"memory: {used / 2**20:.1f} MiB, {used / rows:.0f} bytes per map row"
+    )
+
+    queries = {
+        "all of 2 common": ([1, 2], [], []),
+        "all of common+rare": ([1, 500], [], []),
+        "all of 2, none of 1": ([1, 2], [], [3]),
+        "any of 3 common": ([], [1, 2, 3], []),
+        "common, any of 2, none": ([1], [2, 3], [4]),
+    }
+
+    engine = None
+    if args.compare_sql:
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE TABLE med_ingredient_map (med_id INTEGER, ingredient_id INTEGER, "
+                    "PRIMARY KEY (med_id, ingredient_id))"
+                )
+            )
+            conn.execute(
+                text("INSERT INTO med_ingredient_map VALUES (:m, :i)"),
+                [{"m": m, "i": i} for m, ids in meds.items() for i in ids],
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX ix_ingredient ON med_ingredient_map (ingredient_id, med_id)"
+                )
+            )
+
+    print(f"{'query':<24} {'meds':>8} {'index ms':>9} {'sql ms':>9}")
+    for name, (all_of, any_of, none_of) in queries.items():
+        result, index_ms = timed(
+            lambda: index.query(all_of, any_of, none_of), args.repeat
+        )
+        sql_ms = float("nan")
+        if engine is not None:
+            # the SQL form needs a required ingredient to start from
+            required = all_of or any_of[:1]
+            sql = sql_query(
+                required, any_of if all_of else any_of[1:] and any_of, none_of
+            )
+            with engine.connect() as conn:
+                sql_result, sql_ms = timed(
+                    lambda: conn.execute(text(sql)).scalars().all(), args.repeat
+                )
+            if all_of:
+                assert sorted(sql_result) == result, name
+        print(f"{name:<24} {len(result):>8} {index_ms:>9.2f} {sql_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
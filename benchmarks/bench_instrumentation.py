@@ -0,0 +1,115 @@
+"""
+Measures the overhead of the request and SQL instrumentation: the same
+requests against two apps on one SQLite database, one with METRICS_ENABLED and
+one without, plus the per statement cost of the engine hooks.
+
+    poetry run python -m benchmarks.bench_instrumentation --labels 500 --requests 2000
+"""
+
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from benchmarks.synthetic import synthetic_drug_name, synthetic_spl
+from medsearch_api.app.db import db
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+from medsearch_api.app.ingestion.writer import SPLBatchWriter
+from medsearch_api.run_api import create_app
+
+
+def make_app(url: str, metrics: bool):
+    return create_app({"SQLALCHEMY_DATABASE_URI": url, "METRICS_ENABLED": metrics})
+
+
+def seed(app, labels: int) -> None:
+    with app.app_context():
+        db.create_all()
+        batch = [
+            parse_spl(
+                io.BytesIO(
+                    "".join(
+                        synthetic_spl(
+                            product_code=f"{i:05d}-001",
+                            product_name=synthetic_drug_name(i),
+                            organization=(f"{i % 50:09d}", f"Pharma {i % 50}"),
+                        )
+                    ).encode()
+                )
+            )
+            for i in range(labels)
+        ]
+        SPLBatchWriter(db.engine).write(batch)
+
+
+def time_requests(app, paths, requests: int) -> float:
+    client = app.test_client()
+    samples = []
+    for i in range(requests):
+        started = time.perf_counter()
+        response = client.get(paths[i % len(paths)])
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    return statistics.mean(samples) * 1e6
+
+
+def time_statements(app, statements: int) -> float:
+    with app.test_request_context("/"):
+        app.preprocess_request()
+        with db.engine.connect() as conn:
+            started = time.perf_counter()
+            for _ in range(statements):
+                conn.execute(text("SELECT 1"))
+            return (time.perf_counter() - started) / statements * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--labels", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--statements", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        plain, instrumented = make_app(url, False), make_app(url, True)
+        seed(plain, args.labels)
+
+        cases = {
+            "GET /meds/<id>": [f"/meds/{i}" for i in range(1, args.labels + 1)],
+            "GET /meds?expand=true&limit=50": ["/meds?expand=true&limit=50"],
+        }
+        print(f"{'case':<32} {'plain us':>10} {'metrics us':>11} {'overhead':>9}")
+        for name, paths in cases.items():
+            # warm up both apps, then alternate so drift affects both alike
+            for app in (plain, instrumented):
+                time_requests(app, paths, 100)
+            base = min(time_requests(plain, paths, args.requests) for _ in range(3))
+            with_metrics = min(
+                time_requests(instrumented, paths, args.requests) for _ in range(3)
+            )
+            print(
+                f"{name:<32} {base:>10.1f} {with_metrics:>11.1f} "
+                f"{(with_metrics / base - 1) * 100:>8.1f}%"
+            )
+
+        base = min(time_statements(plain, args.statements) for _ in range(3))
+        with_metrics = min(
+            time_statements(instrumented, args.statements) for _ in range(3)
+        )
+        print(
+            f"{'SELECT 1':<32} {base:>10.1f} {with_metrics:>11.1f} "
+            f"{(with_metrics / base - 1) * 100:>8.1f}%"
+        )
+        print(f"hook cost per statement: {with_metrics - base:.2f} us")
+        for app in (plain, instrumented):
+            with app.app_context():
+                db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Compares LIMIT/OFFSET with keyset pagination on the meds table, for page 1 and
+a deep page. Uses a temporary SQLite database by default; pass --url to run it
+against a scratch MySQL database migrated to head.
+
+    poetry run python -m benchmarks.bench_pagination --meds 600000 --page 10000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from benchmarks.synthetic import synthetic_drug_name
+from medsearch_api.app.api.lists import MED_SORTS
+from medsearch_api.app.database.models import SPL, Med, MedSearchBaseModel
+from medsearch_api.app.database.pagination import encode_cursor, keyset_page
+
+SEED_CHUNK_SIZE = 10_000
+
+
+def seed(engine, meds: int) -> None:
+    MedSearchBaseModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for start in range(1, meds + 1, SEED_CHUNK_SIZE):
+            ids = range(start, min(start + SEED_CHUNK_SIZE, meds + 1))
+            conn.execute(
+                insert(SPL),
+                [
+                    {
+                        "id": i,
+                        "set_id": str(i),
+                        "title": "t",
+                        "published_date": date.today(),
+                    }
+                    for i in ids
+                ],
+            )
+            conn.execute(
+                insert(Med),
+                [
+                    {
+                        "id": i,
+                        "spl_id": i,
+                        "code": f"{i:05d}-0001",
+                        "code_system": "2.16.840.1.113883.6.69",
+                        "name": synthetic_drug_name(i),
+                        "generic_name": synthetic_drug_name(i).lower(),
+                        "effective_date": date.today(),
+                        "version_number": 1,
+                    }
+                    for i in ids
+                ],
+            )
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="database URL (default: temporary SQLite file)")
+    parser.add_argument("--meds", type=int, default=600_000)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url)
+        if not args.url:
+            started = time.perf_counter()
+            seed(engine, args.meds)
+            print(f"seeded {args.meds} meds in {time.perf_counter() - started:.1f}s")
+
+        stmt = select(Med.id, Med.name, Med.generic_name, Med.code)
+        offset = (args.page - 1) * args.page_size
+        print(f"{'sort':<6} {'page':>6} {'offset ms':>10} {'keyset ms':>10}")
+        with Session(engine) as session:
+            for sort, column in MED_SORTS.items():
+                if sort == "updated_at":
+                    continue  # every seeded row has the same timestamp
+                ordered = stmt.order_by(column, Med.id)
+                # the row before the deep page, i.e. what the previous page's cursor points at
+                before = session.execute(ordered.offset(offset - 1).limit(1)).one()
+                deep_cursor = encode_cursor(sort, before._mapping[sort], before.id)
+                for page, cursor in ((1, None), (args.page, deep_cursor)):
+                    page_offset = (page - 1) * args.page_size
+
+                    def by_offset():
+                        return session.execute(
+                            ordered.offset(page_offset).limit(args.page_size)
+                        ).all()
+
+                    def by_keyset():
+                        return keyset_page(
+                            session,
+                            stmt,
+                            MED_SORTS,
+                            sort,
+                            Med.id,
+                            cursor,
+                            args.page_size,
+                        ).rows
+
+                    assert [r.id for r in by_offset()] == [r.id for r in by_keyset()]
+                    print(
+                        f"{sort:<6} {page:>6} {timed(by_offset, args.repeat):>10.2f} "
+                        f"{timed(by_keyset, args.repeat):>10.2f}"
+                    )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
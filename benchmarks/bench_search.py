@@ -0,0 +1,116 @@
+"""
+Measures /search query latency (p50/p95/p99) against a database. By default the
+configured MySQL app database is used, so the FULLTEXT indexes are exercised;
+--seed loads synthetic labels first and should only be pointed at a scratch
+database.
+
+    poetry run python -m benchmarks.bench_search --queries 2000
+    poetry run python -m benchmarks.bench_search --url sqlite:// --seed 5000
+"""
+
+import argparse
+import io
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.synthetic import synthetic_drug_name, synthetic_spl
+from medsearch_api.app.database.models import MedSearchBaseModel
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+from medsearch_api.app.ingestion.writer import SPLBatchWriter
+from medsearch_api.app.search.fulltext import search_meds
+
+SEED_BATCH_SIZE = 500
+
+
+def seed(engine, documents: int) -> None:
+    MedSearchBaseModel.metadata.create_all(engine)
+    writer = SPLBatchWriter(engine)
+    batch = []
+    for i in range(documents):
+        name = synthetic_drug_name(i)
+        xml = "".join(
+            synthetic_spl(
+                title=f"{name.upper()} tablets, for oral use",
+                product_code=f"{i // 1000:05d}-{i % 1000:03d}",
+                product_name=name.title(),
+                generic_name=synthetic_drug_name(i * 7 + 3).upper(),
+                ingredients=(
+                    (
+                        f"U{i % 5000:09d}",
+                        synthetic_drug_name(i % 5000).upper(),
+                        "ACTIB",
+                    ),
+                ),
+            )
+        )
+        batch.append(parse_spl(io.BytesIO(xml.encode())))
+        if len(batch) == SEED_BATCH_SIZE:
+            writer.write(batch)
+            batch = []
+    if batch:
+        writer.write(batch)
+
+
+def percentile(samples, pct: float) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(pct) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--url", help="database URL (default: configured MySQL app database)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="synthetic labels to load first"
+    )
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument(
+        "--vocabulary", type=int, default=5000, help="distinct names queried"
+    )
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from medsearch_api.app.config import get_settings
+        from medsearch_api.app.database.utils import create_app_user_engine
+
+        engine = create_app_user_engine(get_settings().MYSQL_DATABASE)
+
+    if args.seed:
+        started = time.perf_counter()
+        seed(engine, args.seed)
+        print(f"seeded {args.seed} labels in {time.perf_counter() - started:.1f}s")
+
+    # typical queries: a whole name, a typed prefix, and a name plus a second term
+    rng = random.Random(0)
+    queries = []
+    for _ in range(args.queries):
+        name = synthetic_drug_name(rng.randrange(args.vocabulary))
+        queries.append(rng.choice([name, name[:5], f"{name[:6]} tablets"]))
+
+    samples = []
+    hits = 0
+    with Session(engine) as session:
+        search_meds(session, queries[0], args.limit)  # warm up the connection
+        for query in queries:
+            started = time.perf_counter()
+            hits += len(search_meds(session, query, args.limit))
+            samples.append((time.perf_counter() - started) * 1000)
+
+    print(
+        f"dialect: {engine.dialect.name}, queries: {len(samples)}, avg hits: {hits / len(samples):.1f}"
+    )
+    print(
+        f"p50 {percentile(samples, 50):.2f} ms  p95 {percentile(samples, 95):.2f} ms  "
+        f"p99 {percentile(samples, 99):.2f} ms  max {max(samples):.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compares serving autocomplete, fuzzy and ingredient lookups from a search
+snapshot with the in-process indexes loaded from the database: time to be
+ready to serve, and lookup latency. Uses a temporary SQLite database seeded
+with a synthetic catalog.
+
+    poetry run python -m benchmarks.bench_snapshot --spls 20000 --lookups 2000
+"""
+
+import argparse
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from benchmarks.synthetic import CatalogShape, SyntheticCatalog
+from medsearch_api.app.database.models import MedSearchBaseModel
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+from medsearch_api.app.ingestion.writer import SPLBatchWriter
+from medsearch_api.app.search.ingredient_index import IngredientIndex
+from medsearch_api.app.search.name_index import NameIndex
+from medsearch_api.app.search.snapshot import Snapshot, build_snapshot
+
+SEED_BATCH_SIZE = 500
+
+
+def seed(engine, catalog: SyntheticCatalog) -> None:
+    MedSearchBaseModel.metadata.create_all(engine)
+    writer = SPLBatchWriter(engine)
+    batch = []
+    for document in catalog.documents():
+        batch.append(parse_spl(io.BytesIO(document)))
+        if len(batch) == SEED_BATCH_SIZE:
+            writer.write(batch)
+            batch = []
+    if batch:
+        writer.write(batch)
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def median_us(fn, args) -> float:
+    samples = []
+    for arg in args:
+        started = time.perf_counter()
+        fn(*arg)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spls", type=int, default=20_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(CatalogShape.for_spls(args.spls))
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, catalog)
+        path = os.path.join(tmp, "search.snapshot")
+        with engine.connect() as conn:
+            build_ms = timed(lambda: build_snapshot(conn, path))
+
+        names, ingredients = NameIndex(engine), IngredientIndex(engine)
+        load_ms = timed(lambda: (names.refresh(), ingredients.refresh()))
+        snapshot = None
+
+        def open_snapshot():
+            nonlocal snapshot
+            snapshot = Snapshot(path)
+
+        open_ms = timed(open_snapshot)
+
+        rng = random.Random(0)
+        labels = list(catalog.labels())
+        prefixes = [
+            (rng.choice(labels)["product_name"][: rng.randint(2, 5)].lower(), 10)
+            for _ in range(args.lookups)
+        ]
+        typos = []
+        for _ in range(args.lookups):
+            name = rng.choice(labels)["product_name"]
+            i = rng.randrange(len(name))
+            typos.append((name[:i] + name[i + 1 :],))
+        ingredient_ids = list(snapshot.ingredient_ids[:50])
+        queries = [
+            ([rng.choice(ingredient_ids)], [], [rng.choice(ingredient_ids)])
+            for _ in range(args.lookups)
+        ]
+
+        print(
+            f"SPLs: {args.spls}, snapshot: {os.path.getsize(path) / 1e6:.1f} MB, "
+            f"built in {build_ms:.0f} ms"
+        )
+        print(
+            f"ready to serve: database load {load_ms:.0f} ms, snapshot open {open_ms:.2f} ms"
+        )
+        print(f"{'median us':<14} {'indexes':>10} {'snapshot':>10}")
+        # autocomplete bypasses both result caches
+        for label, index_fn, snapshot_fn, lookups in (
+            ("autocomplete", names.prefixes._complete, snapshot._complete, prefixes),
+            ("fuzzy", names.fuzzy, snapshot.fuzzy, typos),
+            ("ingredients", ingredients.query, snapshot.query, queries),
+        ):
+            print(
+                f"{label:<14} {median_us(index_fn, lookups):>10.1f} "
+                f"{median_us(snapshot_fn, lookups):>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmarks the streaming SPL parser on a synthetic large label.
+
+Reports documents/sec, MB/sec and peak RSS. Run from the repo root:
+
+    poetry run python -m benchmarks.bench_spl_parser --size-mb 50 --iterations 5
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+from xml.etree import ElementTree
+
+from benchmarks.synthetic import write_synthetic_spl
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+
+# bytes per filler section with the default paragraphs_per_section
+_SECTION_BYTES = 2_800
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=50)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument(
+        "--compare-tree",
+        action="store_true",
+        help="also parse with ElementTree.parse (full tree) after the streaming run",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large_label.xml")
+        sections = int(args.size_mb * 1024 * 1024 / _SECTION_BYTES)
+        write_synthetic_spl(path, filler_sections=sections)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        baseline_rss = peak_rss_mb()
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            parsed = parse_spl(path)
+        elapsed = time.perf_counter() - start
+        assert parsed.med is not None
+
+        print(f"label size:        {size_mb:.1f} MB")
+        print(f"iterations:        {args.iterations}")
+        print(f"documents/sec:     {args.iterations / elapsed:.2f}")
+        print(f"MB/sec:            {size_mb * args.iterations / elapsed:.1f}")
+        print(f"baseline RSS:      {baseline_rss:.1f} MB")
+        print(f"peak RSS (stream): {peak_rss_mb():.1f} MB")
+
+        if args.compare_tree:
+            start = time.perf_counter()
+            ElementTree.parse(path)
+            elapsed = time.perf_counter() - start
+            print(f"full tree parse:   {elapsed:.2f} s")
+            print(f"peak RSS (tree):   {peak_rss_mb():.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
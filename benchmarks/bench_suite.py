@@ -0,0 +1,317 @@
+"""
+Runs the end to end benchmarks on one synthetic catalog and writes the results
+as JSON, so runs on different commits or databases can be compared:
+
+- generate: writing the catalog as a zip release
+- ingest: parsing and writing the release, as run_ingest does
+- search: /search latency for Zipf-distributed queries
+- detail: /meds/<id> latency and SQL statements per request
+- export: streaming every med from /export/meds as NDJSON and CSV, and, for
+  comparison, walking the expanded /meds keyset pages
+
+Uses a temporary SQLite database by default; pass --url to run it against an
+empty scratch MySQL database migrated to head. Catalogs of 100k and 1M SPLs
+take minutes and hours respectively to ingest into SQLite.
+
+    poetry run python -m benchmarks.bench_suite --spls 10k --output results.json
+    poetry run python -m benchmarks.bench_suite --spls 100k --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, func, select
+
+from benchmarks.synthetic import CatalogShape, SyntheticCatalog, ZipfSampler
+from medsearch_api.app.database.models import Med, MedSearchBaseModel
+from medsearch_api.app.database.pagination import MAX_PAGE_SIZE
+from medsearch_api.app.db import db
+from medsearch_api.app.ingestion.pool import iter_spl_sources, run_ingestion
+from medsearch_api.app.ingestion.writer import WriterPool
+from medsearch_api.run_api import create_app
+
+RESULTS_FORMAT_VERSION = 1
+SCALE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def spl_count(value: str) -> int:
+    """
+    Parses 10000, 10k or 1m.
+    """
+    value = value.strip().lower()
+    if value[-1:] in SCALE_SUFFIXES:
+        return int(float(value[:-1]) * SCALE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def percentile(samples, pct: float) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(pct) - 1]
+
+
+def latency_summary(samples_ms: List[float]) -> Dict[str, float]:
+    return {
+        "requests": len(samples_ms),
+        "p50_ms": percentile(samples_ms, 50),
+        "p95_ms": percentile(samples_ms, 95),
+        "p99_ms": percentile(samples_ms, 99),
+        "max_ms": max(samples_ms),
+    }
+
+
+def time_requests(client, paths: List[str]) -> List[float]:
+    client.get(paths[0])  # warm up the connection and the name index
+    samples = []
+    for path in paths:
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, f"{path}: {response.status_code}"
+    return samples
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_generate(catalog: SyntheticCatalog, path: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    documents = catalog.write_archive(path)
+    elapsed = time.perf_counter() - started
+    return {
+        "documents": documents,
+        "seconds": elapsed,
+        "documents_per_second": documents / elapsed,
+        "archive_bytes": os.path.getsize(path),
+    }
+
+
+# timed from outside, so the time the writers take after the last batch is
+# parsed is counted too
+def bench_ingest(app, archive: str, workers: int, writers: int) -> Dict[str, Any]:
+    with app.app_context():
+        with WriterPool(db.engine, writers=writers) as pool:
+            stats = run_ingestion(
+                iter_spl_sources(archive), pool.submit, workers=workers
+            )
+    return {
+        "documents": stats.documents,
+        "parsed": stats.parsed,
+        "failed": stats.failed,
+        "workers": workers,
+        "writers": writers,
+    }
+
+
+def bench_search(app, catalog: SyntheticCatalog, queries: int) -> Dict[str, Any]:
+    # popular names are searched most; a whole name, a typed prefix, two terms
+    rng = random.Random(catalog.seed)
+    names = [label["product_name"] for label in catalog.labels()]
+    pick = ZipfSampler(len(names), catalog.shape.zipf_exponent, rng)
+    paths = []
+    for _ in range(queries):
+        name = names[pick()]
+        query = rng.choice([name, name[:5], f"{name[:6]} tablet"])
+        paths.append(f"/search?q={query}")
+    return latency_summary(time_requests(app.test_client(), paths))
+
+
+def bench_detail(app, requests: int, seed: int) -> Dict[str, Any]:
+    with app.app_context():
+        ids = db.session.scalars(select(Med.id)).all()
+        engine = db.engine
+    statements = [0]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[-1] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    rng = random.Random(seed)
+    client = app.test_client()
+    client.get(f"/meds/{ids[0]}")
+    samples = []
+    try:
+        for _ in range(requests):
+            statements.append(0)
+            path = f"/meds/{rng.choice(ids)}"
+            started = time.perf_counter()
+            response = client.get(path)
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, f"{path}: {response.status_code}"
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    # the first count is the warm up request's
+    return {
+        **latency_summary(samples),
+        "queries_per_request_max": max(statements[1:]),
+        "queries_per_request_mean": statistics.mean(statements[1:]),
+    }
+
+
+def bench_export(app, export_format: str) -> Dict[str, Any]:
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.get(f"/export/meds?format={export_format}", buffered=False)
+    assert response.status_code == 200, f"export: {response.status_code}"
+    chunks = response_bytes = rows = 0
+    for chunk in response.iter_encoded():
+        chunks += 1
+        response_bytes += len(chunk)
+        rows += chunk.count(b"\n")
+    response.close()
+    elapsed = time.perf_counter() - started
+    if export_format == "csv":
+        rows -= 1  # the header
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "bytes": response_bytes,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed,
+    }
+
+
+def bench_list_pages(app) -> Dict[str, Any]:
+    # how downstream teams exported before /export/meds: page by page
+    client = app.test_client()
+    rows = pages = response_bytes = 0
+    started = time.perf_counter()
+    cursor = None
+    while True:
+        path = f"/meds?limit={MAX_PAGE_SIZE}&expand=true"
+        response = client.get(path + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200, f"{path}: {response.status_code}"
+        page = response.get_json()
+        pages += 1
+        rows += len(page["items"])
+        response_bytes += len(response.data)
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "pages": pages,
+        "bytes": response_bytes,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed,
+    }
+
+
+def timed(bench: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result = bench(*args)
+    result.setdefault("seconds", time.perf_counter() - started)
+    return result
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def print_comparison(baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    if baseline["catalog"] != current["catalog"]:
+        print(f"note: the baseline ran on a different catalog: {baseline['catalog']}")
+    before, after = flatten(baseline["results"]), flatten(current["results"])
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key, value in after.items():
+        if key not in before:
+            continue
+        change = f"{(value - before[key]) / before[key]:+.1%}" if before[key] else ""
+        print(f"{key:<40} {before[key]:>12.4g} {value:>12.4g} {change:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", help="database URL (default: temporary SQLite file)")
+    parser.add_argument(
+        "--spls", type=spl_count, default=10_000, help="catalog size, e.g. 10k or 1m"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--zipf-exponent", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--writers", type=int, help="writer threads (default: 1 on SQLite, else 2)"
+    )
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--detail-requests", type=int, default=1000)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    shape = CatalogShape.for_spls(args.spls, args.zipf_exponent)
+    catalog = SyntheticCatalog(shape, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app({"SQLALCHEMY_DATABASE_URI": url})
+        with app.app_context():
+            MedSearchBaseModel.metadata.create_all(db.engine)
+            dialect = db.engine.dialect.name
+        writers = args.writers or (1 if dialect == "sqlite" else 2)
+
+        results: Dict[str, Any] = {}
+        archive = os.path.join(tmp, "release.zip")
+        results["generate"] = bench_generate(catalog, archive)
+        print(f"generated {shape.spls} SPLs in {results['generate']['seconds']:.1f}s")
+        results["ingest"] = timed(bench_ingest, app, archive, args.workers, writers)
+        results["ingest"]["documents_per_second"] = (
+            results["ingest"]["documents"] / results["ingest"]["seconds"]
+        )
+        print(f"ingested in {results['ingest']['seconds']:.1f}s")
+        with app.app_context():
+            results["ingest"]["meds"] = db.session.scalar(select(func.count(Med.id)))
+        results["search"] = bench_search(app, catalog, args.queries)
+        results["detail"] = bench_detail(app, args.detail_requests, args.seed)
+        results["export_ndjson"] = bench_export(app, "ndjson")
+        results["export_csv"] = bench_export(app, "csv")
+        results["list_pages"] = bench_list_pages(app)
+
+    report = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "dialect": dialect,
+        "catalog": {**asdict(shape), "seed": args.seed},
+        "results": results,
+    }
+    print(json.dumps(report["results"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
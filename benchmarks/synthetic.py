@@ -0,0 +1,295 @@
+"""
+Synthetic SPL documents shaped like DailyMed labels, for benchmarks and tests.
+"""
+
+import bisect
+import itertools
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape, quoteattr
+from zipfile import ZIP_DEFLATED, ZipFile
+
+NDC_CODE_SYSTEM = "2.16.840.1.113883.6.69"
+FDA_FORM_CODE_SYSTEM = "2.16.840.1.113883.3.26.1.1"
+UNII_CODE_SYSTEM = "2.16.840.1.113883.4.9"
+DUNS_ROOT = "1.3.6.1.4.1.519.1"
+
+# (code, name, classCode)
+IngredientSpec = Tuple[str, str, str]
+
+# consonant-vowel syllables combined into pronounceable drug names
+_ONSETS = (
+    "b",
+    "c",
+    "d",
+    "f",
+    "g",
+    "l",
+    "m",
+    "n",
+    "p",
+    "r",
+    "s",
+    "t",
+    "v",
+    "x",
+    "z",
+    "tr",
+)
+_SYLLABLES = tuple(onset + vowel for onset in _ONSETS for vowel in "aeiou")
+_SUFFIXES = ("cillin", "pril", "statin", "olol", "azole", "mab", "tide", "vir")
+_DISTINCT_NAMES = len(_SYLLABLES) ** 3 * len(_SUFFIXES)
+
+_FILLER = (
+    "Take this medication exactly as prescribed by your doctor. Do not take more "
+    "or less of it or take it more often than prescribed. "
+)
+
+
+def synthetic_spl(
+    set_id: Optional[str] = None,
+    version_number: int = 1,
+    effective_time: str = "20240115",
+    title: str = "SYNTHETIC TABLETS, for oral use",
+    product_code: str = "12345-678",
+    product_name: str = "Synthetic",
+    generic_name: str = "SYNTHETICOL",
+    form: Tuple[str, str] = ("C42998", "TABLET"),
+    organization: Tuple[str, str] = ("123456789", "Synthetic Pharma Inc."),
+    ingredients: Sequence[IngredientSpec] = (
+        ("ABC123DEF4", "SYNTHETICOL HYDROCHLORIDE", "ACTIB"),
+        ("XYZ987WVU6", "MAGNESIUM STEARATE", "IACT"),
+    ),
+    filler_sections: int = 0,
+    paragraphs_per_section: int = 20,
+) -> Iterator[str]:
+    """
+    Yields an SPL document in chunks, so arbitrarily large labels can be written
+    without ever holding the document in memory.
+
+    filler_sections adds narrative sections after the product data section; each
+    one is roughly paragraphs_per_section * 130 bytes.
+    """
+    set_id = set_id or str(uuid.uuid4())
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<document xmlns="urn:hl7-org:v3" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n'
+    yield f'<id root="{uuid.uuid4()}"/>\n'
+    yield '<code code="34391-3" codeSystem="2.16.840.1.113883.6.1" displayName="HUMAN PRESCRIPTION DRUG LABEL"/>\n'
+    yield f"<title>{escape(title)}</title>\n"
+    yield f'<effectiveTime value="{effective_time}"/>\n'
+    yield f'<setId root="{set_id}"/>\n'
+    yield f'<versionNumber value="{version_number}"/>\n'
+    yield "<author><time/><assignedEntity><representedOrganization>"
+    yield f'<id extension="{organization[0]}" root="{DUNS_ROOT}"/>'
+    yield f"<name>{escape(organization[1])}</name>"
+    yield "</representedOrganization></assignedEntity></author>\n"
+    yield "<component><structuredBody>\n"
+    yield '<component><section><id root="{}"/>'.format(uuid.uuid4())
+    yield '<code code="48780-1" codeSystem="2.16.840.1.113883.6.1" displayName="SPL PRODUCT DATA ELEMENTS SECTION"/>'
+    yield "<subject><manufacturedProduct><manufacturedProduct>"
+    yield f'<code code="{product_code}" codeSystem="{NDC_CODE_SYSTEM}"/>'
+    yield f"<name>{escape(product_name)}</name>"
+    yield f'<formCode code={quoteattr(form[0])} codeSystem="{FDA_FORM_CODE_SYSTEM}" displayName={quoteattr(form[1])}/>'
+    yield f"<asEntityWithGeneric><genericMedicine><name>{escape(generic_name)}</name></genericMedicine></asEntityWithGeneric>"
+    for code, name, class_code in ingredients:
+        yield f'<ingredient classCode="{class_code}">'
+        yield '<quantity><numerator value="10" unit="mg"/><denominator value="1" unit="1"/></quantity>'
+        yield f'<ingredientSubstance><code code={quoteattr(code)} codeSystem="{UNII_CODE_SYSTEM}"/>'
+        yield f"<name>{escape(name)}</name></ingredientSubstance></ingredient>"
+    yield "</manufacturedProduct></manufacturedProduct></subject></section></component>\n"
+    for section in range(filler_sections):
+        yield f'<component><section><id root="{uuid.uuid4()}"/>'
+        yield f"<title>Section {section}</title><text>"
+        for _ in range(paragraphs_per_section):
+            yield f"<paragraph>{_FILLER}</paragraph>\n"
+        yield "</text></section></component>\n"
+    yield "</structuredBody></component>\n</document>\n"
+
+
+def write_synthetic_spl(path: str, **kwargs) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in synthetic_spl(**kwargs):
+            f.write(chunk)
+
+
+def synthetic_drug_name(i: int) -> str:
+    """
+    Deterministic, pronounceable drug name for index i, distinct for every i
+    below 80**3 * 8 = 4,096,000. Consecutive indexes map to unrelated names.
+    """
+    cycle, i = divmod(i, _DISTINCT_NAMES)
+    # multiplying by a number coprime to _DISTINCT_NAMES permutes the indexes
+    i = i * 2654435761 % _DISTINCT_NAMES
+    i, suffix = divmod(i, len(_SUFFIXES))
+    n = len(_SYLLABLES)
+    name = (
+        _SYLLABLES[i % n]
+        + _SYLLABLES[i // n % n]
+        + _SYLLABLES[i // n // n]
+        + _SUFFIXES[suffix]
+    )
+    return f"{name} {cycle}" if cycle else name
+
+
+# dosage forms in roughly the order of how many labels use them
+_FORM_NAMES = (
+    "TABLET",
+    "TABLET, FILM COATED",
+    "CAPSULE",
+    "INJECTION, SOLUTION",
+    "SOLUTION",
+    "CREAM",
+    "TABLET, EXTENDED RELEASE",
+    "OINTMENT",
+    "LIQUID",
+    "GEL",
+    "CAPSULE, EXTENDED RELEASE",
+    "SUSPENSION",
+    "LOTION",
+    "SPRAY",
+    "INJECTION, POWDER, LYOPHILIZED, FOR SOLUTION",
+    "TABLET, CHEWABLE",
+    "KIT",
+    "POWDER",
+    "PATCH",
+    "AEROSOL",
+    "SHAMPOO",
+    "TABLET, ORALLY DISINTEGRATING",
+    "SYRUP",
+    "LOZENGE",
+    "SUPPOSITORY",
+    "EMULSION",
+    "CAPSULE, DELAYED RELEASE",
+    "GRANULE",
+    "FILM",
+    "STICK",
+)
+_ORGANIZATION_SUFFIXES = ("Pharmaceuticals", "Laboratories", "Inc.", "LLC", "Health")
+_FIRST_DATE = date(2006, 1, 1)
+_DATE_RANGE_DAYS = (date(2026, 1, 1) - _FIRST_DATE).days
+
+
+class ZipfSampler:
+    """
+    Draws indexes 0..n-1 with P(k) proportional to 1 / (k + 1) ** exponent, so a
+    few values are picked for most draws and a long tail is picked rarely.
+    """
+
+    def __init__(self, n: int, exponent: float, rng: random.Random):
+        self.rng = rng
+        self.cumulative = list(
+            itertools.accumulate(1 / (k + 1) ** exponent for k in range(n))
+        )
+
+    def __call__(self) -> int:
+        return bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+@dataclass(frozen=True)
+class CatalogShape:
+    """
+    Pool sizes of a synthetic catalog. DailyMed has about 150k labels, 10k
+    labelers, 9k active and 2k inactive ingredients; the defaults keep those
+    ratios as the catalog grows.
+    """
+
+    spls: int
+    organizations: int
+    active_ingredients: int
+    inactive_ingredients: int
+    forms: int = len(_FORM_NAMES)
+    zipf_exponent: float = 1.0
+
+    @classmethod
+    def for_spls(cls, spls: int, zipf_exponent: float = 1.0) -> "CatalogShape":
+        return cls(
+            spls=spls,
+            organizations=max(10, spls // 15),
+            active_ingredients=max(20, spls // 16),
+            inactive_ingredients=max(10, min(2000, spls // 50)),
+            zipf_exponent=zipf_exponent,
+        )
+
+
+class SyntheticCatalog:
+    """
+    A deterministic catalog of synthetic SPLs: the same shape and seed always
+    give the same labels. Forms, labelers and ingredients are drawn from
+    Zipf-distributed pools, as in DailyMed, where a handful of forms, large
+    labelers and excipients appear on most labels. Labels are generated one at
+    a time, so catalogs of millions of SPLs never sit in memory.
+    """
+
+    def __init__(self, shape: CatalogShape, seed: int = 0):
+        self.shape = shape
+        self.seed = seed
+
+    def labels(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the synthetic_spl keyword arguments of every label, in order.
+        """
+        shape = self.shape
+        rng = random.Random(self.seed)
+        form = ZipfSampler(shape.forms, shape.zipf_exponent, rng)
+        organization = ZipfSampler(shape.organizations, shape.zipf_exponent, rng)
+        active = ZipfSampler(shape.active_ingredients, shape.zipf_exponent, rng)
+        inactive = ZipfSampler(shape.inactive_ingredients, shape.zipf_exponent, rng)
+        for i in range(shape.spls):
+            actives = {active() for _ in range(rng.choices((1, 2, 3), (80, 15, 5))[0])}
+            inactives = {inactive() for _ in range(rng.randint(0, 6))}
+            ingredients: List[IngredientSpec] = [
+                (f"A{k:09d}", synthetic_drug_name(k).upper(), "ACTIB")
+                for k in sorted(actives)
+            ] + [
+                (f"I{k:09d}", f"EXCIPIENT {synthetic_drug_name(k).upper()}", "IACT")
+                for k in sorted(inactives)
+            ]
+            generic_name = ", ".join(name for _, name, _ in ingredients[: len(actives)])
+            form_index = form()
+            org_index = organization()
+            published = _FIRST_DATE + timedelta(days=rng.randrange(_DATE_RANGE_DAYS))
+            product_name = synthetic_drug_name(i).title()
+            yield {
+                "set_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "version_number": 1 + int(rng.expovariate(0.5)),
+                "effective_time": published.strftime("%Y%m%d"),
+                "title": f"{product_name.upper()} ({generic_name}) "
+                f"{_FORM_NAMES[form_index]}",
+                # labeler code from the organization, product code unique per label
+                "product_code": f"{org_index:05d}-{i:07d}",
+                "product_name": product_name,
+                "generic_name": generic_name,
+                "form": (f"C{90000 + form_index}", _FORM_NAMES[form_index]),
+                "organization": (
+                    f"{org_index:09d}",
+                    f"{synthetic_drug_name(org_index).title()} "
+                    f"{_ORGANIZATION_SUFFIXES[org_index % len(_ORGANIZATION_SUFFIXES)]}",
+                ),
+                "ingredients": ingredients,
+            }
+
+    def documents(self, **kwargs) -> Iterator[bytes]:
+        """
+        Yields every label as an SPL document. kwargs, e.g. filler_sections,
+        are passed on to synthetic_spl.
+        """
+        for label in self.labels():
+            yield "".join(synthetic_spl(**label, **kwargs)).encode()
+
+    def write_archive(self, path: str, **kwargs) -> int:
+        """
+        Writes the catalog as a zip of XML documents, which the ingestion
+        pipeline reads like a DailyMed release.
+
+        Returns:
+            int: The number of documents written.
+        """
+        written = 0
+        with ZipFile(path, "w", ZIP_DEFLATED) as archive:
+            for i, document in enumerate(self.documents(**kwargs)):
+                archive.writestr(f"{i:08d}.xml", document)
+                written += 1
+        return written
@@ -0,0 +1,16 @@
+from flask import Blueprint, jsonify
+
+from medsearch_api.app.api.utils import get_int_arg, get_name_index, get_str_arg
+from medsearch_api.app.search.autocomplete import DEFAULT_LIMIT, MAX_LIMIT
+
+autocomplete_blueprint = Blueprint("autocomplete", __name__)
+
+
+@autocomplete_blueprint.get("/autocomplete")
+def autocomplete():
+    prefix = get_str_arg("q")
+    limit = get_int_arg("limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+    suggestions = get_name_index().complete(prefix, limit)
+    return jsonify(
+        query=prefix, suggestions=[suggestion.to_dict() for suggestion in suggestions]
+    )
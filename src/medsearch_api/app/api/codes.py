@@ -0,0 +1,43 @@
+from flask import Blueprint, jsonify, request
+
+from medsearch_api.app.api.meds import med_to_dict
+from medsearch_api.app.api.utils import BadRequestException
+from medsearch_api.app.db import db, use_replica
+from medsearch_api.app.ingestion.ndc import normalize_ndc
+from medsearch_api.app.search.codes import MAX_CODES, find_meds_by_codes
+
+codes_blueprint = Blueprint("codes", __name__)
+codes_blueprint.before_request(use_replica)
+
+
+@codes_blueprint.post("/meds/by-codes")
+def meds_by_codes():
+    """
+    Resolves a JSON body of {"codes": [...]}, product or package NDCs in any
+    hyphenation layout, to live meds. Results are in the order of the codes;
+    a code that isn't a valid NDC has a null normalized_code and no meds.
+    """
+    body = request.get_json(silent=True)
+    codes = body.get("codes") if isinstance(body, dict) else None
+    if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+        raise BadRequestException(
+            "Request body must be a JSON object with a 'codes' list of strings."
+        )
+    if len(codes) > MAX_CODES:
+        raise BadRequestException(
+            f"At most {MAX_CODES} codes can be looked up at once."
+        )
+
+    normalized = [normalize_ndc(code) for code in codes]
+    meds = find_meds_by_codes(db.session, (n for n in normalized if n is not None))
+    results = [
+        {
+            "code": code,
+            "normalized_code": normalized_code,
+            "meds": [med_to_dict(med) for med in meds.get(normalized_code, [])],
+        }
+        for code, normalized_code in zip(codes, normalized)
+    ]
+    return jsonify(
+        matched=sum(1 for result in results if result["meds"]), results=results
+    )
@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify
+
+from medsearch_api.app.api.utils import NotFoundException, get_bool_arg, get_int_arg
+from medsearch_api.app.db import db, use_replica
+from medsearch_api.app.search.equivalents import (
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    find_equivalents,
+)
+
+equivalents_blueprint = Blueprint("equivalents", __name__)
+equivalents_blueprint.before_request(use_replica)
+
+
+@equivalents_blueprint.get("/meds/<int:med_id>/equivalents")
+def equivalents(med_id: int):
+    same_form = get_bool_arg("same_form", True)
+    limit = get_int_arg("limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+    meds = find_equivalents(db.session, med_id, same_form, limit)
+    if meds is None:
+        raise NotFoundException(f"Med {med_id} not found.")
+    return jsonify(med_id=med_id, equivalents=[med.to_dict() for med in meds])
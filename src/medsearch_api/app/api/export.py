@@ -0,0 +1,37 @@
+from flask import Blueprint, Response, request, stream_with_context
+
+from medsearch_api.app.api.utils import BadRequestException, get_int_arg
+from medsearch_api.app.database.export import (
+    DEFAULT_EXPORT_BATCH_SIZE,
+    EXPORT_FORMATS,
+    MAX_EXPORT_BATCH_SIZE,
+    export_meds,
+)
+from medsearch_api.app.db import read_engine
+
+export_blueprint = Blueprint("export", __name__)
+
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@export_blueprint.get("/export/meds")
+def export_all_meds():
+    """
+    Every live med with its form, label, organizations and ingredients, as a
+    chunked response: ?format=ndjson (default) or csv, and batch_size, the
+    meds read and sent per chunk.
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in EXPORT_FORMATS:
+        raise BadRequestException(
+            f"Query parameter 'format' must be one of {', '.join(EXPORT_FORMATS)}."
+        )
+    batch_size = get_int_arg(
+        "batch_size", DEFAULT_EXPORT_BATCH_SIZE, 1, MAX_EXPORT_BATCH_SIZE
+    )
+    chunks = export_meds(read_engine(), export_format, batch_size)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename=meds.{export_format}"},
+    )
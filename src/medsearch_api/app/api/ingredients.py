@@ -0,0 +1,56 @@
+from flask import Blueprint, jsonify
+from sqlalchemy import select
+
+from medsearch_api.app.api.utils import (
+    BadRequestException,
+    get_ingredient_index,
+    get_int_arg,
+    get_int_list_arg,
+)
+from medsearch_api.app.database.models import Med
+from medsearch_api.app.db import db, use_replica
+from medsearch_api.app.search.ingredient_index import IngredientQueryException
+from medsearch_api.app.search.snapshot import SnapshotIndex
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+ingredients_blueprint = Blueprint("ingredients", __name__)
+ingredients_blueprint.before_request(use_replica)
+
+
+@ingredients_blueprint.get("/meds/by-ingredients")
+def meds_by_ingredients():
+    """
+    Meds containing all of ?all=, at least one of ?any= and none of ?none=,
+    each a comma separated list of ingredient ids.
+    """
+    all_of = get_int_list_arg("all")
+    any_of = get_int_list_arg("any")
+    none_of = get_int_list_arg("none")
+    limit = get_int_arg("limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+    index = get_ingredient_index()
+    try:
+        med_ids = index.query(all_of, any_of, none_of)
+    except IngredientQueryException as e:
+        raise BadRequestException(str(e))
+
+    page = med_ids[:limit]
+    if isinstance(index, SnapshotIndex):
+        # the snapshot has the names too; no database round trip
+        snapshot = index.current
+        meds = [snapshot.med(med_id) for med_id in page]
+        rows = [(med["id"], med["name"], med["generic_name"]) for med in meds if med]
+    else:
+        rows = db.session.execute(
+            select(Med.id, Med.name, Med.generic_name)
+            .where(Med.id.in_(page))
+            .order_by(Med.id)
+        ).all()
+    return jsonify(
+        count=len(med_ids),
+        meds=[
+            {"id": id_, "name": name, "generic_name": generic_name}
+            for id_, name, generic_name in rows
+        ],
+    )
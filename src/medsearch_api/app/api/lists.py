@@ -0,0 +1,100 @@
+from typing import Mapping, Sequence
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import Column, select
+
+from medsearch_api.app.api.meds import med_to_dict
+from medsearch_api.app.api.utils import BadRequestException, get_bool_arg, get_int_arg
+from medsearch_api.app.database.loading import MED_LIST
+from medsearch_api.app.database.models import SPL, Med, Organization
+from medsearch_api.app.database.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Page,
+    PaginationException,
+    keyset_page,
+    page_to_dict,
+)
+from medsearch_api.app.db import db, use_replica
+
+lists_blueprint = Blueprint("lists", __name__)
+lists_blueprint.before_request(use_replica)
+
+# every sort here has a (column, id) index, see migration 5f0b7c2e9d14
+MED_SORTS = {"id": Med.id, "name": Med.name, "updated_at": Med.updated_at}
+MED_FIELDS = (
+    "id",
+    "spl_id",
+    "name",
+    "generic_name",
+    "code",
+    "code_system",
+    "med_form_id",
+    "updated_at",
+)
+SPL_SORTS = {
+    "id": SPL.id,
+    "published_date": SPL.published_date,
+    "updated_at": SPL.updated_at,
+}
+SPL_FIELDS = ("id", "set_id", "title", "published_date", "updated_at")
+ORGANIZATION_SORTS = {"id": Organization.id, "updated_at": Organization.updated_at}
+ORGANIZATION_FIELDS = ("id", "name", "nih_id_extension", "nih_id_root", "updated_at")
+
+
+def _page(model, sorts: Mapping[str, Column], fields: Sequence[str]) -> Page:
+    limit = get_int_arg("limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    stmt = select(*(getattr(model, field) for field in fields)).where(
+        model.deleted_at.is_(None)
+    )
+    try:
+        page = keyset_page(
+            db.session,
+            stmt,
+            sorts,
+            request.args.get("sort", "id"),
+            model.id,
+            request.args.get("cursor"),
+            limit,
+        )
+    except PaginationException as e:
+        raise BadRequestException(str(e))
+    return page
+
+
+def _list(model, sorts: Mapping[str, Column], fields: Sequence[str]):
+    """
+    A page of live rows of model. Query parameters: sort (default id), limit,
+    and cursor, the next_cursor of the previous page.
+    """
+    return jsonify(page_to_dict(_page(model, sorts, fields), fields))
+
+
+@lists_blueprint.get("/meds")
+def list_meds():
+    """
+    Like the other lists; with ?expand=true each med also has its form,
+    organizations and ingredients, loaded with the MED_LIST plan.
+    """
+    if not get_bool_arg("expand", False):
+        return _list(Med, MED_SORTS, MED_FIELDS)
+
+    # the sort columns are enough to page; the plan loads the rest
+    page = _page(Med, MED_SORTS, tuple(MED_SORTS))
+    ids = [row.id for row in page.rows]
+    meds = db.session.scalars(select(Med).where(Med.id.in_(ids)).options(*MED_LIST))
+    by_id = {med.id: med for med in meds}
+    return jsonify(
+        items=[med_to_dict(by_id[id_]) for id_ in ids],
+        next_cursor=page.next_cursor,
+    )
+
+
+@lists_blueprint.get("/spls")
+def list_spls():
+    return _list(SPL, SPL_SORTS, SPL_FIELDS)
+
+
+@lists_blueprint.get("/organizations")
+def list_organizations():
+    return _list(Organization, ORGANIZATION_SORTS, ORGANIZATION_FIELDS)
@@ -0,0 +1,74 @@
+from typing import Any, Dict
+
+from flask import Blueprint, jsonify
+from sqlalchemy import Select, select
+
+from medsearch_api.app.api.utils import NotFoundException
+from medsearch_api.app.database.loading import MED_DETAIL
+from medsearch_api.app.database.models import Med
+from medsearch_api.app.db import db, use_replica
+
+meds_blueprint = Blueprint("meds", __name__)
+meds_blueprint.before_request(use_replica)
+
+
+def med_to_dict(med: Med) -> Dict[str, Any]:
+    """
+    Serializes a med with its form, organizations and ingredients; the query
+    must load them with a plan from database/loading.py.
+    """
+    form = med.form
+    return {
+        "id": med.id,
+        "spl_id": med.spl_id,
+        "name": med.name,
+        "generic_name": med.generic_name,
+        "code": med.code,
+        "code_system": med.code_system,
+        "effective_date": med.effective_date and med.effective_date.isoformat(),
+        "version_number": med.version_number,
+        "form": form and {"id": form.id, "code": form.code, "name": form.name},
+        "organizations": [
+            {"id": m.organization.id, "name": m.organization.name}
+            for m in med.organization_maps
+        ],
+        "ingredients": [
+            {
+                "id": m.ingredient.id,
+                "name": m.ingredient.name,
+                "code": m.ingredient.code,
+            }
+            for m in med.ingredient_maps
+        ],
+    }
+
+
+def med_detail_to_dict(med: Med) -> Dict[str, Any]:
+    """
+    med_to_dict plus the label, for meds loaded with MED_DETAIL.
+    """
+    spl = med.spl
+    return med_to_dict(med) | {
+        "spl": {
+            "id": spl.id,
+            "set_id": spl.set_id,
+            "title": spl.title,
+            "published_date": spl.published_date.isoformat(),
+        }
+    }
+
+
+def med_detail_statement(med_id: int) -> Select:
+    return (
+        select(Med)
+        .where(Med.id == med_id, Med.deleted_at.is_(None))
+        .options(*MED_DETAIL)
+    )
+
+
+@meds_blueprint.get("/meds/<int:med_id>")
+def med_detail(med_id: int):
+    med = db.session.scalars(med_detail_statement(med_id)).first()
+    if med is None:
+        raise NotFoundException(f"Med {med_id} not found.")
+    return jsonify(med_detail_to_dict(med))
@@ -0,0 +1,17 @@
+from flask import Blueprint, Response, current_app
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from medsearch_api.app.api.utils import NotFoundException
+
+metrics_blueprint = Blueprint("metrics", __name__)
+
+
+@metrics_blueprint.get("/metrics")
+def metrics():
+    """
+    Request, SQL and connection pool metrics in the Prometheus text format.
+    """
+    instrumentation = current_app.extensions.get("instrumentation")
+    if instrumentation is None:
+        raise NotFoundException("Metrics are disabled.")
+    return Response(instrumentation.render(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,36 @@
+from flask import Blueprint, jsonify
+
+from medsearch_api.app.api.utils import get_int_arg, get_name_index, get_str_arg
+from medsearch_api.app.db import db, use_replica
+from medsearch_api.app.search import trigram
+from medsearch_api.app.search.fulltext import DEFAULT_LIMIT, MAX_LIMIT, search_meds
+
+search_blueprint = Blueprint("search", __name__)
+search_blueprint.before_request(use_replica)
+
+
+@search_blueprint.get("/search")
+def search():
+    query = get_str_arg("q")
+    limit = get_int_arg("limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+    results = search_meds(db.session, query, limit)
+    corrected_query = None
+    if not results:
+        # probably misspelled: retry with the closest known name
+        matches = get_name_index().fuzzy(query, limit=1)
+        if matches:
+            corrected_query = matches[0].text
+            results = search_meds(db.session, corrected_query, limit)
+    return jsonify(
+        query=query,
+        corrected_query=corrected_query,
+        results=[result.to_dict() for result in results],
+    )
+
+
+@search_blueprint.get("/search/fuzzy")
+def fuzzy_search():
+    query = get_str_arg("q")
+    limit = get_int_arg("limit", trigram.DEFAULT_LIMIT, 1, MAX_LIMIT)
+    matches = get_name_index().fuzzy(query, limit)
+    return jsonify(query=query, matches=[match.to_dict() for match in matches])
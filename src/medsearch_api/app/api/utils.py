@@ -0,0 +1,123 @@
+from typing import Any, Callable, List, Mapping, Optional, Union
+
+from flask import Flask, current_app, jsonify, request
+
+from medsearch_api.app.db import read_engine
+from medsearch_api.app.search.ingredient_index import IngredientIndex
+from medsearch_api.app.search.name_index import NameIndex
+from medsearch_api.app.search.snapshot import SnapshotIndex
+
+
+class BadRequestException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class NotFoundException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+# the helpers read Flask's request.args unless given another mapping of query
+# parameters, as the async API does
+
+
+def get_str_arg(name: str, args: Optional[Mapping[str, str]] = None) -> str:
+    value = (request.args if args is None else args).get(name, "").strip()
+    if not value:
+        raise BadRequestException(f"Query parameter '{name}' is required.")
+    return value
+
+
+def get_int_arg(
+    name: str,
+    default: int,
+    minimum: int,
+    maximum: int,
+    args: Optional[Mapping[str, str]] = None,
+) -> int:
+    raw = (request.args if args is None else args).get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise BadRequestException(f"Query parameter '{name}' must be an integer.")
+    if not minimum <= value <= maximum:
+        raise BadRequestException(
+            f"Query parameter '{name}' must be between {minimum} and {maximum}."
+        )
+    return value
+
+
+def register_error_handlers(app: Flask) -> None:
+    @app.errorhandler(BadRequestException)
+    def handle_bad_request(e: BadRequestException):
+        return jsonify(error=str(e)), 400
+
+    @app.errorhandler(NotFoundException)
+    def handle_not_found(e: NotFoundException):
+        return jsonify(error=str(e)), 404
+
+
+def get_bool_arg(name: str, default: bool) -> bool:
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    if raw.lower() in ("1", "true", "yes"):
+        return True
+    if raw.lower() in ("0", "false", "no"):
+        return False
+    raise BadRequestException(f"Query parameter '{name}' must be true or false.")
+
+
+def get_int_list_arg(name: str) -> List[int]:
+    raw = request.args.get(name, "")
+    try:
+        return [int(value) for value in raw.split(",") if value.strip()]
+    except ValueError:
+        raise BadRequestException(
+            f"Query parameter '{name}' must be a comma separated list of integers."
+        )
+
+
+def _get_index(name: str, factory: Callable[[], Any]) -> Any:
+    # one index per app and worker process, loaded on first use and refreshed
+    # from the replica when there is one
+    index = current_app.extensions.get(name)
+    if index is None:
+        index = current_app.extensions.setdefault(name, factory())
+    return index
+
+
+def get_snapshot_index() -> Optional[SnapshotIndex]:
+    """
+    The search snapshot at SEARCH_SNAPSHOT_PATH, or None if none is configured.
+    """
+    path = current_app.config.get("SEARCH_SNAPSHOT_PATH")
+    if not path:
+        return None
+    return _get_index(
+        "snapshot_index",
+        lambda: SnapshotIndex(
+            path, current_app.config["SEARCH_SNAPSHOT_CHECK_SECONDS"]
+        ),
+    )
+
+
+def get_name_index() -> Union[NameIndex, SnapshotIndex]:
+    return get_snapshot_index() or _get_index(
+        "name_index",
+        lambda: NameIndex(
+            read_engine(), current_app.config["NAME_INDEX_REFRESH_SECONDS"]
+        ),
+    )
+
+
+def get_ingredient_index() -> Union[IngredientIndex, SnapshotIndex]:
+    return get_snapshot_index() or _get_index(
+        "ingredient_index",
+        lambda: IngredientIndex(
+            read_engine(), current_app.config["INGREDIENT_INDEX_REFRESH_SECONDS"]
+        ),
+    )
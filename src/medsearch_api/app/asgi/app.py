@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from medsearch_api.app.api.meds import med_detail_statement, med_detail_to_dict
+from medsearch_api.app.api.utils import (
+    BadRequestException,
+    NotFoundException,
+    get_int_arg,
+    get_str_arg,
+)
+from medsearch_api.app.database.engines import create_async_app_engine, get_engine
+from medsearch_api.app.search import autocomplete, fulltext, trigram
+from medsearch_api.app.search.name_index import NameIndex
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., Awaitable[Dict[str, Any]]]
+
+
+class AsyncReadAPI:
+    """
+    ASGI app serving the read endpoints /search, /search/fuzzy, /meds/<id> and
+    /autocomplete with the same queries and responses as the Flask app, but on
+    an event loop: a request waiting on MySQL holds a coroutine rather than a
+    thread, so one worker can keep thousands of slow clients in flight.
+
+    Queries run on an async engine over the replica when there is one. The
+    name index is refreshed through a sync engine in a worker thread, so a
+    refresh never blocks the loop.
+    """
+
+    def __init__(
+        self,
+        database_uri: str,
+        replica_uri: Optional[str] = None,
+        name_index_refresh_seconds: float = 60.0,
+    ):
+        read_uri = replica_uri or database_uri
+        self.engine = create_async_app_engine(read_uri)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.name_index = NameIndex(get_engine(read_uri), name_index_refresh_seconds)
+        self.routes: List[Tuple[re.Pattern, Handler]] = [
+            (re.compile(r"/search"), self.search),
+            (re.compile(r"/search/fuzzy"), self.fuzzy_search),
+            (re.compile(r"/meds/(\d+)"), self.med_detail),
+            (re.compile(r"/autocomplete"), self.autocomplete),
+        ]
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            status, body = await self._dispatch(scope)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": status,
+                    "headers": [(b"content-type", b"application/json")],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _dispatch(self, scope) -> Tuple[int, bytes]:
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(scope["path"])
+            if match:
+                break
+        else:
+            return _error(404, "Not found.")
+        if scope["method"] not in ("GET", "HEAD"):
+            return _error(405, "Method not allowed.")
+
+        args = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+        try:
+            result = await handler(args, *match.groups())
+        except BadRequestException as e:
+            return _error(400, str(e))
+        except NotFoundException as e:
+            return _error(404, str(e))
+        except Exception:
+            logger.exception(f"Error handling {scope['path']}")
+            return _error(500, "Internal server error.")
+        return 200, json.dumps(result).encode()
+
+    async def _names(self) -> NameIndex:
+        if self.name_index.stale:
+            await asyncio.to_thread(self.name_index.ensure_fresh)
+        return self.name_index
+
+    async def _search_meds(
+        self, session: AsyncSession, query: str, limit: int
+    ) -> List[fulltext.SearchResult]:
+        stmt = fulltext.search_statement(self.engine.dialect.name, query, limit)
+        if stmt is None:
+            return []
+        return fulltext.to_results(await session.execute(stmt))
+
+    async def search(self, args: Dict[str, str]) -> Dict[str, Any]:
+        query = get_str_arg("q", args)
+        limit = get_int_arg(
+            "limit", fulltext.DEFAULT_LIMIT, 1, fulltext.MAX_LIMIT, args
+        )
+        async with self.sessions() as session:
+            results = await self._search_meds(session, query, limit)
+            corrected_query = None
+            if not results:
+                # probably misspelled: retry with the closest known name
+                matches = (await self._names()).trigrams.search(query, limit=1)
+                if matches:
+                    corrected_query = matches[0].text
+                    results = await self._search_meds(session, corrected_query, limit)
+        return {
+            "query": query,
+            "corrected_query": corrected_query,
+            "results": [result.to_dict() for result in results],
+        }
+
+    async def fuzzy_search(self, args: Dict[str, str]) -> Dict[str, Any]:
+        query = get_str_arg("q", args)
+        limit = get_int_arg("limit", trigram.DEFAULT_LIMIT, 1, fulltext.MAX_LIMIT, args)
+        matches = (await self._names()).trigrams.search(query, limit)
+        return {"query": query, "matches": [match.to_dict() for match in matches]}
+
+    async def med_detail(self, args: Dict[str, str], med_id: str) -> Dict[str, Any]:
+        async with self.sessions() as session:
+            med = (await session.scalars(med_detail_statement(int(med_id)))).first()
+            if med is None:
+                raise NotFoundException(f"Med {med_id} not found.")
+            return med_detail_to_dict(med)
+
+    async def autocomplete(self, args: Dict[str, str]) -> Dict[str, Any]:
+        prefix = get_str_arg("q", args)
+        limit = get_int_arg(
+            "limit", autocomplete.DEFAULT_LIMIT, 1, autocomplete.MAX_LIMIT, args
+        )
+        suggestions = (await self._names()).prefixes.complete(prefix, limit)
+        return {
+            "query": prefix,
+            "suggestions": [suggestion.to_dict() for suggestion in suggestions],
+        }
+
+
+def _error(status: int, message: str) -> Tuple[int, bytes]:
+    return status, json.dumps({"error": message}).encode()
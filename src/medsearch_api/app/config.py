@@ -1,13 +1,20 @@
 import logging
 import logging.config
+from functools import lru_cache
 from typing import Optional
 from pydantic_settings import BaseSettings
 from pydantic import FilePath
 from pydantic.functional_validators import field_validator
 import os
+import re
 from pathlib import Path
 
-# Print the current working directory
+logger = logging.getLogger(__name__)
+
+# values masked in the settings logged at startup
+SECRET_SETTINGS = frozenset({"MYSQL_ADMIN_PASSWORD", "MYSQL_PASSWORD"})
+# the password of a user:password@host database URI
+_URI_PASSWORD = re.compile(r"(://[^:/@]*:)[^@]*@")
 
 
 class Settings(BaseSettings):
@@ -28,8 +35,86 @@ class Settings(BaseSettings):
         f"mysql://{MYSQL_USER or ''}:{MYSQL_PASSWORD or ''}@{MYSQL_HOST or 'localhost'}:{MYSQL_PORT or 3306}/{MYSQL_DATABASE or ''}"
     )
 
+    # optional read replica for read-only endpoints, see db.RoutingSession
+    MYSQL_REPLICA_HOST: Optional[str] = os.getenv("MYSQL_REPLICA_HOST")
+    REPLICA_DATABASE_URI: Optional[str] = (
+        f"mysql://{MYSQL_USER or ''}:{MYSQL_PASSWORD or ''}@{MYSQL_REPLICA_HOST}:{MYSQL_PORT or 3306}/{MYSQL_DATABASE or ''}"
+        if MYSQL_REPLICA_HOST
+        else None
+    )
+
     SQLALCHEMY_TRACK_MODIFICATIONS: bool = False
 
+    # connection pool of each MySQL engine, see database/engines.py
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", default="10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", default="10"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(
+        os.getenv("DB_POOL_TIMEOUT_SECONDS", default="30")
+    )
+    # below MySQL's wait_timeout, so the server never drops a pooled connection first
+    DB_POOL_RECYCLE_SECONDS: int = int(
+        os.getenv("DB_POOL_RECYCLE_SECONDS", default="3600")
+    )
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", default="true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+    # seconds between incremental refreshes of the in-process name indexes (autocomplete, fuzzy search)
+    NAME_INDEX_REFRESH_SECONDS: float = float(
+        os.getenv("NAME_INDEX_REFRESH_SECONDS", default="60")
+    )
+    # seconds between incremental refreshes of the in-process ingredient posting lists
+    INGREDIENT_INDEX_REFRESH_SECONDS: float = float(
+        os.getenv("INGREDIENT_INDEX_REFRESH_SECONDS", default="60")
+    )
+    # serve autocomplete, fuzzy and ingredient queries from a snapshot file built
+    # by run_snapshot.py instead of indexes loaded from the database
+    SEARCH_SNAPSHOT_PATH: Optional[str] = os.getenv("SEARCH_SNAPSHOT_PATH")
+    # seconds between checks for a newer snapshot at SEARCH_SNAPSHOT_PATH
+    SEARCH_SNAPSHOT_CHECK_SECONDS: float = float(
+        os.getenv("SEARCH_SNAPSHOT_CHECK_SECONDS", default="30")
+    )
+    # DailyMed web services, see ingestion/fetch.py and run_fetch.py
+    DAILYMED_BASE_URL: str = os.getenv(
+        "DAILYMED_BASE_URL", default="https://dailymed.nlm.nih.gov/dailymed/services/v2"
+    )
+    # local store of downloaded SPL documents, see ingestion/cache.py
+    SPL_CACHE_PATH: Optional[str] = os.getenv("SPL_CACHE_PATH")
+    # least recently used documents are evicted beyond this size; 20 GiB
+    SPL_CACHE_MAX_BYTES: int = int(
+        os.getenv("SPL_CACHE_MAX_BYTES", default=str(20 * 1024**3))
+    )
+    # production server, see run_server.py; each worker holds its own DB pools
+    API_BIND: str = os.getenv("API_BIND", default="0.0.0.0:5000")
+    API_WORKERS: int = int(os.getenv("API_WORKERS", default=str(os.cpu_count() or 1)))
+    API_THREADS: int = int(os.getenv("API_THREADS", default="4"))
+    # a worker silent for this long is killed and replaced
+    API_TIMEOUT_SECONDS: int = int(os.getenv("API_TIMEOUT_SECONDS", default="30"))
+    # time in-flight requests get to finish on shutdown
+    API_GRACEFUL_TIMEOUT_SECONDS: int = int(
+        os.getenv("API_GRACEFUL_TIMEOUT_SECONDS", default="30")
+    )
+    API_KEEPALIVE_SECONDS: int = int(os.getenv("API_KEEPALIVE_SECONDS", default="5"))
+    # requests before a worker is recycled, 0 for never
+    API_MAX_REQUESTS: int = int(os.getenv("API_MAX_REQUESTS", default="10000"))
+
+    # async read API, see run_async_api.py
+    ASYNC_API_HOST: str = os.getenv("ASYNC_API_HOST", default="0.0.0.0")
+    ASYNC_API_PORT: int = int(os.getenv("ASYNC_API_PORT", default="5001"))
+
+    # raise on lazy relationship loads that run SQL, see database/loading.py; set in tests
+    RAISE_ON_LAZY_LOAD: bool = bool(os.getenv("RAISE_ON_LAZY_LOAD"))
+    # request and SQL metrics served on /metrics, see monitoring/instrumentation.py
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", default="true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    # requests at least this slow are logged with their statement fingerprints
+    SLOW_REQUEST_SECONDS: float = float(os.getenv("SLOW_REQUEST_SECONDS", default="1"))
+
     @field_validator(
         "ENV",
         "MYSQL_HOST",
@@ -48,37 +133,55 @@ class Settings(BaseSettings):
             )
         return v
 
-    def configure_logging(self):
-        if self.LOGGING_CONFIG.exists():
-            print(f"Setting logging config with file: {self.LOGGING_CONFIG}")
-            logging.config.fileConfig(self.LOGGING_CONFIG)
-        else:
-            print(
-                "No logging config file found. Loading default logging configuration."
-            )
-            logging.basicConfig(
-                level=logging.DEBUG,
-                format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-                datefmt="%Y-%m-%d %H:%M:%S",
-            )
 
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    The process's settings, read from the environment and validated on first
+    use rather than when the package is imported, so tools and tests that never
+    touch the database don't need its environment variables.
 
-settings = Settings()
-settings.configure_logging()
+    Returns:
+        Settings: The same instance on every call.
+    """
+    return Settings()
 
-logger = logging.getLogger(__name__)
 
-print(f"Logging level: {logging.getLevelName(logger.getEffectiveLevel())}")
+_logging_configured = False
 
 
-# debugging
-logger.debug(f"ENV: {settings.ENV}")
-logger.debug(f"MYSQL_HOST: {settings.MYSQL_HOST}")
-logger.debug(f"MYSQL_PORT: {settings.MYSQL_PORT}")
-logger.debug(f"MYSQL_ADMIN_USER: {settings.MYSQL_ADMIN_USER}")
-logger.debug(f"MYSQL_ADMIN_PASSWORD: {settings.MYSQL_ADMIN_PASSWORD}")
-logger.debug(f"MYSQL_USER: {settings.MYSQL_USER}")
-logger.debug(f"MYSQL_PASSWORD: {settings.MYSQL_PASSWORD}")
-logger.debug(f"MYSQL_DATABASE: {settings.MYSQL_DATABASE}")
-logger.debug(f"MYSQL_LOGGING: {settings.MYSQL_LOGGING}")
-logger.debug(f"Database URI: {settings.SQLALCHEMY_DATABASE_URI}")
+def configure_logging(settings: Optional[Settings] = None) -> None:
+    """
+    Sets up logging from LOGGING_CONFIG, once per process, and logs the
+    settings with secrets masked. Entry points call this before anything else;
+    importing the package leaves logging alone.
+
+    Args:
+        settings (Optional[Settings]): Defaults to get_settings().
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    settings = settings or get_settings()
+    if settings.LOGGING_CONFIG.exists():
+        # loggers of modules imported before this call keep working
+        logging.config.fileConfig(
+            settings.LOGGING_CONFIG, disable_existing_loggers=False
+        )
+    else:
+        logging.basicConfig(
+            level=logging.DEBUG,
+            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    _logging_configured = True
+    logger.info(
+        f"Logging configured from {settings.LOGGING_CONFIG}, level "
+        f"{logging.getLevelName(logging.getLogger().getEffectiveLevel())}"
+    )
+    for name, value in settings.model_dump().items():
+        if name in SECRET_SETTINGS:
+            value = "***"
+        elif isinstance(value, str):
+            value = _URI_PASSWORD.sub(r"\1***@", value)
+        logger.debug(f"{name}: {value}")
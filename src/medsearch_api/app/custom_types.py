@@ -0,0 +1,8 @@
+import enum
+
+
+class OperationType(enum.Enum):
+    SELECT = "select"
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
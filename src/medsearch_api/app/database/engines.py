@@ -0,0 +1,102 @@
+import threading
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from medsearch_api.app.config import get_settings
+
+# asyncio drivers for the sync URIs in Settings
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+_engines: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], Engine] = {}
+_lock = threading.Lock()
+
+
+def engine_options(uri: str) -> Dict[str, Any]:
+    """
+    Pool settings from Settings for an engine on uri. SQLite, used in tests,
+    keeps its own pool classes, which take none of these.
+
+    Args:
+        uri (str): The database URI.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for create_engine.
+    """
+    if make_url(uri).get_backend_name() == "sqlite":
+        return {}
+    settings = get_settings()
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def get_engine(uri: str, **engine_kwargs) -> Engine:
+    """
+    Returns the process-wide engine for uri, creating it on first use, so
+    callers share one pool of connections instead of paying a new handshake
+    per engine.
+
+    Args:
+        uri (str): The database URI.
+        **engine_kwargs: Overrides of engine_options(uri), e.g. pool_size. Engines
+            with different overrides are kept apart.
+
+    Returns:
+        Engine: The shared engine.
+    """
+    key = (uri, tuple(sorted(engine_kwargs.items())))
+    engine = _engines.get(key)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _engines[key] = create_engine(
+                    uri, **(engine_options(uri) | engine_kwargs)
+                )
+    return engine
+
+
+def dispose_engines(close: bool = True) -> None:
+    """
+    Empties the pools of every registered engine.
+
+    Args:
+        close (bool): Whether to close the pooled connections. A process forked
+            after they were opened passes False: the sockets still belong to
+            the parent, so the child drops them without closing them.
+    """
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose(close=close)
+
+
+def create_async_app_engine(uri: str, **engine_kwargs) -> AsyncEngine:
+    """
+    Creates an asyncio engine for uri, swapping its driver for the asyncio one
+    of the same database. Async engines belong to the event loop that uses
+    them, so they are created by their owner rather than registered here.
+
+    Args:
+        uri (str): The sync database URI, e.g. Settings.SQLALCHEMY_DATABASE_URI.
+        **engine_kwargs: Overrides of engine_options(uri).
+
+    Returns:
+        AsyncEngine: The engine.
+
+    Raises:
+        ValueError: If there is no asyncio driver for the database.
+    """
+    url = make_url(uri)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No asyncio driver for {url.get_backend_name()} databases.")
+    return create_async_engine(
+        url.set(drivername=driver), **(engine_options(uri) | engine_kwargs)
+    )
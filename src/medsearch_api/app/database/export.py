@@ -0,0 +1,243 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+
+from medsearch_api.app.database.models import (
+    SPL,
+    Ingredient,
+    Med,
+    MedForm,
+    MedIngredientMap,
+    MedOrganizationMap,
+    Organization,
+)
+
+MedBatches = Iterator[List[Dict[str, Any]]]
+Formatter = Callable[[MedBatches], Iterator[str]]
+
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+MAX_EXPORT_BATCH_SIZE = 10_000
+
+# list fields of a med, joined into one CSV cell
+CSV_LIST_SEPARATOR = "|"
+CSV_COLUMNS = (
+    "id",
+    "spl_id",
+    "name",
+    "generic_name",
+    "code",
+    "code_system",
+    "effective_date",
+    "version_number",
+    "form_id",
+    "form_code",
+    "form_name",
+    "spl_set_id",
+    "spl_title",
+    "spl_published_date",
+    "organization_ids",
+    "organization_names",
+    "ingredient_ids",
+    "ingredient_codes",
+    "ingredient_names",
+)
+
+
+class ExportFormatException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+def _meds_statement():
+    # meds are streamed in id order with their many-to-one rows joined in
+    return (
+        select(
+            Med.id,
+            Med.spl_id,
+            Med.name,
+            Med.generic_name,
+            Med.code,
+            Med.code_system,
+            Med.effective_date,
+            Med.version_number,
+            MedForm.id.label("form_id"),
+            MedForm.code.label("form_code"),
+            MedForm.name.label("form_name"),
+            SPL.set_id,
+            SPL.title,
+            SPL.published_date,
+        )
+        .join(SPL, SPL.id == Med.spl_id)
+        .outerjoin(MedForm, MedForm.id == Med.med_form_id)
+        .where(Med.deleted_at.is_(None))
+        .order_by(Med.id)
+    )
+
+
+def _organizations_by_med(conn: Connection, med_ids: List[int]) -> Dict[int, List]:
+    rows = conn.execute(
+        select(MedOrganizationMap.med_id, Organization.id, Organization.name)
+        .join(Organization, Organization.id == MedOrganizationMap.org_id)
+        .where(MedOrganizationMap.med_id.in_(med_ids))
+        .order_by(MedOrganizationMap.med_id, MedOrganizationMap.org_id)
+    )
+    by_med = defaultdict(list)
+    for row in rows:
+        by_med[row.med_id].append({"id": row.id, "name": row.name})
+    return by_med
+
+
+def _ingredients_by_med(conn: Connection, med_ids: List[int]) -> Dict[int, List]:
+    rows = conn.execute(
+        select(MedIngredientMap.med_id, Ingredient.id, Ingredient.name, Ingredient.code)
+        .join(Ingredient, Ingredient.id == MedIngredientMap.ingredient_id)
+        .where(
+            MedIngredientMap.med_id.in_(med_ids), MedIngredientMap.deleted_at.is_(None)
+        )
+        .order_by(MedIngredientMap.med_id, MedIngredientMap.ingredient_id)
+    )
+    by_med = defaultdict(list)
+    for row in rows:
+        by_med[row.med_id].append({"id": row.id, "name": row.name, "code": row.code})
+    return by_med
+
+
+def iter_med_batches(
+    engine: Engine, batch_size: int = DEFAULT_EXPORT_BATCH_SIZE
+) -> MedBatches:
+    """
+    Streams every live med, in id order, as dicts shaped like the /meds/<id>
+    response, batch_size at a time.
+
+    Meds come from a server-side cursor, so the database sends rows as they
+    are read rather than the whole result up front. A second connection looks
+    up each batch's organizations and ingredients with one IN query each,
+    since MySQL can't run other queries on a connection while it streams.
+    Memory use depends on batch_size, not on the size of the catalog.
+
+    Args:
+        engine (Engine): The engine to read from, e.g. the replica's.
+        batch_size (int): Meds per batch, and rows fetched per round trip.
+
+    Returns:
+        MedBatches: Lists of at most batch_size meds.
+    """
+    with engine.connect() as stream_conn, engine.connect() as lookup_conn:
+        result = stream_conn.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(_meds_statement())
+        for rows in result.partitions():
+            med_ids = [row.id for row in rows]
+            organizations = _organizations_by_med(lookup_conn, med_ids)
+            ingredients = _ingredients_by_med(lookup_conn, med_ids)
+            yield [
+                {
+                    "id": row.id,
+                    "spl_id": row.spl_id,
+                    "name": row.name,
+                    "generic_name": row.generic_name,
+                    "code": row.code,
+                    "code_system": row.code_system,
+                    "effective_date": row.effective_date
+                    and row.effective_date.isoformat(),
+                    "version_number": row.version_number,
+                    "form": row.form_id
+                    and {
+                        "id": row.form_id,
+                        "code": row.form_code,
+                        "name": row.form_name,
+                    },
+                    "organizations": organizations.get(row.id, []),
+                    "ingredients": ingredients.get(row.id, []),
+                    "spl": {
+                        "id": row.spl_id,
+                        "set_id": row.set_id,
+                        "title": row.title,
+                        "published_date": row.published_date.isoformat(),
+                    },
+                }
+                for row in rows
+            ]
+            # the lookups run in their own transaction; end it so a long
+            # export doesn't pin one MySQL snapshot for every batch
+            lookup_conn.rollback()
+
+
+def to_ndjson(batches: MedBatches) -> Iterator[str]:
+    """
+    One JSON object per line; yields one chunk per batch.
+    """
+    for batch in batches:
+        yield "".join(json.dumps(med) + "\n" for med in batch)
+
+
+def _csv_row(med: Dict[str, Any]) -> Sequence[Any]:
+    form = med["form"] or {}
+    spl = med["spl"]
+
+    def joined(items: List[Dict[str, Any]], key: str) -> str:
+        return CSV_LIST_SEPARATOR.join(str(item[key] or "") for item in items)
+
+    return (
+        med["id"],
+        med["spl_id"],
+        med["name"],
+        med["generic_name"],
+        med["code"],
+        med["code_system"],
+        med["effective_date"],
+        med["version_number"],
+        form.get("id"),
+        form.get("code"),
+        form.get("name"),
+        spl["set_id"],
+        spl["title"],
+        spl["published_date"],
+        joined(med["organizations"], "id"),
+        joined(med["organizations"], "name"),
+        joined(med["ingredients"], "id"),
+        joined(med["ingredients"], "code"),
+        joined(med["ingredients"], "name"),
+    )
+
+
+def to_csv(batches: MedBatches) -> Iterator[str]:
+    """
+    A header row, then one row per med with its organizations and ingredients
+    joined by CSV_LIST_SEPARATOR; yields one chunk per batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_csv_row(med) for med in batch)
+        yield buffer.getvalue()
+
+
+EXPORT_FORMATS: Dict[str, Formatter] = {"ndjson": to_ndjson, "csv": to_csv}
+
+
+def export_meds(
+    engine: Engine, export_format: str, batch_size: int = DEFAULT_EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    """
+    The full catalog of live meds as NDJSON or CSV text chunks, one per batch.
+
+    Raises:
+        ExportFormatException: If export_format isn't in EXPORT_FORMATS.
+    """
+    formatter = EXPORT_FORMATS.get(export_format)
+    if formatter is None:
+        raise ExportFormatException(
+            f"Unknown export format {export_format}; use one of "
+            f"{', '.join(EXPORT_FORMATS)}."
+        )
+    return formatter(iter_med_batches(engine, batch_size))
@@ -0,0 +1,61 @@
+from typing import Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, joinedload, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from medsearch_api.app.database.models import Med, MedIngredientMap, MedOrganizationMap
+from medsearch_api.app.db import db
+
+# Loader plans: the relationships an endpoint serializes, loaded up front so the
+# query count doesn't grow with the number of meds. Many-to-one relationships
+# are joined into the med query; each collection costs one extra
+# SELECT ... WHERE med_id IN (...), however many meds are loaded.
+LoaderPlan = Tuple[LoaderOption, ...]
+
+_live_ingredient_maps = Med.ingredient_maps.and_(MedIngredientMap.deleted_at.is_(None))
+
+MED_DETAIL: LoaderPlan = (
+    joinedload(Med.form),
+    joinedload(Med.spl),
+    selectinload(Med.organization_maps).joinedload(MedOrganizationMap.organization),
+    selectinload(_live_ingredient_maps).joinedload(MedIngredientMap.ingredient),
+)
+
+# lists skip the label and load forms by id, since a page shares a handful of
+# them and joining would repeat each form on every row
+MED_LIST: LoaderPlan = (
+    selectinload(Med.form),
+    selectinload(Med.organization_maps).joinedload(MedOrganizationMap.organization),
+    selectinload(_live_ingredient_maps).joinedload(MedIngredientMap.ingredient),
+)
+
+
+class LazyLoadException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+def _raise_on_lazy_load(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+    if not (has_app_context() and current_app.config.get("RAISE_ON_LAZY_LOAD")):
+        return
+    path = orm_execute_state.loader_strategy_path
+    raise LazyLoadException(
+        f"Lazy load of {path[-1] if path else 'a relationship'} from "
+        f"{orm_execute_state.lazy_loaded_from.class_.__name__}; add it to the "
+        "query's loader plan."
+    )
+
+
+def register_lazy_load_guard() -> None:
+    """
+    Makes lazy loads that run SQL raise LazyLoadException in apps with
+    RAISE_ON_LAZY_LOAD set, so a relationship missing from a loader plan fails
+    tests instead of issuing a query per row in production. Many-to-one loads
+    answered from the session's identity map run no SQL and are allowed.
+    """
+    if not event.contains(db.session, "do_orm_execute", _raise_on_lazy_load):
+        event.listen(db.session, "do_orm_execute", _raise_on_lazy_load)
@@ -4,6 +4,7 @@ from sqlalchemy import (
     Column,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     DateTime,
@@ -11,12 +12,12 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
 )
-from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.sql import func
 
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from medsearch_api.app.custom_types import OperationType
+from medsearch_api.app.database.types import CompressedText
 
 
 class MedSearchBaseModel(db.Model):  # type: ignore
@@ -30,10 +31,19 @@ class SPL(MedSearchBaseModel):
     set_id = Column(String(255), nullable=False, unique=True)
     title = Column(Text, nullable=False)
     published_date = Column(Date, nullable=False)
+    # hash of the raw SPL document last ingested, see ingestion/delta.py
+    content_hash = Column(String(32))
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        Index("ft_spls_title", "title", mysql_prefix="FULLTEXT"),
+        # keyset pagination, see database/pagination.py
+        Index("ix_spls_published_date_id", "published_date", "id"),
+        Index("ix_spls_updated_at_id", "updated_at", "id"),
+    )
+
     def __repr__(self):
         return f"<SPL(set_id='{self.set_id}', title='{self.title}', published_date='{self.published_date}')>"
 
@@ -68,12 +78,16 @@ class Med(MedSearchBaseModel):
     id = Column(Integer, primary_key=True, autoincrement=True)
     spl_id = Column(Integer, ForeignKey("spls.id"), nullable=False, unique=True)
     med_form_id = Column(Integer, ForeignKey("med_forms.id"))
-    code = Column(String(255))
-    code_system = Column(String(255))
-    name = Column(String(255))
-    generic_name = Column(String(255))
-    effective_date = Column(Date)
-    version_number = Column(Integer)
+    code = Column(String(255), nullable=False)
+    code_system = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False)
+    generic_name = Column(String(255), nullable=False)
+    effective_date = Column(Date, nullable=False)
+    version_number = Column(Integer, nullable=False)
+    # hash of the active ingredient set, see ingestion/hashing.py
+    ingredient_fingerprint = Column(String(32))
+    # 9 digit product NDC, see ingestion/ndc.py; None for other code systems
+    normalized_code = Column(String(9))
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime, nullable=True)
@@ -81,6 +95,25 @@ class Med(MedSearchBaseModel):
     def __repr__(self):
         return f"<Med(id='{self.id}', spl_id='{self.spl_id}', med_form_id='{self.med_form_id}', code='{self.code}', code_system='{self.code_system}', name='{self.name}', generic_name='{self.generic_name}', effective_date='{self.effective_date}', version_number='{self.version_number}')>"
 
+    __table_args__ = (
+        Index(
+            "ft_meds_name_generic_name", "name", "generic_name", mysql_prefix="FULLTEXT"
+        ),
+        # incremental autocomplete refreshes, see search/autocomplete.py; InnoDB
+        # appends the primary key, so this also serves keyset pagination
+        Index("ix_meds_updated_at", "updated_at"),
+        # keyset pagination, see database/pagination.py
+        Index("ix_meds_name_id", "name", "id"),
+        # generic equivalents, see search/equivalents.py
+        Index(
+            "ix_meds_ingredient_fingerprint", "ingredient_fingerprint", "med_form_id"
+        ),
+        # live meds of a form
+        Index("ix_meds_med_form_id_deleted_at", "med_form_id", "deleted_at"),
+        # batch code lookups, see search/codes.py
+        Index("ix_meds_normalized_code_deleted_at", "normalized_code", "deleted_at"),
+    )
+
     # relationships
     form = relationship("MedForm", back_populates="meds")  # type: ignore
     spl = relationship("SPL", back_populates="meds", foreign_keys=[spl_id])  # type: ignore
@@ -102,7 +135,11 @@ class Organization(MedSearchBaseModel):
     def __repr__(self):
         return f"<Organization(id='{self.id}', name='{self.name}', nih_id_extension='{self.nih_id_extension}', nih_id_root='{self.nih_id_root}')>"
 
-    __table_args__ = (UniqueConstraint("nih_id_extension", "nih_id_root"),)
+    __table_args__ = (
+        UniqueConstraint("nih_id_extension", "nih_id_root"),
+        # keyset pagination, see database/pagination.py
+        Index("ix_organizations_updated_at_id", "updated_at", "id"),
+    )
     # relationships
     med_organization_maps = relationship(  # type: ignore
         "MedOrganizationMap", back_populates="organization"
@@ -118,6 +155,9 @@ class MedOrganizationMap(MedSearchBaseModel):
     def __repr__(self):
         return f"<MedOrganizationMap(med_id='{self.med_id}', org_id='{self.org_id}')>"
 
+    # meds of an organization; the primary key serves organizations of a med
+    __table_args__ = (Index("ix_med_organization_map_org_id", "org_id"),)
+
     # relationships
     med = relationship("Med", back_populates="organization_maps", foreign_keys=[med_id])  # type: ignore
     organization = relationship(  # type: ignore
@@ -139,7 +179,11 @@ class Ingredient(MedSearchBaseModel):
     def __repr__(self):
         return f"<Ingredient(id='{self.id}', name='{self.name}', code='{self.code}', code_system='{self.code_system}')>"
 
-    __table_args__ = (UniqueConstraint("code", "code_system"),)
+    __table_args__ = (
+        UniqueConstraint("code", "code_system"),
+        Index("ft_ingredients_name", "name", mysql_prefix="FULLTEXT"),
+        Index("ix_ingredients_updated_at", "updated_at"),
+    )
     # relationships
     med_ingredient_maps = relationship("MedIngredientMap", back_populates="ingredient")  # type: ignore
 
@@ -149,10 +193,22 @@ class MedIngredientMap(MedSearchBaseModel):
 
     med_id = Column(Integer, ForeignKey("meds.id"), primary_key=True)
     ingredient_id = Column(Integer, ForeignKey("ingredients.id"), primary_key=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    deleted_at = Column(DateTime, nullable=True)
 
     def __repr__(self):
         return f"<MedIngredientMap(med_id='{self.med_id}', ingredient_id='{self.ingredient_id}')>"
 
+    # live meds with an ingredient; the primary key serves ingredients of a med
+    __table_args__ = (
+        Index(
+            "ix_med_ingredient_map_ingredient_id_deleted_at",
+            "ingredient_id",
+            "deleted_at",
+        ),
+    )
+
     # relationships
     med = relationship("Med", back_populates="ingredient_maps", foreign_keys=[med_id])  # type: ignore
     ingredient = relationship(  # type: ignore
@@ -165,14 +221,30 @@ class SPLParsingIssue(MedSearchBaseModel):
     id = Column(Integer, primary_key=True, autoincrement=True)
     spl_id = Column(Integer, ForeignKey("spls.id"))
     error = Column(Text)
-    xml_content: Column = Column(LONGTEXT)
-    xml_structure: Column = Column(LONGTEXT)
+    # an issue is recorded once per document and error, see ingestion/issues.py
+    error_fingerprint = Column(String(32), nullable=False)
+    content_hash = Column(String(32), nullable=False)
+    occurrences = Column(Integer, nullable=False, default=1)
+    last_seen_at = Column(DateTime, default=func.now())
+    # compressed, and only loaded when read, so listing issues reads metadata
+    # only; reading either column loads both
+    xml_content = deferred(Column(CompressedText), group="xml")
+    xml_structure = deferred(Column(CompressedText), group="xml")
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        UniqueConstraint(
+            "spl_id",
+            "error_fingerprint",
+            "content_hash",
+            name="uq_spl_parsing_issues_spl_id_error_content",
+        ),
+    )
+
     def __repr__(self):
-        return f"<SPLParsingIssue(id='{self.id}', spl_id='{self.spl_id}', error='{self.error}', xml_content='{self.xml_content}', xml_structure='{self.xml_structure}')>"
+        return f"<SPLParsingIssue(id='{self.id}', spl_id='{self.spl_id}', error='{self.error}', occurrences='{self.occurrences}')>"
 
     # relationships
     spl = relationship("SPL", back_populates="spl_parsing_issues")  # type: ignore
@@ -189,5 +261,7 @@ class SPLDataIssue(MedSearchBaseModel):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (Index("ix_spl_data_issues_spl_id", "spl_id"),)
+
     # relationships
     spl = relationship("SPL", back_populates="spl_data_issues")  # type: ignore
@@ -0,0 +1,157 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Column, Select, and_, literal, or_, tuple_
+from sqlalchemy.orm import Session, scoped_session
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class PaginationException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+@dataclass(frozen=True, slots=True)
+class Page:
+    rows: Sequence[Any]
+    next_cursor: Optional[str]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column: Column, value: Any) -> Any:
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        return python_type(value)
+    except (TypeError, ValueError):
+        raise PaginationException("Malformed cursor.")
+
+
+def encode_cursor(sort: str, value: Any, id_: int) -> str:
+    """
+    Encodes the position after a row as an opaque, URL safe cursor.
+    """
+    payload = json.dumps([sort, _encode_value(value), id_], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, column: Column) -> Tuple[Any, int]:
+    """
+    Decodes a cursor from encode_cursor.
+
+    Args:
+        cursor (str): The cursor from the previous page.
+        sort (str): The sort the current request asks for.
+        column (Column): The sort column, to restore the value's type.
+
+    Returns:
+        Tuple[Any, int]: The sort value and id of the last row of the previous page.
+
+    Raises:
+        PaginationException: If the cursor is malformed or was issued for a
+            different sort.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, id_ = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise PaginationException("Malformed cursor.")
+    if cursor_sort != sort:
+        raise PaginationException(
+            f"Cursor was issued for sort '{cursor_sort}', not '{sort}'."
+        )
+    if not isinstance(id_, int):
+        raise PaginationException("Malformed cursor.")
+    return _decode_value(column, value), id_
+
+
+def _after(column: Column, id_column: Column, value: Any, id_: int):
+    # rows strictly after (value, id_) in (column, id) order; NULLs sort first
+    # in ascending order on both MySQL and SQLite
+    if value is None:
+        return or_(
+            and_(column.is_(None), id_column > id_),
+            column.is_not(None),
+        )
+    # a row value comparison, which MySQL turns into one index range scan
+    return tuple_(column, id_column) > tuple_(
+        literal(value, column.type), literal(id_, id_column.type)
+    )
+
+
+def keyset_page(
+    session: Union[Session, scoped_session],
+    stmt: Select,
+    sort_columns: Mapping[str, Column],
+    sort: str,
+    id_column: Column,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
+    """
+    Fetches one page of stmt ordered by (sort column, id), continuing after the
+    cursor instead of using OFFSET, so every page costs the same index range
+    scan however deep into the table it is. Each sort needs a (sort column, id)
+    index to avoid a filesort.
+
+    Args:
+        session (Union[Session, scoped_session]): The SQLAlchemy session.
+        stmt (Select): Statement selecting the rows; it must select the sort
+            column and id_column under their column names.
+        sort_columns (Mapping[str, Column]): Allowed sort names and their columns.
+        sort (str): The requested sort name.
+        id_column (Column): The unique tiebreaker column.
+        cursor (Optional[str]): next_cursor of the previous page, None for the first.
+        limit (int): Page size.
+
+    Returns:
+        Page: The rows and the cursor of the next page, None on the last page.
+
+    Raises:
+        PaginationException: If sort is unknown or the cursor is invalid.
+    """
+    column = sort_columns.get(sort)
+    if column is None:
+        raise PaginationException(
+            f"Unknown sort '{sort}', expected one of: {', '.join(sort_columns)}."
+        )
+
+    if cursor:
+        value, id_ = decode_cursor(cursor, sort, column)
+        stmt = stmt.where(_after(column, id_column, value, id_))
+    # one extra row tells whether there is a next page
+    stmt = stmt.order_by(column, id_column).limit(limit + 1)
+    rows = session.execute(stmt).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(sort, last[column.name], last[id_column.name])
+    return Page(rows=rows, next_cursor=next_cursor)
+
+
+def page_to_dict(page: Page, fields: Sequence[str]) -> Dict[str, Any]:
+    return {
+        "items": [
+            {field: _encode_value(row._mapping[field]) for field in fields}
+            for row in page.rows
+        ],
+        "next_cursor": page.next_cursor,
+    }
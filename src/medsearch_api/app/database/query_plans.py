@@ -0,0 +1,70 @@
+import re
+from typing import Any, Dict, List, Union
+
+from sqlalchemy import Select
+from sqlalchemy.engine import Connection
+
+from medsearch_api.app.database.models import MedSearchBaseModel
+from medsearch_api.app.database.upsert import UnsupportedDialectException
+
+# "SCAN meds" or "SCAN meds AS m"; index scans read "SCAN meds USING INDEX ..."
+_SQLITE_TABLE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def explain(
+    conn: Connection, stmt: Union[Select, str], parameters: Any = ()
+) -> List[Dict]:
+    """
+    Runs EXPLAIN (EXPLAIN QUERY PLAN on SQLite) for a statement.
+
+    Args:
+        conn (Connection): The connection to plan on.
+        stmt (Union[Select, str]): The statement, or SQL as the driver takes it,
+            e.g. as captured from a cursor.
+        parameters (Any): The driver parameters of SQL, in its paramstyle.
+
+    Returns:
+        List[Dict]: One dict per plan row, keyed by the EXPLAIN output's columns.
+    """
+    if isinstance(stmt, str):
+        sql = stmt
+    else:
+        sql = str(
+            stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+        )
+    if conn.dialect.name == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif conn.dialect.name == "mysql":
+        prefix = "EXPLAIN "
+    else:
+        raise UnsupportedDialectException(
+            f"Query plans are not supported for dialect {conn.dialect.name}."
+        )
+    result = conn.exec_driver_sql(prefix + sql, parameters)
+    return [dict(row._mapping) for row in result]
+
+
+def full_table_scans(
+    conn: Connection, stmt: Union[Select, str], parameters: Any = ()
+) -> List[str]:
+    """
+    Names the tables a statement reads in full rather than through an index.
+
+    Args:
+        conn (Connection): A connection to a database with the app's schema.
+        stmt (Union[Select, str]): The statement to plan, see explain.
+        parameters (Any): The driver parameters of SQL.
+
+    Returns:
+        List[str]: The scanned tables, empty if every table is read by index.
+    """
+    tables = MedSearchBaseModel.metadata.tables
+    scans = []
+    for row in explain(conn, stmt, parameters):
+        if conn.dialect.name == "sqlite":
+            match = _SQLITE_TABLE_SCAN.match(row["detail"])
+            if match and match.group(1) in tables:
+                scans.append(match.group(1))
+        elif row["type"] == "ALL":
+            scans.append(row["table"])
+    return scans
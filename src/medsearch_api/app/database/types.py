@@ -0,0 +1,43 @@
+import zlib
+from typing import Optional
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.types import TypeDecorator
+
+# zlib's default level; XML labels shrink about tenfold and higher levels barely help
+COMPRESSION_LEVEL = 6
+
+
+def compress_text(value: Optional[str]) -> Optional[bytes]:
+    if value is None:
+        return None
+    return zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress_text(value: Optional[bytes]) -> Optional[str]:
+    if value is None:
+        return None
+    return zlib.decompress(value).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text stored zlib-compressed in a LONGBLOB on MySQL (a BLOB elsewhere).
+    Values are compressed when written and decompressed when read, so the
+    mapped attribute is a plain str.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
@@ -0,0 +1,272 @@
+import logging
+from collections import OrderedDict
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Table, select, tuple_
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Connection
+
+from medsearch_api.app.database.models import Ingredient, MedForm, Organization
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 100_000
+# rows per multi-row INSERT / keys per SELECT ... IN
+DEFAULT_CHUNK_SIZE = 1_000
+
+Key = Tuple[Any, ...]
+
+
+class UnsupportedDialectException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class LRUIdCache:
+    """
+    Bounded mapping of natural key -> database id that evicts the least
+    recently used key once max_size is reached. Not thread safe; each process
+    (or thread) should own its own cache.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive.")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._ids: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._ids
+
+    def get(self, key: Hashable) -> Optional[int]:
+        id_ = self._ids.get(key)
+        if id_ is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._ids.move_to_end(key)
+        return id_
+
+    def put(self, key: Hashable, id_: int) -> None:
+        self._ids[key] = id_
+        self._ids.move_to_end(key)
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        self._ids.clear()
+
+
+def chunks(items: Sequence, size: int) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _upsert_statement(
+    dialect_name: str,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    key_columns: Sequence[str],
+    update_columns: Sequence[str],
+):
+    if dialect_name == "mysql":
+        mysql_stmt = mysql.insert(table).values(list(rows))
+        return mysql_stmt.on_duplicate_key_update(
+            {name: mysql_stmt.inserted[name] for name in update_columns}
+        )
+    if dialect_name == "sqlite":
+        sqlite_stmt = sqlite.insert(table).values(list(rows))
+        return sqlite_stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={name: sqlite_stmt.excluded[name] for name in update_columns},
+        )
+    raise UnsupportedDialectException(
+        f"Bulk upsert is not supported for dialect {dialect_name}."
+    )
+
+
+def bulk_upsert(
+    conn: Connection,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    key_columns: Sequence[str],
+    update_columns: Sequence[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> None:
+    """
+    Inserts rows with multi-row INSERT ... ON DUPLICATE KEY UPDATE statements,
+    updating update_columns of rows whose unique key already exists.
+
+    Rows are written in key order so concurrent writers take row locks in the
+    same order and don't deadlock each other.
+
+    Args:
+        conn (Connection): The SQLAlchemy connection; the caller owns the transaction.
+        table (Table): The table to write to.
+        rows (Sequence[Dict[str, Any]]): Column values for each row.
+        key_columns (Sequence[str]): Columns of the unique key that identifies a row.
+        update_columns (Sequence[str]): Columns overwritten when the key already exists.
+        chunk_size (int): Maximum rows per statement.
+    """
+    if not rows:
+        return
+    if "updated_at" in table.c and "updated_at" not in update_columns:
+        update_columns = tuple(update_columns) + ("updated_at",)
+    ordered = sorted(rows, key=itemgetter(*key_columns))
+    for chunk in chunks(ordered, chunk_size):
+        conn.execute(
+            _upsert_statement(
+                conn.dialect.name, table, chunk, key_columns, update_columns
+            )
+        )
+
+
+def select_ids(
+    conn: Connection,
+    table: Table,
+    key_columns: Sequence[str],
+    keys: Sequence[Key],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[Key, int]:
+    """
+    Looks up the ids of rows by their unique key with chunked SELECT ... IN queries.
+
+    Returns:
+        Dict[Key, int]: The id of every key that exists in the table.
+    """
+    key_cols = [table.c[name] for name in key_columns]
+    ids: Dict[Key, int] = {}
+    for key_chunk in chunks(keys, chunk_size):
+        if len(key_cols) == 1:
+            condition = key_cols[0].in_([key[0] for key in key_chunk])
+        else:
+            condition = tuple_(*key_cols).in_(key_chunk)
+        for row in conn.execute(select(table.c.id, *key_cols).where(condition)):
+            ids[tuple(row[1:])] = row[0]
+    return ids
+
+
+class DimensionUpserter:
+    """
+    Resolves natural keys of a dimension table (e.g. med_forms on
+    (code, code_system)) to ids in bulk, inserting rows that don't exist yet.
+
+    Each batch costs at most one multi-row INSERT ... ON DUPLICATE KEY UPDATE and
+    one SELECT ... WHERE (key) IN (...) per chunk of cache misses; keys already in
+    the LRU cache never reach the database.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        key_columns: Sequence[str],
+        update_columns: Sequence[str],
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.update_columns = tuple(update_columns)
+        self.cache = LRUIdCache(cache_size)
+        self.chunk_size = chunk_size
+        self._get_key = attrgetter(*self.key_columns)
+        self._get_values = attrgetter(*(self.key_columns + self.update_columns))
+        self._columns = self.key_columns + self.update_columns
+
+    def key_of(self, record: Any) -> Key:
+        key = self._get_key(record)
+        return key if isinstance(key, tuple) else (key,)
+
+    def upsert(self, conn: Connection, records: Iterable[Any]) -> Dict[Key, int]:
+        """
+        Ensures every record exists in the table and returns the id of each one.
+
+        Args:
+            conn (Connection): The SQLAlchemy connection; the caller owns the transaction.
+            records (Iterable[Any]): Objects exposing the key and update columns as attributes.
+
+        Returns:
+            Dict[Key, int]: The id of every distinct key in records.
+        """
+        ids: Dict[Key, int] = {}
+        missing: Dict[Key, Any] = {}
+        for record in records:
+            key = self.key_of(record)
+            if key in ids or key in missing:
+                continue
+            id_ = self.cache.get(key)
+            if id_ is None:
+                missing[key] = record
+            else:
+                ids[key] = id_
+
+        if not missing:
+            return ids
+
+        rows = [
+            dict(zip(self._columns, self._get_values(record)))
+            for record in missing.values()
+        ]
+        bulk_upsert(
+            conn,
+            self.table,
+            rows,
+            self.key_columns,
+            self.update_columns,
+            self.chunk_size,
+        )
+        found = select_ids(
+            conn, self.table, self.key_columns, list(missing), self.chunk_size
+        )
+        for key, id_ in found.items():
+            ids[key] = id_
+            self.cache.put(key, id_)
+
+        logger.debug(
+            f"Upserted {len(missing)} rows into {self.table.name} "
+            f"({self.cache.hits} cache hits, {self.cache.misses} misses so far)"
+        )
+        return ids
+
+
+class DimensionUpsertEngine:
+    """
+    Upserters for the med_forms, ingredients and organizations dimension
+    tables, keyed on their unique constraints.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.med_forms = DimensionUpserter(
+            MedForm.__table__,
+            key_columns=("code", "code_system"),
+            update_columns=("name",),
+            cache_size=cache_size,
+            chunk_size=chunk_size,
+        )
+        self.ingredients = DimensionUpserter(
+            Ingredient.__table__,
+            key_columns=("code", "code_system"),
+            update_columns=("name",),
+            cache_size=cache_size,
+            chunk_size=chunk_size,
+        )
+        self.organizations = DimensionUpserter(
+            Organization.__table__,
+            key_columns=("nih_id_extension", "nih_id_root"),
+            update_columns=("name",),
+            cache_size=cache_size,
+            chunk_size=chunk_size,
+        )
+
+    def upserters(self) -> List[DimensionUpserter]:
+        return [self.med_forms, self.ingredients, self.organizations]
@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine, exc as sqlalchemy_exc, text
+from sqlalchemy import exc as sqlalchemy_exc, text
 from sqlalchemy.engine import Connection, Engine
 import logging
-from medsearch_api.app.config import settings
+from typing import Optional
+from medsearch_api.app.config import get_settings
+from medsearch_api.app.database.engines import get_engine
 
 logger = logging.getLogger(__name__)
 
@@ -11,19 +13,27 @@ class DatabaseConfigurationException(Exception):
         super().__init__(message)
 
 
-def get_mysql_uri():
-    return f"mysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}"
+def get_mysql_uri(database: Optional[str] = None):
+    settings = get_settings()
+    uri = f"mysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}"
+    return f"{uri}/{database}" if database else uri
 
 
-def create_app_user_engine() -> Engine:
+def create_app_user_engine(database: Optional[str] = None, **engine_kwargs) -> Engine:
     """
-    Creates a SQLAlchemy engine for the app user.
+    Returns the app user's shared SQLAlchemy engine, from the process-wide
+    registry in database/engines.py.
+
+    Args:
+        database (Optional[str]): Database to connect to. Defaults to none, which is
+            enough for server-level checks like verify_database().
+        **engine_kwargs: Overrides of the Settings pool options, e.g. pool_size.
 
     Returns:
         Engine: The SQLAlchemy engine for the app user.
     """
-    uri = get_mysql_uri()
-    return create_engine(uri)
+    uri = get_mysql_uri(database)
+    return get_engine(uri, **engine_kwargs)
 
 
 def app_database_exists(conn: Connection) -> bool:
@@ -38,7 +48,7 @@ def app_database_exists(conn: Connection) -> bool:
     """
     result = conn.execute(
         text(
-            f"SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = '{settings.MYSQL_DATABASE}'"
+            f"SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = '{get_settings().MYSQL_DATABASE}'"
         )
     )
     exists = result.fetchone() is not None
@@ -1,3 +1,45 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
 
-db = SQLAlchemy()
+# bind key of the read replica in SQLALCHEMY_BINDS, see create_app
+REPLICA_BIND_KEY = "replica"
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of sessions marked with use_replica() to the
+    replica bind, when the app has one. Flushes and INSERT/UPDATE/DELETE
+    statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and self.info.get("use_replica")
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        ):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def use_replica() -> None:
+    """
+    Routes the reads of the current app context's session to the replica.
+    Read-only blueprints register this as a before_request hook.
+    """
+    db.session.info["use_replica"] = True
+
+
+def read_engine() -> Engine:
+    """
+    The replica engine if the app has one, otherwise the primary.
+    """
+    return db.engines.get(REPLICA_BIND_KEY, db.engine)
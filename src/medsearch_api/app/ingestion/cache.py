@@ -0,0 +1,346 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import IO, Iterator, List, Optional
+
+from medsearch_api.app.ingestion.delta import fingerprint_spl
+from medsearch_api.app.ingestion.pool import iter_spl_sources, open_spl_source
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 20 * 1024**3
+# eviction frees down to this fraction of max_bytes, so it doesn't run on every add
+EVICT_TO_FRACTION = 0.9
+# reads within this many seconds of the last don't rewrite the access time
+TOUCH_INTERVAL_SECONDS = 60.0
+# documents listed by latest() per write of their access times
+TOUCH_BATCH_SIZE = 1000
+# how long a process waits for another's write lock on the index
+LOCK_TIMEOUT_SECONDS = 30.0
+# labels whose versionNumber can't be read
+UNKNOWN_VERSION = 0
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS objects (
+        content_hash TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        last_access REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_objects_last_access ON objects (last_access)",
+    """
+    CREATE TABLE IF NOT EXISTS labels (
+        set_id TEXT NOT NULL,
+        version_number INTEGER NOT NULL,
+        content_hash TEXT NOT NULL REFERENCES objects (content_hash),
+        PRIMARY KEY (set_id, version_number)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_labels_content_hash ON labels (content_hash)",
+    # the sum of objects.size, kept up to date so adds don't have to scan objects
+    """
+    CREATE TABLE IF NOT EXISTS totals (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        bytes INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO totals (id, bytes) VALUES (0, 0)",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CachedSPL:
+    set_id: Optional[str]
+    version_number: Optional[int]
+    # hash of the document, see ingestion/hashing.py; the same as
+    # spls.content_hash and spl_parsing_issues.content_hash
+    content_hash: str
+    path: str
+    size: int
+
+
+class _CopyingReader:
+    """
+    Wraps a binary file and writes every byte read through it to out, so a
+    document can be fingerprinted in the same pass that copies it.
+    """
+
+    def __init__(self, raw: IO[bytes], out: IO[bytes]):
+        self.raw = raw
+        self.out = out
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.out.write(data)
+        self.size += len(data)
+        return data
+
+
+class SPLCache:
+    """
+    Downloaded SPL documents on local disk, stored once per content hash and
+    indexed by (set_id, version_number), so re-parsing after a parser fix,
+    re-running a failed batch or reproducing a parsing issue reads local files
+    instead of downloading them again.
+
+    Documents live in objects/<hash[:2]>/<hash>.xml under root and are never
+    modified in place. The index is a SQLite database in WAL mode, so any
+    number of threads and processes can read and add at once; adds and
+    evictions take its write lock while they move files, which keeps the index
+    and the files in step. Once the documents outgrow max_bytes the least
+    recently used are evicted.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(
+                os.path.join(self.root, "index.db"),
+                timeout=LOCK_TIMEOUT_SECONDS,
+                isolation_level=None,
+            )
+        return conn
+
+    def object_path(self, content_hash: str) -> str:
+        return os.path.join(
+            self.root, "objects", content_hash[:2], f"{content_hash}.xml"
+        )
+
+    def add(self, f: IO[bytes], set_id: Optional[str] = None) -> CachedSPL:
+        """
+        Stores an SPL XML document, read to the end, under its content hash
+        and indexes it by the setId and versionNumber in its header.
+
+        Args:
+            f (IO[bytes]): The document.
+            set_id (Optional[str]): Indexed under when the header has no setId.
+
+        Returns:
+            CachedSPL: The stored document.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                reader = _CopyingReader(f, out)
+                fingerprint = fingerprint_spl(reader)  # type: ignore[arg-type]
+            cached = CachedSPL(
+                set_id=fingerprint.set_id or set_id,
+                version_number=fingerprint.version_number,
+                content_hash=fingerprint.content_hash,
+                path=self.object_path(fingerprint.content_hash),
+                size=reader.size,
+            )
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                os.makedirs(os.path.dirname(cached.path), exist_ok=True)
+                os.replace(tmp_path, cached.path)
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO objects (content_hash, size, last_access) "
+                    "VALUES (?, ?, ?)",
+                    (cached.content_hash, cached.size, time.time()),
+                ).rowcount
+                if inserted:
+                    conn.execute(
+                        "UPDATE totals SET bytes = bytes + ? WHERE id = 0",
+                        (cached.size,),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE objects SET last_access = ? WHERE content_hash = ?",
+                        (time.time(), cached.content_hash),
+                    )
+                if cached.set_id is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO labels "
+                        "(set_id, version_number, content_hash) VALUES (?, ?, ?)",
+                        (
+                            cached.set_id,
+                            (
+                                UNKNOWN_VERSION
+                                if cached.version_number is None
+                                else cached.version_number
+                            ),
+                            cached.content_hash,
+                        ),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self.evict()
+        return cached
+
+    def add_file(self, path: str, set_id: Optional[str] = None) -> List[CachedSPL]:
+        """
+        Stores every SPL document in an XML file or zip archive, as
+        run_ingest.py would read them; a label zip's images are left out.
+        """
+        cached = []
+        for source in iter_spl_sources(path):
+            with open_spl_source(source) as f:
+                cached.append(self.add(f, set_id))
+        return cached
+
+    def _cached(self, row) -> CachedSPL:
+        set_id, version_number, content_hash, size = row
+        return CachedSPL(
+            set_id, version_number, content_hash, self.object_path(content_hash), size
+        )
+
+    def _touch(self, *content_hashes: str) -> None:
+        now = time.time()
+        # one transaction, so touching a batch costs one commit
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE objects SET last_access = ? "
+                "WHERE content_hash = ? AND last_access < ?",
+                [
+                    (now, content_hash, now - TOUCH_INTERVAL_SECONDS)
+                    for content_hash in content_hashes
+                ],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _if_present(self, cached: CachedSPL) -> Optional[CachedSPL]:
+        # another process may have evicted it since the lookup
+        if not os.path.exists(cached.path):
+            return None
+        self._touch(cached.content_hash)
+        return cached
+
+    def get(self, content_hash: str) -> Optional[CachedSPL]:
+        """
+        The document with a content hash, e.g. an SPLParsingIssue's, or None.
+        """
+        row = (
+            self._conn()
+            .execute(
+                "SELECT l.set_id, l.version_number, o.content_hash, o.size "
+                "FROM objects o LEFT JOIN labels l ON l.content_hash = o.content_hash "
+                "WHERE o.content_hash = ? ORDER BY l.version_number DESC LIMIT 1",
+                (content_hash,),
+            )
+            .fetchone()
+        )
+        return row and self._if_present(self._cached(row))
+
+    def lookup(
+        self, set_id: str, version_number: Optional[int] = None
+    ) -> Optional[CachedSPL]:
+        """
+        A version of a label, by default the latest cached one, or None.
+        """
+        sql = (
+            "SELECT l.set_id, l.version_number, o.content_hash, o.size "
+            "FROM labels l JOIN objects o ON o.content_hash = l.content_hash "
+            "WHERE l.set_id = ?"
+        )
+        params: tuple = (set_id,)
+        if version_number is not None:
+            sql += " AND l.version_number = ?"
+            params += (version_number,)
+        row = (
+            self._conn()
+            .execute(sql + " ORDER BY l.version_number DESC LIMIT 1", params)
+            .fetchone()
+        )
+        return row and self._if_present(self._cached(row))
+
+    def latest(self) -> Iterator[CachedSPL]:
+        """
+        The latest cached version of every label, in set id order. Documents
+        count as used when they are listed, so a run reading them evicts other
+        documents first; one evicted by another process before it is opened is
+        gone all the same, see IngestionStats.missing.
+        """
+        # SQLite reads the bare columns from the row holding the MAX
+        rows = (
+            self._conn()
+            .execute(
+                "SELECT l.set_id, MAX(l.version_number), o.content_hash, o.size "
+                "FROM labels l JOIN objects o ON o.content_hash = l.content_hash "
+                "GROUP BY l.set_id ORDER BY l.set_id"
+            )
+            .fetchall()
+        )
+        for start in range(0, len(rows), TOUCH_BATCH_SIZE):
+            batch = map(self._cached, rows[start : start + TOUCH_BATCH_SIZE])
+            present = [cached for cached in batch if os.path.exists(cached.path)]
+            self._touch(*(cached.content_hash for cached in present))
+            yield from present
+
+    def size(self) -> int:
+        """
+        The total size in bytes of the cached documents.
+        """
+        return self._conn().execute("SELECT bytes FROM totals").fetchone()[0]
+
+    def evict(self) -> int:
+        """
+        Deletes the least recently used documents while the cache holds more
+        than max_bytes, down to EVICT_TO_FRACTION of it.
+
+        Returns:
+            int: The number of documents deleted.
+        """
+        conn = self._conn()
+        if self.size() <= self.max_bytes:
+            return 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            excess = self.size() - int(self.max_bytes * EVICT_TO_FRACTION)
+            victims, freed = [], 0
+            for content_hash, size in conn.execute(
+                "SELECT content_hash, size FROM objects ORDER BY last_access"
+            ):
+                if freed >= excess:
+                    break
+                victims.append((content_hash,))
+                freed += size
+            conn.executemany("DELETE FROM labels WHERE content_hash = ?", victims)
+            conn.executemany("DELETE FROM objects WHERE content_hash = ?", victims)
+            conn.execute("UPDATE totals SET bytes = bytes - ? WHERE id = 0", (freed,))
+            for (content_hash,) in victims:
+                try:
+                    os.unlink(self.object_path(content_hash))
+                except FileNotFoundError:
+                    pass
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info(f"Evicted {len(victims)} SPL documents from {self.root}")
+        return len(victims)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
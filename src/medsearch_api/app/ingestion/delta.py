@@ -0,0 +1,174 @@
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import IO, Dict, Iterator, List, Optional, Sequence, Tuple, cast
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+
+from medsearch_api.app.database.models import SPL, Med
+from medsearch_api.app.database.upsert import DEFAULT_CHUNK_SIZE, chunks
+from medsearch_api.app.ingestion.hashing import READ_CHUNK_SIZE, content_hasher
+from medsearch_api.app.ingestion.spl_parser import (
+    local_name,
+    parse_hl7_date,
+    parse_int,
+)
+
+logger = logging.getLogger(__name__)
+
+_HEADER_TAGS = frozenset({"setId", "versionNumber", "effectiveTime"})
+
+
+@dataclass(frozen=True, slots=True)
+class SPLFingerprint:
+    """
+    What is needed to tell whether a document changed since it was last
+    ingested, computed without parsing the document body.
+    """
+
+    set_id: Optional[str]
+    version_number: Optional[int]
+    effective_date: Optional[date]
+    content_hash: str
+
+
+def fingerprint_spl(f: IO[bytes]) -> SPLFingerprint:
+    """
+    Hashes a whole SPL document and reads setId, versionNumber and effectiveTime
+    from its header. XML parsing stops as soon as the header has been read or the
+    document body starts; the rest of the file is only hashed.
+
+    Args:
+        f (IO[bytes]): The SPL XML document.
+
+    Returns:
+        SPLFingerprint: The document's fingerprint. Header fields that could not be
+            read are None, which makes the document count as changed.
+    """
+    hasher = content_hasher()
+    parser: Optional[XMLPullParser] = XMLPullParser(events=("start", "end"))
+    header: Dict[str, Optional[str]] = {}
+    depth = 0
+
+    while chunk := f.read(READ_CHUNK_SIZE):
+        hasher.update(chunk)
+        if parser is None:
+            continue
+        try:
+            parser.feed(chunk)
+            # only start and end events are requested, and both carry an Element
+            events = cast(Iterator[Tuple[str, Element]], parser.read_events())
+            for event, elem in events:
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and local_name(elem.tag) == "component":
+                        parser = None
+                        break
+                    continue
+                if depth == 2:
+                    tag = local_name(elem.tag)
+                    if tag in _HEADER_TAGS:
+                        header[tag] = elem.get("root" if tag == "setId" else "value")
+                        if len(header) == len(_HEADER_TAGS):
+                            parser = None
+                            break
+                depth -= 1
+        except ParseError:
+            # the full parse reports the error; the document counts as changed
+            parser = None
+
+    return SPLFingerprint(
+        set_id=header.get("setId"),
+        version_number=parse_int(header.get("versionNumber")),
+        effective_date=parse_hl7_date(header.get("effectiveTime")),
+        content_hash=hasher.hexdigest(),
+    )
+
+
+StoredFingerprint = Tuple[Optional[str], Optional[int], Optional[date], bool]
+
+
+def stored_fingerprints(
+    conn: Connection,
+    set_ids: Sequence[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, StoredFingerprint]:
+    """
+    Looks up the stored content hash, med version and effective date of SPLs
+    with chunked SELECT ... IN queries on the unique set_id index.
+
+    Returns:
+        Dict[str, StoredFingerprint]: (content_hash, version_number, effective_date,
+            deleted) by set_id, for the set_ids that exist.
+    """
+    stored: Dict[str, StoredFingerprint] = {}
+    for id_chunk in chunks(list(set_ids), chunk_size):
+        query = (
+            select(
+                SPL.set_id,
+                SPL.content_hash,
+                Med.version_number,
+                Med.effective_date,
+                SPL.deleted_at,
+            )
+            .outerjoin(Med, Med.spl_id == SPL.id)
+            .where(SPL.set_id.in_(id_chunk))
+        )
+        for set_id, content_hash, version, effective, deleted_at in conn.execute(query):
+            stored[set_id] = (content_hash, version, effective, deleted_at is not None)
+    return stored
+
+
+def is_unchanged(fingerprint: SPLFingerprint, stored: StoredFingerprint) -> bool:
+    content_hash, version_number, effective_date, deleted = stored
+    if deleted or content_hash != fingerprint.content_hash:
+        return False
+    # an SPL stored without a med has no version to compare
+    if version_number is None and effective_date is None:
+        return True
+    return (version_number, effective_date) == (
+        fingerprint.version_number,
+        fingerprint.effective_date,
+    )
+
+
+def find_changed(
+    conn: Connection, fingerprints: Sequence[SPLFingerprint]
+) -> List[SPLFingerprint]:
+    """
+    Bulk "which of these documents changed" check against spls and meds.
+
+    Returns:
+        List[SPLFingerprint]: The fingerprints that are new or differ from what is stored.
+    """
+    stored = stored_fingerprints(
+        conn, list({fp.set_id for fp in fingerprints if fp.set_id})
+    )
+    return [
+        fp
+        for fp in fingerprints
+        if fp.set_id is None
+        or fp.set_id not in stored
+        or not is_unchanged(fp, stored[fp.set_id])
+    ]
+
+
+class DeltaFilter:
+    """
+    Change filter for run_ingestion() that keeps only documents whose
+    fingerprint differs from the stored one.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.checked = 0
+        self.skipped = 0
+
+    def __call__(self, fingerprints: Sequence[SPLFingerprint]) -> List[SPLFingerprint]:
+        with self.engine.connect() as conn:
+            changed = find_changed(conn, fingerprints)
+        self.checked += len(fingerprints)
+        self.skipped += len(fingerprints) - len(changed)
+        return changed
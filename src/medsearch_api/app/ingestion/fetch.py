@@ -0,0 +1,325 @@
+import enum
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from medsearch_api.app.ingestion.cache import SPLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCH_WORKERS = 8
+# (connect, read) seconds; the read timeout is per chunk, not per document
+DEFAULT_TIMEOUT: Tuple[float, float] = (10.0, 60.0)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# downloads queued per worker; bounds memory for very long set id lists
+FETCHES_IN_FLIGHT_PER_WORKER = 4
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# DailyMed set ids are UUIDs; anything else would be written outside the directory
+_SET_ID = re.compile(r"^[0-9A-Za-z-]+$")
+
+
+class _RetryableResponse(Exception):
+    def __init__(self, status_code: int, retry_after: Optional[float]):
+        super().__init__(f"HTTP {status_code}")
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: before retry n a fetch sleeps a
+    random time between 0 and min(max_seconds, base_seconds * 2 ** n), so
+    workers that failed together don't retry together. A Retry-After header
+    from a 429 or 503 is honored instead, up to max_seconds.
+    """
+
+    attempts: int = 5
+    base_seconds: float = 0.5
+    max_seconds: float = 30.0
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_seconds)
+        return random.uniform(0, min(self.max_seconds, self.base_seconds * 2**retry))
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    # only the delta-seconds form; an HTTP date falls back to the backoff
+    try:
+        return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class Validators:
+    """
+    The ETag and Last-Modified a document was served with, sent back as
+    If-None-Match and If-Modified-Since on the next fetch.
+    """
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> "Validators":
+        return cls(response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class FetchStatus(enum.Enum):
+    DOWNLOADED = "downloaded"
+    UNCHANGED = "unchanged"
+    FAILED = "failed"
+
+
+@dataclass(slots=True)
+class FetchResult:
+    set_id: str
+    status: FetchStatus
+    attempts: int = 0
+    bytes: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class FetchStats:
+    documents: int = 0
+    downloaded: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    bytes: int = 0
+    elapsed_seconds: float = 0.0
+    failures: List[FetchResult] = field(default_factory=list)
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def add(self, result: FetchResult) -> None:
+        self.documents += 1
+        self.bytes += result.bytes
+        if result.status is FetchStatus.DOWNLOADED:
+            self.downloaded += 1
+        elif result.status is FetchStatus.UNCHANGED:
+            self.unchanged += 1
+        else:
+            self.failed += 1
+            self.failures.append(result)
+
+
+def _write_atomically(path: str, write) -> None:
+    # readers of path see the old file or the whole new one, never a partial one
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".fetch-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class SPLDirectory:
+    """
+    Downloaded labels as <set_id>.xml, each with its validators in
+    <set_id>.json; run_ingest.py reads the directory and skips the JSON files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def document_path(self, set_id: str) -> str:
+        return os.path.join(self.path, f"{set_id}.xml")
+
+    def validators_path(self, set_id: str) -> str:
+        return os.path.join(self.path, f"{set_id}.json")
+
+    def validators(self, set_id: str) -> Validators:
+        # without the document a conditional GET could only return a 304 for
+        # a file we no longer have
+        if not os.path.exists(self.document_path(set_id)):
+            return Validators()
+        try:
+            with open(self.validators_path(set_id)) as f:
+                return Validators(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return Validators()
+
+    def save(self, set_id: str, response: requests.Response, chunk_size: int) -> int:
+        """
+        Streams a response body to the set id's document, then records its
+        validators.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        written = 0
+
+        def write_body(f):
+            nonlocal written
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+
+        _write_atomically(self.document_path(set_id), write_body)
+        validators = json.dumps(asdict(Validators.from_response(response)))
+        _write_atomically(
+            self.validators_path(set_id), lambda f: f.write(validators.encode())
+        )
+        return written
+
+
+class SPLFetcher:
+    """
+    Downloads DailyMed SPL documents by set id into an SPLDirectory from a
+    pool of threads sharing one pooled HTTP session, so connections to
+    DailyMed are kept alive and reused. Labels fetched before are requested
+    conditionally and a 304 leaves the local copy as it is. With a cache, each
+    downloaded label is also added to it.
+    """
+
+    def __init__(
+        self,
+        directory: SPLDirectory,
+        base_url: str,
+        workers: int = DEFAULT_FETCH_WORKERS,
+        retry: RetryPolicy = RetryPolicy(),
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        cache: Optional[SPLCache] = None,
+    ):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.retry = retry
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.session = requests.Session()
+        # one keep-alive connection per worker thread
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, set_id: str) -> str:
+        return f"{self.base_url}/spls/{set_id}.xml"
+
+    def fetch(self, set_id: str) -> FetchResult:
+        """
+        Fetches one label, retrying connection errors, timeouts and 429 and 5xx
+        responses per the retry policy. Other errors fail at once.
+
+        Args:
+            set_id (str): The label's DailyMed set id.
+
+        Returns:
+            FetchResult: What happened; failures carry the last error.
+        """
+        if not _SET_ID.match(set_id):
+            return FetchResult(
+                set_id, FetchStatus.FAILED, error=f"Invalid set id {set_id!r}"
+            )
+        result = FetchResult(set_id, FetchStatus.FAILED)
+        for attempt in range(self.retry.attempts):
+            result.attempts = attempt + 1
+            try:
+                return self._fetch_once(set_id, result)
+            except _RetryableResponse as e:
+                result.error, retry_after = str(e), e.retry_after
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as e:
+                result.error, retry_after = f"{type(e).__name__}: {e}", None
+            except (requests.RequestException, OSError) as e:
+                result.error = f"{type(e).__name__}: {e}"
+                break
+            if attempt + 1 < self.retry.attempts:
+                delay = self.retry.delay(attempt, retry_after)
+                logger.debug(f"Retrying {set_id} in {delay:.2f}s: {result.error}")
+                time.sleep(delay)
+        logger.warning(
+            f"Failed to fetch {set_id} after {result.attempts} attempts: "
+            f"{result.error}"
+        )
+        return result
+
+    def _fetch_once(self, set_id: str, result: FetchResult) -> FetchResult:
+        headers = self.directory.validators(set_id).headers()
+        with self.session.get(
+            self.url(set_id), headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code == 304:
+                result.status, result.error = FetchStatus.UNCHANGED, None
+                return result
+            if response.status_code in RETRY_STATUSES:
+                raise _RetryableResponse(response.status_code, _retry_after(response))
+            response.raise_for_status()
+            result.bytes = self.directory.save(set_id, response, self.chunk_size)
+        if self.cache is not None:
+            # the download itself succeeded; a later run re-downloads on a 200
+            try:
+                self.cache.add_file(self.directory.document_path(set_id), set_id)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not cache {set_id}: {e}")
+        result.status, result.error = FetchStatus.DOWNLOADED, None
+        return result
+
+    def fetch_all(self, set_ids: Iterable[str]) -> FetchStats:
+        """
+        Fetches every label on the worker threads. Set ids are read lazily and
+        at most FETCHES_IN_FLIGHT_PER_WORKER per worker are queued at a time.
+
+        Args:
+            set_ids (Iterable[str]): The labels to fetch.
+
+        Returns:
+            FetchStats: Counts of downloaded, unchanged and failed labels.
+        """
+        stats = FetchStats()
+        started = time.perf_counter()
+        in_flight: Deque[Future] = deque()
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="spl-fetch"
+        ) as executor:
+            for set_id in set_ids:
+                if len(in_flight) >= self.workers * FETCHES_IN_FLIGHT_PER_WORKER:
+                    stats.add(in_flight.popleft().result())
+                in_flight.append(executor.submit(self.fetch, set_id))
+            while in_flight:
+                stats.add(in_flight.popleft().result())
+        stats.elapsed_seconds = time.perf_counter() - started
+        return stats
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "SPLFetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
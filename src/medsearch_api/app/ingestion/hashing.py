@@ -0,0 +1,54 @@
+import hashlib
+from typing import IO, Iterable, Optional, Tuple
+
+# blake2b is faster than sha256 in CPython and 16 bytes is plenty to detect changes
+CONTENT_HASH_DIGEST_SIZE = 16
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def content_hasher() -> "hashlib.blake2b":
+    return hashlib.blake2b(digest_size=CONTENT_HASH_DIGEST_SIZE)
+
+
+class HashingReader:
+    """
+    Wraps a binary file and hashes every byte read through it, so a document
+    can be hashed in the same pass that parses it.
+    """
+
+    def __init__(self, raw: IO[bytes]):
+        self.raw = raw
+        self.hasher = content_hasher()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.hasher.update(data)
+        return data
+
+    def drain(self) -> None:
+        # a parser may stop before EOF (e.g. trailing whitespace); hash the rest
+        while self.read(READ_CHUNK_SIZE):
+            pass
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+
+def ingredient_fingerprint(keys: Iterable[Tuple[str, str]]) -> Optional[str]:
+    """
+    Canonical fingerprint of a set of ingredients: products with the same
+    active ingredients get the same fingerprint whatever order their labels
+    list them in.
+
+    Args:
+        keys (Iterable[Tuple[str, str]]): (code, code_system) of each ingredient.
+
+    Returns:
+        Optional[str]: Hex digest, or None for an empty set.
+    """
+    canonical = sorted({f"{code_system}:{code}" for code, code_system in keys})
+    if not canonical:
+        return None
+    hasher = content_hasher()
+    hasher.update("\n".join(canonical).encode())
+    return hasher.hexdigest()
@@ -0,0 +1,174 @@
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence, Tuple, cast
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+from sqlalchemy import bindparam, func
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Connection
+
+from medsearch_api.app.database.models import SPLParsingIssue
+from medsearch_api.app.database.upsert import (
+    DEFAULT_CHUNK_SIZE,
+    UnsupportedDialectException,
+    chunks,
+    select_ids,
+)
+from medsearch_api.app.ingestion.hashing import content_hasher
+from medsearch_api.app.ingestion.spl_parser import local_name
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ("spl_id", "error_fingerprint", "content_hash")
+
+IssueKey = Tuple[int, str, str]
+
+_NUMBER = re.compile(r"\d+")
+_SPACE = re.compile(r"\s+")
+
+
+def error_fingerprint(error: str) -> str:
+    """
+    Hashes an error message with its numbers (line and column positions,
+    counts) and whitespace normalized, so one error in one document always
+    gets the same fingerprint.
+    """
+    normalized = _SPACE.sub(" ", _NUMBER.sub("?", error)).strip()
+    hasher = content_hasher()
+    hasher.update(normalized.encode())
+    return hasher.hexdigest()
+
+
+def xml_structure(xml_content: str) -> str:
+    """
+    Outlines a document's elements up to where it stops being well formed, one
+    local name per line indented by depth, so an issue shows how far into the
+    document parsing got.
+    """
+    parser: XMLPullParser = XMLPullParser(events=("start", "end"))
+    # a syntax error is queued as an event rather than raised here
+    parser.feed(xml_content.encode("utf-8"))
+    lines: List[str] = []
+    depth = 0
+    try:
+        # only start and end events are requested, and both carry an Element
+        events = cast(Iterator[Tuple[str, Element]], parser.read_events())
+        for event, elem in events:
+            if event == "start":
+                lines.append("  " * depth + local_name(elem.tag))
+                depth += 1
+            else:
+                depth -= 1
+                elem.clear()
+    except ParseError:
+        pass
+    return "\n".join(lines)
+
+
+@dataclass(frozen=True, slots=True)
+class ParsingIssueRecord:
+    spl_id: int
+    error: str
+    # hash of the raw document, see ingestion/hashing.py
+    content_hash: str
+    xml_content: str
+    xml_structure: str
+
+    @property
+    def key(self) -> IssueKey:
+        return (self.spl_id, error_fingerprint(self.error), self.content_hash)
+
+
+def _insert_statement(dialect_name: str, rows: List[Dict]):
+    # a concurrent writer may have recorded the same issue since the lookup
+    table = SPLParsingIssue.__table__
+    if dialect_name == "mysql":
+        mysql_stmt = mysql.insert(table).values(rows)
+        return mysql_stmt.on_duplicate_key_update(
+            occurrences=table.c.occurrences + mysql_stmt.inserted.occurrences,
+            last_seen_at=mysql_stmt.inserted.last_seen_at,
+        )
+    if dialect_name == "sqlite":
+        sqlite_stmt = sqlite.insert(table).values(rows)
+        return sqlite_stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={
+                "occurrences": table.c.occurrences + sqlite_stmt.excluded.occurrences,
+                "last_seen_at": sqlite_stmt.excluded.last_seen_at,
+            },
+        )
+    raise UnsupportedDialectException(
+        f"Recording parsing issues is not supported for dialect {dialect_name}."
+    )
+
+
+class ParsingIssueStore:
+    """
+    Records SPL parsing issues once per (spl_id, error fingerprint, content
+    hash). A label that fails the same way on every run only bumps its issue's
+    occurrences and last_seen_at; its XML is written the first time only.
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def record(self, conn: Connection, issues: Sequence[ParsingIssueRecord]) -> int:
+        """
+        Records a batch of issues. Known issues are found with one lookup per
+        chunk on the unique key and updated by id; only new issues are
+        inserted.
+
+        Args:
+            conn (Connection): The SQLAlchemy connection; the caller owns the transaction.
+            issues (Sequence[ParsingIssueRecord]): The issues, repeats allowed.
+
+        Returns:
+            int: The number of issues not recorded before.
+        """
+        if not issues:
+            return 0
+        counts: Counter = Counter()
+        first: Dict[IssueKey, ParsingIssueRecord] = {}
+        for issue in issues:
+            key = issue.key
+            counts[key] += 1
+            first.setdefault(key, issue)
+
+        table = SPLParsingIssue.__table__
+        existing = select_ids(conn, table, KEY_COLUMNS, sorted(counts), self.chunk_size)
+        if existing:
+            # in id order, so concurrent writers lock rows in the same order
+            conn.execute(
+                table.update()
+                .where(table.c.id == bindparam("issue_id"))
+                .values(
+                    occurrences=table.c.occurrences + bindparam("seen"),
+                    last_seen_at=func.now(),
+                ),
+                [
+                    {"issue_id": issue_id, "seen": counts[key]}
+                    for key, issue_id in sorted(existing.items(), key=lambda i: i[1])
+                ],
+            )
+
+        new_keys = sorted(key for key in counts if key not in existing)
+        rows = [
+            {
+                **dict(zip(KEY_COLUMNS, key)),
+                "error": first[key].error,
+                "occurrences": counts[key],
+                "xml_content": first[key].xml_content,
+                "xml_structure": first[key].xml_structure,
+            }
+            for key in new_keys
+        ]
+        for chunk in chunks(rows, self.chunk_size):
+            conn.execute(_insert_statement(conn.dialect.name, list(chunk)))
+
+        logger.debug(
+            f"Recorded {len(issues)} parsing issues: {len(new_keys)} new, "
+            f"{len(existing)} seen before"
+        )
+        return len(new_keys)
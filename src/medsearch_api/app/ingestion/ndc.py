@@ -0,0 +1,59 @@
+from typing import Optional
+
+NDC_CODE_SYSTEM = "2.16.840.1.113883.6.69"
+
+# (labeler, product[, package]) segment lengths of the hyphenated layouts; each
+# pads to the 5-4-2 form with one leading zero
+_PRODUCT_LAYOUTS = {(4, 4), (5, 3), (5, 4)}
+_PACKAGE_LAYOUTS = {(4, 4, 2), (5, 3, 2), (5, 4, 1), (5, 4, 2)}
+LABELER_DIGITS = 5
+PRODUCT_DIGITS = 4
+PACKAGE_DIGITS = 2
+PRODUCT_NDC_DIGITS = LABELER_DIGITS + PRODUCT_DIGITS
+PACKAGE_NDC_DIGITS = PRODUCT_NDC_DIGITS + PACKAGE_DIGITS
+
+
+def normalize_ndc(code: Optional[str]) -> Optional[str]:
+    """
+    Normalizes a product or package NDC to its 9 digit 5-4 product code, the
+    form meds.normalized_code is stored and looked up in.
+
+    Hyphenated codes may use any of the 4-4, 5-3 and 5-4 product layouts or the
+    4-4-2, 5-3-2, 5-4-1 and 5-4-2 package layouts; the short segment is zero
+    padded. Unhyphenated codes must already be padded: 11 digits for a package
+    or 9 for a product. A 10 digit code without hyphens can't be normalized,
+    since any of its segments could be the short one.
+
+    Args:
+        code (Optional[str]): The code as written on a label or sent by a client.
+
+    Returns:
+        Optional[str]: The 9 digit product code, or None if code isn't an NDC.
+    """
+    if code is None:
+        return None
+    segments = code.strip().split("-")
+    if not all(segment.isascii() and segment.isdigit() for segment in segments):
+        return None
+    if len(segments) == 1:
+        digits = segments[0]
+        if len(digits) in (PRODUCT_NDC_DIGITS, PACKAGE_NDC_DIGITS):
+            return digits[:PRODUCT_NDC_DIGITS]
+        return None
+    layout = tuple(len(segment) for segment in segments)
+    if layout not in _PRODUCT_LAYOUTS | _PACKAGE_LAYOUTS:
+        return None
+    labeler, product = segments[0], segments[1]
+    return labeler.zfill(LABELER_DIGITS) + product.zfill(PRODUCT_DIGITS)
+
+
+def normalized_med_code(
+    code: Optional[str], code_system: Optional[str]
+) -> Optional[str]:
+    """
+    The normalized_code of a med: its NDC normalized, or None for codes from
+    other systems.
+    """
+    if code_system != NDC_CODE_SYSTEM:
+        return None
+    return normalize_ndc(code)
@@ -0,0 +1,336 @@
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from zipfile import ZipFile
+
+from medsearch_api.app.ingestion.delta import SPLFingerprint, fingerprint_spl
+from medsearch_api.app.ingestion.records import ParsedSPL
+from medsearch_api.app.ingestion.spl_parser import SPLParsingException, parse_spl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+# batches queued per worker; bounds memory when writers fall behind
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+BatchSink = Callable[[List[ParsedSPL]], None]
+ChangeFilter = Callable[[List[SPLFingerprint]], List[SPLFingerprint]]
+FailureSink = Callable[[List["ParseFailure"]], None]
+
+
+@dataclass(frozen=True, slots=True)
+class SPLSourceFile:
+    """
+    Where to find one SPL document: a plain XML file, an XML member of a zip
+    archive, or a per-label zip nested inside a release archive. Only this
+    descriptor is sent to worker processes, never the document itself.
+    """
+
+    path: str
+    member: Optional[str] = None
+
+    def __str__(self) -> str:
+        return f"{self.path}!{self.member}" if self.member else self.path
+
+
+@dataclass(slots=True)
+class ParseFailure:
+    source: str
+    error: str
+    # the file was gone when opened, e.g. evicted from the SPL cache since it
+    # was listed; counted as missing rather than failed
+    missing: bool = False
+    # the document, for its parsing issue, when it was read but couldn't be
+    # parsed; see SPLBatchWriter.record_failures_with_connection
+    fingerprint: Optional[SPLFingerprint] = None
+    xml_content: Optional[str] = None
+
+
+@dataclass
+class IngestionStats:
+    documents: int = 0
+    parsed: int = 0
+    failed: int = 0
+    # unchanged documents skipped by the change filter
+    skipped: int = 0
+    # documents whose file was gone by the time it was read
+    missing: int = 0
+    elapsed_seconds: float = 0.0
+    failures: List[ParseFailure] = field(default_factory=list)
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def _is_xml(name: str) -> bool:
+    return name.lower().endswith(".xml")
+
+
+def _is_zip(name: str) -> bool:
+    return name.lower().endswith(".zip")
+
+
+def iter_spl_sources(path: str) -> Iterator[SPLSourceFile]:
+    """
+    Lists the SPL documents under a path, which may be an XML file, a zip
+    archive (a per-label zip or a DailyMed release zip of per-label zips) or a
+    directory containing any of these.
+
+    Args:
+        path (str): The file or directory to scan.
+
+    Yields:
+        SPLSourceFile: One descriptor per SPL document, in a stable order.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if _is_xml(name) or _is_zip(name):
+                    yield from iter_spl_sources(os.path.join(root, name))
+    elif _is_zip(path):
+        with ZipFile(path) as archive:
+            for name in archive.namelist():
+                if _is_xml(name) or _is_zip(name):
+                    yield SPLSourceFile(path, name)
+    elif _is_xml(path):
+        yield SPLSourceFile(path)
+
+
+# archives opened by this process, so a release zip's central directory is
+# read once per worker rather than once per document
+_open_archives: Dict[str, ZipFile] = {}
+
+
+def _archive(path: str) -> ZipFile:
+    archive = _open_archives.get(path)
+    if archive is None:
+        archive = _open_archives[path] = ZipFile(path)
+    return archive
+
+
+@contextmanager
+def open_spl_source(source: SPLSourceFile) -> Iterator[IO[bytes]]:
+    if source.member is None:
+        with open(source.path, "rb") as f:
+            yield f
+        return
+
+    archive = _archive(source.path)
+    if not _is_zip(source.member):
+        with archive.open(source.member) as f:
+            yield f
+        return
+
+    # per-label zips hold the label XML plus its images and are small
+    with ZipFile(io.BytesIO(archive.read(source.member))) as label_zip:
+        xml_names = [name for name in label_zip.namelist() if _is_xml(name)]
+        if not xml_names:
+            raise SPLParsingException(f"No XML document in {source}")
+        with label_zip.open(xml_names[0]) as f:
+            yield f
+
+
+def _unparsable(source: SPLSourceFile, error: str) -> ParseFailure:
+    # read again for the parsing issue; few enough documents fail that the
+    # second read doesn't matter
+    try:
+        with open_spl_source(source) as f:
+            document = f.read()
+    except (SPLParsingException, OSError):
+        # e.g. a label zip without an XML document
+        return ParseFailure(source=str(source), error=error)
+    return ParseFailure(
+        source=str(source),
+        error=error,
+        fingerprint=fingerprint_spl(io.BytesIO(document)),
+        xml_content=document.decode("utf-8", errors="replace"),
+    )
+
+
+def parse_source(source: SPLSourceFile) -> Union[ParsedSPL, ParseFailure]:
+    try:
+        with open_spl_source(source) as f:
+            return parse_spl(f)
+    except FileNotFoundError as e:
+        return ParseFailure(source=str(source), error=str(e), missing=True)
+    except (SPLParsingException, ValueError) as e:
+        return _unparsable(source, str(e))
+    except OSError as e:
+        return ParseFailure(source=str(source), error=str(e))
+
+
+def parse_batch(sources: List[SPLSourceFile]) -> List[Union[ParsedSPL, ParseFailure]]:
+    """
+    Worker entry point: parses a batch of documents. Results are plain
+    slotted dataclasses, so they pickle compactly back to the parent.
+    """
+    return [parse_source(source) for source in sources]
+
+
+def fingerprint_source(source: SPLSourceFile) -> Union[SPLFingerprint, ParseFailure]:
+    try:
+        with open_spl_source(source) as f:
+            return fingerprint_spl(f)
+    except FileNotFoundError as e:
+        return ParseFailure(source=str(source), error=str(e), missing=True)
+    except (SPLParsingException, OSError, ValueError) as e:
+        return ParseFailure(source=str(source), error=str(e))
+
+
+def fingerprint_batch(
+    sources: List[SPLSourceFile],
+) -> List[Tuple[SPLSourceFile, Union[SPLFingerprint, ParseFailure]]]:
+    """
+    Worker entry point: fingerprints a batch of documents without parsing them.
+    """
+    return [(source, fingerprint_source(source)) for source in sources]
+
+
+def _batched(
+    sources: Iterable[SPLSourceFile], batch_size: int
+) -> Iterator[List[SPLSourceFile]]:
+    it = iter(sources)
+    while batch := list(islice(it, batch_size)):
+        yield batch
+
+
+def run_ingestion(
+    sources: Iterable[SPLSourceFile],
+    sink: BatchSink,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    change_filter: Optional[ChangeFilter] = None,
+    failure_sink: Optional[FailureSink] = None,
+) -> IngestionStats:
+    """
+    Parses SPL documents on a pool of worker processes and hands each batch of
+    parsed documents to sink in the calling process, as batches complete.
+
+    With a change_filter, each batch is first fingerprinted by the workers and
+    only the documents the filter returns are parsed and sent to sink.
+
+    Workers are started from a forkserver so they never inherit the parent's
+    threads or database connections.
+
+    Args:
+        sources (Iterable[SPLSourceFile]): The documents to ingest.
+        sink (BatchSink): Called with every batch of successfully parsed documents,
+            e.g. WriterPool.submit.
+        workers (int): Number of parser processes. 1 parses in the calling process.
+        batch_size (int): Documents per worker task and per sink call.
+        change_filter (Optional[ChangeFilter]): Returns the fingerprints of a batch
+            that changed since the last run, e.g. delta.DeltaFilter.
+        failure_sink (Optional[FailureSink]): Called with the documents of a batch
+            that were read but could not be parsed, e.g. WriterPool.submit_failures.
+
+    Returns:
+        IngestionStats: Document counts and throughput.
+    """
+    stats = IngestionStats()
+    start = time.perf_counter()
+
+    def record_failures(failures: List[ParseFailure]) -> None:
+        unparsable = []
+        for failure in failures:
+            if failure.missing:
+                logger.info(f"Skipping {failure.source}, it no longer exists")
+                stats.missing += 1
+                continue
+            logger.warning(f"Could not parse {failure.source}: {failure.error}")
+            stats.failed += 1
+            # the document itself only goes to failure_sink
+            stats.failures.append(replace(failure, xml_content=None))
+            if failure.xml_content is not None:
+                unparsable.append(failure)
+        if unparsable and failure_sink is not None:
+            failure_sink(unparsable)
+
+    def handle_parsed(results: List[Union[ParsedSPL, ParseFailure]]) -> None:
+        parsed = [r for r in results if isinstance(r, ParsedSPL)]
+        record_failures([r for r in results if isinstance(r, ParseFailure)])
+        stats.parsed += len(parsed)
+        if parsed:
+            sink(parsed)
+
+    def changed_sources(
+        results: List[Tuple[SPLSourceFile, Union[SPLFingerprint, ParseFailure]]],
+    ) -> List[SPLSourceFile]:
+        assert change_filter is not None
+        fingerprints = [
+            (source, fp) for source, fp in results if isinstance(fp, SPLFingerprint)
+        ]
+        record_failures([fp for _, fp in results if isinstance(fp, ParseFailure)])
+        changed = set(change_filter([fp for _, fp in fingerprints]))
+        stats.skipped += len(fingerprints) - len(changed)
+        return [source for source, fp in fingerprints if fp in changed]
+
+    if workers <= 1:
+        for batch in _batched(sources, batch_size):
+            stats.documents += len(batch)
+            if change_filter is not None:
+                batch = changed_sources(fingerprint_batch(batch))
+            if batch:
+                handle_parsed(parse_batch(batch))
+    else:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        results: "queue.Queue" = queue.Queue()
+        max_in_flight = workers * BATCHES_IN_FLIGHT_PER_WORKER
+        in_flight = 0
+
+        with context.Pool(workers) as pool:
+
+            def submit(task: Callable, batch: List[SPLSourceFile]) -> None:
+                nonlocal in_flight
+                pool.apply_async(
+                    task,
+                    (batch,),
+                    callback=lambda result: results.put((task, result)),
+                    error_callback=results.put,
+                )
+                in_flight += 1
+
+            def wait_for_result() -> None:
+                nonlocal in_flight
+                item = results.get()
+                in_flight -= 1
+                if isinstance(item, BaseException):
+                    raise item
+                task, result = item
+                if task is parse_batch:
+                    handle_parsed(result)
+                    return
+                changed = changed_sources(result)
+                if changed:
+                    submit(parse_batch, changed)
+
+            first_task = parse_batch if change_filter is None else fingerprint_batch
+            for batch in _batched(sources, batch_size):
+                while in_flight >= max_in_flight:
+                    wait_for_result()
+                stats.documents += len(batch)
+                submit(first_task, batch)
+            while in_flight:
+                wait_for_result()
+
+    stats.elapsed_seconds = time.perf_counter() - start
+    return stats
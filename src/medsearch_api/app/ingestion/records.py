@@ -0,0 +1,141 @@
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Tuple
+
+from medsearch_api.app.database.models import (
+    SPL,
+    Ingredient,
+    Med,
+    MedForm,
+    MedIngredientMap,
+    MedOrganizationMap,
+    Organization,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SPLRecord:
+    set_id: str
+    title: str
+    published_date: date
+
+    def to_model(self, content_hash: Optional[str] = None) -> SPL:
+        return SPL(
+            set_id=self.set_id,
+            title=self.title,
+            published_date=self.published_date,
+            content_hash=content_hash,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class MedFormRecord:
+    code: str
+    code_system: str
+    name: Optional[str]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.code, self.code_system)
+
+    def to_model(self) -> MedForm:
+        return MedForm(code=self.code, code_system=self.code_system, name=self.name)
+
+
+@dataclass(frozen=True, slots=True)
+class IngredientRecord:
+    code: str
+    code_system: str
+    name: Optional[str]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.code, self.code_system)
+
+    def to_model(self) -> Ingredient:
+        return Ingredient(code=self.code, code_system=self.code_system, name=self.name)
+
+
+@dataclass(frozen=True, slots=True)
+class OrganizationRecord:
+    nih_id_extension: str
+    nih_id_root: str
+    name: Optional[str]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.nih_id_extension, self.nih_id_root)
+
+    def to_model(self) -> Organization:
+        return Organization(
+            name=self.name,
+            nih_id_extension=self.nih_id_extension,
+            nih_id_root=self.nih_id_root,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class MedRecord:
+    code: Optional[str]
+    code_system: Optional[str]
+    name: Optional[str]
+    generic_name: Optional[str]
+    effective_date: Optional[date]
+    version_number: Optional[int]
+
+    def to_model(self) -> Med:
+        return Med(
+            code=self.code,
+            code_system=self.code_system,
+            name=self.name,
+            generic_name=self.generic_name,
+            effective_date=self.effective_date,
+            version_number=self.version_number,
+        )
+
+
+@dataclass(slots=True)
+class ParsedSPL:
+    """
+    Everything extracted from a single SPL document.
+
+    An SPL maps to at most one Med (meds.spl_id is unique), so only the first
+    manufactured product of the document is kept.
+    """
+
+    spl: SPLRecord
+    med: Optional[MedRecord] = None
+    form: Optional[MedFormRecord] = None
+    organizations: List[OrganizationRecord] = field(default_factory=list)
+    ingredients: List[IngredientRecord] = field(default_factory=list)
+    # hash of the raw document bytes, used to skip unchanged labels
+    content_hash: Optional[str] = None
+
+    def to_models(self) -> List[object]:
+        """
+        Builds unsaved ORM objects for this document, wired together through
+        their relationships, ready for session.add_all().
+
+        Returns:
+            List[object]: The SPL, Med, MedForm, Organization, Ingredient and map models.
+        """
+        spl = self.spl.to_model(self.content_hash)
+        models: List[object] = [spl]
+        if self.med is None:
+            return models
+
+        med = self.med.to_model()
+        med.spl = spl
+        models.append(med)
+        if self.form is not None:
+            med.form = self.form.to_model()
+            models.append(med.form)
+        for org_record in self.organizations:
+            org = org_record.to_model()
+            models.extend([org, MedOrganizationMap(med=med, organization=org)])
+        for ingredient_record in self.ingredients:
+            ingredient = ingredient_record.to_model()
+            models.extend(
+                [ingredient, MedIngredientMap(med=med, ingredient=ingredient)]
+            )
+        return models
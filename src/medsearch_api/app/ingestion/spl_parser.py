@@ -0,0 +1,309 @@
+import logging
+import os
+from datetime import date
+from typing import IO, Dict, List, Optional, Tuple, TypeVar, Union
+from xml.etree.ElementTree import Element, ParseError, iterparse
+
+from medsearch_api.app.ingestion.hashing import HashingReader
+from medsearch_api.app.ingestion.records import (
+    IngredientRecord,
+    MedFormRecord,
+    MedRecord,
+    OrganizationRecord,
+    ParsedSPL,
+    SPLRecord,
+)
+
+logger = logging.getLogger(__name__)
+
+SPLSource = Union[str, "os.PathLike[str]", IO[bytes]]
+
+# ingredient classCodes for active ingredients (basis of strength, moiety, reference)
+ACTIVE_INGREDIENT_CLASS_CODES = frozenset({"ACTIB", "ACTIM", "ACTIR"})
+# older SPLs use manufacturedMedicine for the inner product element
+PRODUCT_TAGS = frozenset({"manufacturedProduct", "manufacturedMedicine"})
+# elements whose full text (including markup children) we read at their end event,
+# so their children must not be discarded before then
+TEXT_TAGS = frozenset({"title", "name"})
+
+_LABELER_PATH = ["document", "author", "assignedEntity", "representedOrganization"]
+
+
+KeyedRecord = TypeVar("KeyedRecord", IngredientRecord, OrganizationRecord)
+
+
+def _first_per_key(records: List[KeyedRecord]) -> List[KeyedRecord]:
+    # a label can list one code under differently spelled names, and the
+    # writer maps each key to a med once
+    first: Dict[Tuple[str, str], KeyedRecord] = {}
+    for record in records:
+        first.setdefault(record.key, record)
+    return list(first.values())
+
+
+class SPLParsingException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+def local_name(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _text(elem: Element) -> Optional[str]:
+    text = " ".join("".join(elem.itertext()).split())
+    return text or None
+
+
+def parse_hl7_date(value: Optional[str]) -> Optional[date]:
+    # HL7 TS values look like 20230115 or 20230115120000-0500
+    if not value or len(value) < 8:
+        return None
+    try:
+        return date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+    except ValueError:
+        return None
+
+
+def parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _SPLParseState:
+    __slots__ = (
+        "set_id",
+        "title",
+        "effective_date",
+        "version_number",
+        "organizations",
+        "org_extension",
+        "org_root",
+        "org_name",
+        "product_depth",
+        "products_seen",
+        "med_code",
+        "med_code_system",
+        "med_name",
+        "generic_name",
+        "form",
+        "ingredients",
+        "ingredient_code",
+        "ingredient_code_system",
+        "ingredient_name",
+    )
+
+    def __init__(self) -> None:
+        self.set_id: Optional[str] = None
+        self.title: Optional[str] = None
+        self.effective_date: Optional[date] = None
+        self.version_number: Optional[int] = None
+        self.organizations: List[OrganizationRecord] = []
+        self.org_extension: Optional[str] = None
+        self.org_root: Optional[str] = None
+        self.org_name: Optional[str] = None
+        self.product_depth: Optional[int] = None
+        self.products_seen = 0
+        self.med_code: Optional[str] = None
+        self.med_code_system: Optional[str] = None
+        self.med_name: Optional[str] = None
+        self.generic_name: Optional[str] = None
+        self.form: Optional[MedFormRecord] = None
+        self.ingredients: List[IngredientRecord] = []
+        self.ingredient_code: Optional[str] = None
+        self.ingredient_code_system: Optional[str] = None
+        self.ingredient_name: Optional[str] = None
+
+    def handle_start(self, path: List[str]) -> None:
+        if (
+            self.products_seen == 0
+            and self.product_depth is None
+            and len(path) >= 3
+            and path[-1] in PRODUCT_TAGS
+            and path[-2] == "manufacturedProduct"
+            and path[-3] == "subject"
+        ):
+            self.product_depth = len(path)
+
+    def handle_end(self, path: List[str], elem: Element) -> None:
+        depth = len(path)
+        tag = path[-1]
+
+        if depth == 2:
+            if tag == "setId":
+                self.set_id = elem.get("root")
+            elif tag == "title":
+                self.title = _text(elem)
+            elif tag == "effectiveTime":
+                self.effective_date = parse_hl7_date(elem.get("value"))
+            elif tag == "versionNumber":
+                self.version_number = parse_int(elem.get("value"))
+            return
+
+        if self.product_depth is not None and depth >= self.product_depth:
+            self._handle_product_end(path[self.product_depth - 1 :], elem)
+            if depth == self.product_depth:
+                self.product_depth = None
+                self.products_seen += 1
+            return
+
+        if depth >= 4 and path[1] == "author" and path[:4] == _LABELER_PATH:
+            self._handle_labeler_end(depth, tag, elem)
+
+    def _handle_labeler_end(self, depth: int, tag: str, elem: Element) -> None:
+        if depth == 5 and tag == "id" and self.org_extension is None:
+            self.org_extension = elem.get("extension")
+            self.org_root = elem.get("root")
+        elif depth == 5 and tag == "name":
+            self.org_name = _text(elem)
+        elif depth == 4:
+            if self.org_extension and self.org_root:
+                self.organizations.append(
+                    OrganizationRecord(
+                        nih_id_extension=self.org_extension,
+                        nih_id_root=self.org_root,
+                        name=self.org_name,
+                    )
+                )
+            self.org_extension = self.org_root = self.org_name = None
+
+    def _handle_product_end(self, relative_path: List[str], elem: Element) -> None:
+        depth = len(relative_path)
+        if depth == 1:
+            return
+
+        tag = relative_path[-1]
+        if depth == 2:
+            if tag == "code":
+                self.med_code = elem.get("code")
+                self.med_code_system = elem.get("codeSystem")
+            elif tag == "name":
+                self.med_name = _text(elem)
+            elif tag == "formCode":
+                code, code_system = elem.get("code"), elem.get("codeSystem")
+                if code and code_system:
+                    self.form = MedFormRecord(
+                        code=code, code_system=code_system, name=elem.get("displayName")
+                    )
+            elif tag == "ingredient":
+                self._finish_ingredient(elem.get("classCode"))
+        elif relative_path[1] == "ingredient":
+            if depth == 4 and relative_path[2] == "ingredientSubstance":
+                if tag == "code":
+                    self.ingredient_code = elem.get("code")
+                    self.ingredient_code_system = elem.get("codeSystem")
+                elif tag == "name":
+                    self.ingredient_name = _text(elem)
+        elif relative_path[1:] == ["asEntityWithGeneric", "genericMedicine", "name"]:
+            self.generic_name = _text(elem)
+
+    def _finish_ingredient(self, class_code: Optional[str]) -> None:
+        if (
+            class_code in ACTIVE_INGREDIENT_CLASS_CODES
+            and self.ingredient_code
+            and self.ingredient_code_system
+        ):
+            self.ingredients.append(
+                IngredientRecord(
+                    code=self.ingredient_code,
+                    code_system=self.ingredient_code_system,
+                    name=self.ingredient_name,
+                )
+            )
+        self.ingredient_code = self.ingredient_code_system = None
+        self.ingredient_name = None
+
+    def to_parsed_spl(self) -> ParsedSPL:
+        if not self.set_id:
+            raise SPLParsingException("SPL document has no setId.")
+        if not self.title:
+            raise SPLParsingException(f"SPL {self.set_id} has no title.")
+        if self.effective_date is None:
+            raise SPLParsingException(f"SPL {self.set_id} has no effectiveTime.")
+
+        spl = SPLRecord(
+            set_id=self.set_id, title=self.title, published_date=self.effective_date
+        )
+        organizations = _first_per_key(self.organizations)
+        if self.products_seen == 0:
+            return ParsedSPL(spl=spl, organizations=organizations)
+
+        med = MedRecord(
+            code=self.med_code,
+            code_system=self.med_code_system,
+            name=self.med_name,
+            generic_name=self.generic_name,
+            effective_date=self.effective_date,
+            version_number=self.version_number,
+        )
+        # the same substance can be listed once per strength basis
+        ingredients = _first_per_key(self.ingredients)
+        return ParsedSPL(
+            spl=spl,
+            med=med,
+            form=self.form,
+            organizations=organizations,
+            ingredients=ingredients,
+        )
+
+
+def parse_spl(source: SPLSource) -> ParsedSPL:
+    """
+    Parses an SPL document as a stream of events, discarding each subtree once
+    it has been consumed, so memory stays flat regardless of document size.
+    The raw bytes are hashed in the same pass and the digest is returned as
+    ParsedSPL.content_hash.
+
+    Args:
+        source (SPLSource): A path or binary file object containing SPL XML.
+
+    Returns:
+        ParsedSPL: The records extracted from the document.
+
+    Raises:
+        SPLParsingException: If the XML is malformed or required document fields are missing.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return _parse_stream(f)
+    return _parse_stream(source)
+
+
+def _parse_stream(f: IO[bytes]) -> ParsedSPL:
+    reader = HashingReader(f)
+    state = _SPLParseState()
+    path: List[str] = []
+    elems: List[Element] = []
+    # > 0 while inside an element whose text is read at its end event
+    text_depth = 0
+
+    try:
+        for event, elem in iterparse(reader, events=("start", "end")):
+            if event == "start":
+                tag = local_name(elem.tag)
+                path.append(tag)
+                elems.append(elem)
+                if tag in TEXT_TAGS:
+                    text_depth += 1
+                state.handle_start(path)
+                continue
+
+            state.handle_end(path, elem)
+            if path.pop() in TEXT_TAGS:
+                text_depth -= 1
+            elems.pop()
+            if text_depth == 0:
+                # children are detached as they end, so the parent only ever
+                # holds the element being finished and remove() is O(1)
+                elem.clear()
+                if elems:
+                    elems[-1].remove(elem)
+    except ParseError as e:
+        raise SPLParsingException(f"Malformed SPL XML: {e}") from e
+
+    reader.drain()
+    parsed = state.to_parsed_spl()
+    parsed.content_hash = reader.hexdigest()
+    return parsed
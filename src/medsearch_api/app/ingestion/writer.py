@@ -0,0 +1,410 @@
+import logging
+import queue
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, exc as sqlalchemy_exc, func, insert, update
+from sqlalchemy.engine import Connection, Engine
+
+from medsearch_api.app.custom_types import OperationType
+from medsearch_api.app.database.models import (
+    SPL,
+    Med,
+    MedIngredientMap,
+    MedOrganizationMap,
+    SPLDataIssue,
+)
+from medsearch_api.app.database.upsert import (
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    DimensionUpsertEngine,
+    bulk_upsert,
+    chunks,
+    select_ids,
+)
+from medsearch_api.app.ingestion.hashing import ingredient_fingerprint
+from medsearch_api.app.ingestion.issues import (
+    ParsingIssueRecord,
+    ParsingIssueStore,
+    xml_structure,
+)
+from medsearch_api.app.ingestion.ndc import normalized_med_code
+from medsearch_api.app.ingestion.pool import ParseFailure
+from medsearch_api.app.ingestion.records import ParsedSPL
+
+logger = logging.getLogger(__name__)
+
+# meds columns that are NOT NULL in the schema
+REQUIRED_MED_FIELDS = (
+    "code",
+    "code_system",
+    "name",
+    "generic_name",
+    "effective_date",
+    "version_number",
+)
+# lock wait timeout, deadlock
+RETRYABLE_MYSQL_ERRORS = frozenset({1205, 1213})
+MAX_WRITE_RETRIES = 3
+
+# a batch of parsed SPLs and the documents that failed to parse
+WriterTask = Tuple[Sequence[ParsedSPL], Sequence[ParseFailure]]
+
+
+def _is_retryable(e: sqlalchemy_exc.DBAPIError) -> bool:
+    args: Tuple[Any, ...] = getattr(e.orig, "args", ())
+    return bool(args) and args[0] in RETRYABLE_MYSQL_ERRORS
+
+
+class SPLBatchWriter:
+    """
+    Writes batches of parsed SPLs to the database, one transaction per batch,
+    using set-based upserts for every table so a batch costs a handful of
+    round trips regardless of its size.
+
+    Not thread safe: the dimension id caches belong to a single writer.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.dimensions = DimensionUpsertEngine(cache_size, chunk_size)
+        self.issues = ParsingIssueStore(chunk_size)
+
+    def write(
+        self, batch: Sequence[ParsedSPL], failures: Sequence[ParseFailure] = ()
+    ) -> int:
+        """
+        Writes a batch and records the parsing issues of failed documents in
+        one transaction, retrying on MySQL deadlocks and lock wait timeouts.
+
+        Returns:
+            int: The number of SPLs written.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.engine.begin() as conn:
+                    written = self.write_with_connection(conn, batch)
+                    self.record_failures_with_connection(conn, failures)
+                    return written
+            except Exception as e:
+                # ids cached during a rolled back transaction may not exist
+                for upserter in self.dimensions.upserters():
+                    upserter.cache.clear()
+                if (
+                    not isinstance(e, sqlalchemy_exc.DBAPIError)
+                    or not _is_retryable(e)
+                    or attempt >= MAX_WRITE_RETRIES
+                ):
+                    raise
+                attempt += 1
+                logger.warning(f"Retrying SPL batch after lock error: {e}")
+
+    def write_with_connection(
+        self, conn: Connection, batch: Sequence[ParsedSPL]
+    ) -> int:
+        """
+        Writes a batch on an existing connection; the caller owns the transaction.
+
+        Returns:
+            int: The number of SPLs written.
+        """
+        # the last occurrence of a set_id in a batch wins
+        batch = list({parsed.spl.set_id: parsed for parsed in batch}.values())
+        if not batch:
+            return 0
+
+        form_ids = self.dimensions.med_forms.upsert(
+            conn, [parsed.form for parsed in batch if parsed.form is not None]
+        )
+        ingredient_ids = self.dimensions.ingredients.upsert(
+            conn, [i for parsed in batch for i in parsed.ingredients]
+        )
+        org_ids = self.dimensions.organizations.upsert(
+            conn, [o for parsed in batch for o in parsed.organizations]
+        )
+
+        spl_ids = self._upsert_spls(conn, batch)
+
+        med_rows: List[Dict[str, Any]] = []
+        issue_rows: List[Dict[str, Any]] = []
+        # SPLs whose new version has no med that can be stored
+        medless_spl_ids: List[int] = []
+        for parsed in batch:
+            spl_id = spl_ids[(parsed.spl.set_id,)]
+            if parsed.med is None:
+                medless_spl_ids.append(spl_id)
+                continue
+            missing = [f for f in REQUIRED_MED_FIELDS if getattr(parsed.med, f) is None]
+            if missing:
+                medless_spl_ids.append(spl_id)
+                issue_rows.append(
+                    {
+                        "spl_id": spl_id,
+                        "operation_type": OperationType.INSERT,
+                        "table_name": Med.__tablename__,
+                        "error_message": f"Missing required fields: {', '.join(missing)}",
+                    }
+                )
+                continue
+            med_rows.append(
+                {
+                    "spl_id": spl_id,
+                    "med_form_id": (
+                        form_ids[parsed.form.key] if parsed.form is not None else None
+                    ),
+                    **{f: getattr(parsed.med, f) for f in REQUIRED_MED_FIELDS},
+                    "ingredient_fingerprint": ingredient_fingerprint(
+                        i.key for i in parsed.ingredients
+                    ),
+                    "normalized_code": normalized_med_code(
+                        parsed.med.code, parsed.med.code_system
+                    ),
+                    "deleted_at": None,
+                }
+            )
+
+        med_ids = self._upsert_meds(conn, med_rows)
+        self._replace_maps(conn, batch, spl_ids, med_ids, ingredient_ids, org_ids)
+        self._delete_meds(conn, medless_spl_ids)
+
+        if issue_rows:
+            logger.warning(f"Recording {len(issue_rows)} SPL data issues")
+            conn.execute(insert(SPLDataIssue.__table__), issue_rows)
+        return len(batch)
+
+    def record_failures_with_connection(
+        self, conn: Connection, failures: Sequence[ParseFailure]
+    ) -> int:
+        """
+        Records documents that were read but could not be parsed as parsing
+        issues of their SPLs; the caller owns the transaction. An issue belongs
+        to an SPL, so failures of labels not in spls are only logged.
+
+        Returns:
+            int: The number of issues not recorded before.
+        """
+        documents = [
+            (failure, failure.fingerprint, failure.xml_content)
+            for failure in failures
+            if failure.fingerprint is not None and failure.xml_content is not None
+        ]
+        if not documents:
+            return 0
+        spl_ids = select_ids(
+            conn,
+            SPL.__table__,
+            ("set_id",),
+            sorted({(fp.set_id,) for _, fp, _ in documents if fp.set_id is not None}),
+            self.chunk_size,
+        )
+        issues: List[ParsingIssueRecord] = []
+        for failure, fingerprint, xml_content in documents:
+            spl_id = spl_ids.get((fingerprint.set_id,))
+            if spl_id is None:
+                logger.info(
+                    f"Not recording a parsing issue for {failure.source}, "
+                    f"no SPL has its set id {fingerprint.set_id}"
+                )
+                continue
+            issues.append(
+                ParsingIssueRecord(
+                    spl_id=spl_id,
+                    error=failure.error,
+                    content_hash=fingerprint.content_hash,
+                    xml_content=xml_content,
+                    xml_structure=xml_structure(xml_content),
+                )
+            )
+        return self.issues.record(conn, issues)
+
+    def _upsert_spls(self, conn: Connection, batch: Sequence[ParsedSPL]):
+        table = SPL.__table__
+        rows = [
+            {
+                "set_id": parsed.spl.set_id,
+                "title": parsed.spl.title,
+                "published_date": parsed.spl.published_date,
+                "content_hash": parsed.content_hash,
+                "deleted_at": None,
+            }
+            for parsed in batch
+        ]
+        bulk_upsert(
+            conn,
+            table,
+            rows,
+            ("set_id",),
+            ("title", "published_date", "content_hash", "deleted_at"),
+            self.chunk_size,
+        )
+        return select_ids(
+            conn,
+            table,
+            ("set_id",),
+            [(row["set_id"],) for row in rows],
+            self.chunk_size,
+        )
+
+    def _upsert_meds(self, conn: Connection, rows: List[Dict[str, Any]]):
+        table = Med.__table__
+        bulk_upsert(
+            conn,
+            table,
+            rows,
+            ("spl_id",),
+            ("med_form_id",)
+            + REQUIRED_MED_FIELDS
+            + ("ingredient_fingerprint", "normalized_code", "deleted_at"),
+            self.chunk_size,
+        )
+        return select_ids(
+            conn,
+            table,
+            ("spl_id",),
+            [(row["spl_id"],) for row in rows],
+            self.chunk_size,
+        )
+
+    def _delete_meds(self, conn: Connection, spl_ids: List[int]) -> None:
+        # an earlier version's med would otherwise outlive the label it came from
+        table = Med.__table__
+        for id_chunk in chunks(sorted(spl_ids), self.chunk_size):
+            conn.execute(
+                update(table)
+                .where(table.c.spl_id.in_(id_chunk), table.c.deleted_at.is_(None))
+                .values(deleted_at=func.now())
+            )
+
+    def _replace_maps(
+        self,
+        conn: Connection,
+        batch: Sequence[ParsedSPL],
+        spl_ids,
+        med_ids,
+        ingredient_ids,
+        org_ids,
+    ) -> None:
+        # sets, since the maps are unique per pair and a label may list one
+        # ingredient or organization more than once
+        ingredient_pairs: Set[Tuple[int, int]] = set()
+        org_pairs: Set[Tuple[int, int]] = set()
+        for parsed in batch:
+            med_id = med_ids.get((spl_ids[(parsed.spl.set_id,)],))
+            if med_id is None:
+                continue
+            ingredient_pairs.update(
+                (med_id, ingredient_ids[i.key]) for i in parsed.ingredients
+            )
+            org_pairs.update((med_id, org_ids[o.key]) for o in parsed.organizations)
+
+        ingredient_table = MedIngredientMap.__table__
+        org_table = MedOrganizationMap.__table__
+        for id_chunk in chunks(sorted(med_ids.values()), self.chunk_size):
+            conn.execute(
+                delete(ingredient_table).where(ingredient_table.c.med_id.in_(id_chunk))
+            )
+            conn.execute(delete(org_table).where(org_table.c.med_id.in_(id_chunk)))
+        if ingredient_pairs:
+            conn.execute(
+                insert(ingredient_table),
+                [
+                    {"med_id": med_id, "ingredient_id": ingredient_id}
+                    for med_id, ingredient_id in sorted(ingredient_pairs)
+                ],
+            )
+        if org_pairs:
+            conn.execute(
+                insert(org_table),
+                [
+                    {"med_id": med_id, "org_id": org_id}
+                    for med_id, org_id in sorted(org_pairs)
+                ],
+            )
+
+
+class WriterPool:
+    """
+    A small number of writer threads, each with its own SPLBatchWriter, fed
+    from a bounded queue so parsing is throttled to the database's write speed.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        writers: int = 2,
+        max_pending: Optional[int] = None,
+        **writer_kwargs,
+    ):
+        self._queue: "queue.Queue[Optional[WriterTask]]" = queue.Queue(
+            maxsize=max_pending or writers * 2
+        )
+        self._lock = threading.Lock()
+        self._errors: List[BaseException] = []
+        self.written = 0
+        self._threads = [
+            threading.Thread(
+                target=self._run,
+                args=(SPLBatchWriter(engine, **writer_kwargs),),
+                name=f"spl-writer-{i}",
+                daemon=True,
+            )
+            for i in range(writers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self) -> "WriterPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def submit(self, batch: Sequence[ParsedSPL]) -> None:
+        self._submit(batch, ())
+
+    def submit_failures(self, failures: Sequence[ParseFailure]) -> None:
+        """
+        Queues documents that failed to parse for a writer to record as
+        parsing issues.
+        """
+        self._submit((), failures)
+
+    def _submit(
+        self, batch: Sequence[ParsedSPL], failures: Sequence[ParseFailure]
+    ) -> None:
+        if self._errors:
+            raise self._errors[0]
+        if batch or failures:
+            self._queue.put((batch, failures))
+
+    def close(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def _run(self, writer: SPLBatchWriter) -> None:
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            if self._errors:
+                # keep draining so submit() never blocks after a failure
+                continue
+            try:
+                written = writer.write(*task)
+            except Exception as e:
+                logger.exception(f"Error writing SPL batch: {e}")
+                self._errors.append(e)
+                continue
+            with self._lock:
+                self.written += written
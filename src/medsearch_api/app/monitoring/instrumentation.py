@@ -0,0 +1,318 @@
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from heapq import nlargest
+from typing import Dict, List, Optional, Tuple
+
+import prometheus_client
+from flask import Flask, request
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from medsearch_api.app.db import db
+
+logger = logging.getLogger(__name__)
+
+# set in the environment of every process serving the app, before it starts,
+# to merge their metrics; see run_server.py
+MULTIPROCESS_DIR_VARIABLE = "PROMETHEUS_MULTIPROC_DIR"
+
+QUERY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+QUERIES_PER_REQUEST_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250, 500)
+# statements listed in a slow request's log line, most total time first
+SLOW_REQUEST_TOP_STATEMENTS = 5
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# runs of placeholders, e.g. expanded IN lists: (?, ?, ?) or (%s, %s)
+_PLACEHOLDERS = re.compile(r"\((?:\s*(?:\?|%s)\s*,)+\s*(?:\?|%s)\s*\)")
+_SPACE = re.compile(r"\s+")
+# ORM column lists make up most of a SELECT; slow request logs leave them out
+_SELECT_LIST = re.compile(r"^SELECT (?:DISTINCT )?.+? FROM ")
+
+
+# statements of the current request; Flask runs each request in its own context
+_request_stats: ContextVar[Optional["RequestStats"]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalizes a SQL statement so executions differing only in literals, IN
+    list lengths or whitespace compare equal.
+    """
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _PLACEHOLDERS.sub("(...)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+def fingerprint_id(statement: str) -> str:
+    return hashlib.blake2b(fingerprint(statement).encode(), digest_size=6).hexdigest()
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """
+    The statements one request ran. Only timings are recorded per statement;
+    fingerprints are computed when a slow request is logged.
+    """
+
+    started: float = field(default_factory=time.perf_counter)
+    statements: List[Tuple[str, float]] = field(default_factory=list)
+    db_seconds: float = 0.0
+    slowest: float = 0.0
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements.append((statement, seconds))
+        self.db_seconds += seconds
+        if seconds > self.slowest:
+            self.slowest = seconds
+
+    def top_statements(self, n: int) -> List[Tuple[str, str, int, float]]:
+        """
+        Returns (fingerprint id, fingerprint, executions, total seconds) of the n
+        statements with the most total time.
+        """
+        counts: Counter[str] = Counter()
+        seconds: Dict[str, float] = defaultdict(float)
+        for statement, elapsed in self.statements:
+            key = fingerprint(statement)
+            counts[key] += 1
+            seconds[key] += elapsed
+        return [
+            (fingerprint_id(key), key, counts[key], seconds[key])
+            for key in nlargest(n, seconds, key=seconds.__getitem__)
+        ]
+
+
+class Instrumentation:
+    """
+    Request and SQL metrics of one app. Engine events time every statement
+    into a global histogram and, inside a request, into that request's
+    RequestStats, which are turned into per endpoint histograms when the
+    request ends.
+
+    When PROMETHEUS_MULTIPROC_DIR is set, prometheus_client keeps each
+    process's metrics in files there, and render merges those of every
+    process serving the app: counters and histograms are summed, including
+    exited processes', and gauges are reported per live process with a pid
+    label.
+    """
+
+    def __init__(self, slow_request_seconds: float):
+        self.slow_request_seconds = slow_request_seconds
+        self.multiprocess_mode = MULTIPROCESS_DIR_VARIABLE in os.environ
+        self.registry = r = prometheus_client.CollectorRegistry()
+        self.request_seconds = prometheus_client.Histogram(
+            "medsearch_http_request_duration_seconds",
+            "Request latency.",
+            ("endpoint",),
+            registry=r,
+        )
+        self.requests = prometheus_client.Counter(
+            "medsearch_http_requests",
+            "Requests handled.",
+            ("endpoint", "status"),
+            registry=r,
+        )
+        self.slow_requests = prometheus_client.Counter(
+            "medsearch_http_slow_requests",
+            "Requests slower than SLOW_REQUEST_SECONDS.",
+            ("endpoint",),
+            registry=r,
+        )
+        self.request_queries = prometheus_client.Histogram(
+            "medsearch_db_queries_per_request",
+            "SQL statements run per request.",
+            ("endpoint",),
+            registry=r,
+            buckets=QUERIES_PER_REQUEST_BUCKETS,
+        )
+        self.request_db_seconds = prometheus_client.Histogram(
+            "medsearch_db_time_per_request_seconds",
+            "Total SQL time per request.",
+            ("endpoint",),
+            registry=r,
+        )
+        self.request_slowest_query = prometheus_client.Histogram(
+            "medsearch_db_slowest_query_per_request_seconds",
+            "Slowest SQL statement per request.",
+            ("endpoint",),
+            registry=r,
+            buckets=QUERY_BUCKETS,
+        )
+        self.query_seconds = prometheus_client.Histogram(
+            "medsearch_db_query_duration_seconds",
+            "SQL statement latency, in and outside requests.",
+            ("engine",),
+            registry=r,
+            buckets=QUERY_BUCKETS,
+        )
+        self.pool_checkouts = prometheus_client.Counter(
+            "medsearch_db_pool_checkouts",
+            "Connections checked out of the pool.",
+            ("engine",),
+            registry=r,
+        )
+        # a process's own pools: one series per live process when merged
+        self.pool_checked_out = prometheus_client.Gauge(
+            "medsearch_db_pool_checked_out",
+            "Connections currently checked out.",
+            ("engine",),
+            registry=r,
+            multiprocess_mode="liveall",
+        )
+        self.pool_overflow = prometheus_client.Gauge(
+            "medsearch_db_pool_overflow",
+            "Connections open beyond pool_size; negative while the pool is still filling.",
+            ("engine",),
+            registry=r,
+            multiprocess_mode="liveall",
+        )
+        self.pool_size = prometheus_client.Gauge(
+            "medsearch_db_pool_size",
+            "Configured pool size.",
+            ("engine",),
+            registry=r,
+            multiprocess_mode="liveall",
+        )
+
+    def instrument_engine(self, engine: Engine, name: str) -> None:
+        observe = self.query_seconds.labels(name).observe
+
+        # these run for every statement, so they stay off Flask's context
+        # proxies: the start time rides on the execution context and the
+        # request's stats in a context variable
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            context.query_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            elapsed = time.perf_counter() - context.query_started
+            observe(elapsed)
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.record(statement, elapsed)
+
+        checkouts = self.pool_checkouts.labels(name)
+        checked_out = self.pool_checked_out.labels(name)
+        overflow = self.pool_overflow.labels(name)
+        size = self.pool_size.labels(name)
+
+        # gauges are written as the pool changes, since a process merging the
+        # metrics can't read another's pools; only QueuePool (MySQL) has
+        # these stats, other pool classes report 0
+        @event.listens_for(engine, "checkout")
+        def checkout(dbapi_connection, connection_record, connection_proxy):
+            checkouts.inc()
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                checked_out.set(pool.checkedout())
+                overflow.set(pool.overflow())
+                size.set(pool.size())
+
+        @event.listens_for(engine, "checkin")
+        def checkin(dbapi_connection, connection_record):
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                # runs before the pool takes the connection back, into its
+                # queue or, when the queue is full, by closing it
+                closed = pool.checkedin() >= pool.size()
+                checked_out.set(pool.checkedout() - 1)
+                overflow.set(pool.overflow() - closed)
+
+    def render(self) -> bytes:
+        """
+        The metrics in the Prometheus text format, merged over processes in
+        multiprocess mode.
+        """
+        if self.multiprocess_mode:
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return prometheus_client.generate_latest(registry)
+        return prometheus_client.generate_latest(self.registry)
+
+    def before_request(self) -> None:
+        _request_stats.set(RequestStats())
+
+    def after_request(self, response):
+        stats = _request_stats.get()
+        if stats is None:
+            return response
+        _request_stats.set(None)
+        elapsed = time.perf_counter() - stats.started
+        # the route, not the URL, so ids in paths don't create new series
+        endpoint = request.endpoint or "unmatched"
+        self.request_seconds.labels(endpoint).observe(elapsed)
+        self.requests.labels(endpoint, str(response.status_code)).inc()
+        self.request_queries.labels(endpoint).observe(len(stats.statements))
+        self.request_db_seconds.labels(endpoint).observe(stats.db_seconds)
+        self.request_slowest_query.labels(endpoint).observe(stats.slowest)
+        if elapsed >= self.slow_request_seconds:
+            self.slow_requests.labels(endpoint).inc()
+            self._log_slow_request(endpoint, elapsed, stats)
+        return response
+
+    def _log_slow_request(
+        self, endpoint: str, elapsed: float, stats: RequestStats
+    ) -> None:
+        top = "; ".join(
+            f"[{fid}] x{count} {seconds * 1000:.1f}ms "
+            f"{_SELECT_LIST.sub('SELECT ... FROM ', text)[:200]}"
+            for fid, text, count, seconds in stats.top_statements(
+                SLOW_REQUEST_TOP_STATEMENTS
+            )
+        )
+        logger.warning(
+            f"Slow request {request.method} {request.path} ({endpoint}): "
+            f"{elapsed * 1000:.1f}ms, {len(stats.statements)} queries, "
+            f"{stats.db_seconds * 1000:.1f}ms in SQL. Top statements: {top or 'none'}"
+        )
+
+
+def init_instrumentation(app: Flask) -> Optional[Instrumentation]:
+    """
+    Instruments the app's engines and requests when METRICS_ENABLED is set.
+    Must run after db.init_app(app).
+
+    Returns:
+        Optional[Instrumentation]: The app's instrumentation, also kept in
+            app.extensions["instrumentation"], or None if disabled.
+    """
+    if not app.config["METRICS_ENABLED"]:
+        return None
+    instrumentation = Instrumentation(app.config["SLOW_REQUEST_SECONDS"])
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            instrumentation.instrument_engine(engine, bind_key or "default")
+    app.before_request(instrumentation.before_request)
+    app.after_request(instrumentation.after_request)
+    app.extensions["instrumentation"] = instrumentation
+    return instrumentation
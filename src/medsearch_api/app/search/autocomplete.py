@@ -0,0 +1,169 @@
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from heapq import nlargest
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from medsearch_api.app.search.names import NameChange, NameDelta, NameRows, normalize
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+RESULT_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    text: str
+    weight: int
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"text": self.text, "weight": self.weight}
+
+
+class PrefixIndex:
+    """
+    Weighted prefix index over names, stored as a sorted array of normalized
+    names with parallel display text and weight arrays. A lookup bisects to the
+    range of names starting with the prefix and returns the heaviest ones.
+
+    A name's weight is the sum of SOURCE_WEIGHTS over the rows it appears in,
+    so names shared by many labels rank first. The index remembers which name
+    each source row contributed, so rows can be changed or removed one at a
+    time with apply() instead of rebuilding the whole index.
+
+    The arrays are never modified once built: a change builds new ones and
+    swaps them in with a single assignment, so lookups on other threads see
+    either the old index or the new one, never a mix.
+    """
+
+    def __init__(self, cache_size: int = RESULT_CACHE_SIZE):
+        self._cache_size = cache_size
+        self._rows = NameRows()
+        self._swap(([], [], array("q")))
+
+    def __len__(self) -> int:
+        return len(self._arrays[0])
+
+    def _swap(self, arrays: Tuple[List[str], List[str], array]) -> None:
+        self._arrays = arrays
+        # short prefixes match large ranges, so recent answers are cached; the
+        # cache is bound to the arrays, so it never serves answers from old ones
+        self._cached_complete = lru_cache(maxsize=self._cache_size)(
+            partial(complete_sorted, *arrays)
+        )
+
+    def apply(self, changes: Iterable[NameChange]) -> int:
+        """
+        Applies row level changes to the index.
+
+        Args:
+            changes (Iterable[NameChange]): (source, row id, name) for each added or
+                changed row, with a None name for deleted rows. Repeating a change
+                that is already applied is a no-op.
+
+        Returns:
+            int: The number of rows whose contribution changed.
+        """
+        delta = self._rows.diff(changes)
+        self.update(delta)
+        return delta.changed_rows
+
+    def update(self, delta: NameDelta) -> None:
+        """
+        Applies name weight changes computed elsewhere, for callers that keep
+        one NameRows for several indexes.
+        """
+        if delta.weights:
+            self._merge(delta.weights, delta.texts)
+
+    def _merge(self, deltas: Dict[str, int], texts: Dict[str, str]) -> None:
+        names, old_texts, old_weights = self._arrays
+        if not names:
+            # initial load
+            ordered = sorted(name for name, delta in deltas.items() if delta > 0)
+            self._swap(
+                (
+                    ordered,
+                    [texts[name] for name in ordered],
+                    array("q", (deltas[name] for name in ordered)),
+                )
+            )
+            return
+
+        # readers may be using the current arrays, so weights change in a copy
+        weights = array("q", old_weights)
+        # (old position, 0 to insert before it / 1 to drop it, name)
+        edits: List[Tuple[int, int, str]] = []
+        for name, delta in deltas.items():
+            i = bisect_left(names, name)
+            if i < len(names) and names[i] == name:
+                weights[i] += delta
+                if weights[i] <= 0:
+                    edits.append((i, 1, name))
+            elif delta > 0:
+                edits.append((i, 0, name))
+        if not edits:
+            self._swap((names, old_texts, weights))
+            return
+
+        # copy the untouched runs between edits with slices, so a refresh costs a
+        # few memcpy passes over the arrays rather than a Python loop per name
+        edits.sort()
+        self._swap(
+            (
+                _splice(names, [], edits, lambda name: name),
+                _splice(old_texts, [], edits, texts.__getitem__),
+                _splice(weights, array("q"), edits, deltas.__getitem__),
+            )
+        )
+
+    def complete(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[Suggestion]:
+        """
+        Returns the heaviest names starting with prefix, ignoring case and
+        repeated whitespace.
+
+        Args:
+            prefix (str): The text typed so far.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            List[Suggestion]: Suggestions, heaviest first, ties in name order.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        return self._cached_complete(prefix, limit)
+
+
+def complete_sorted(
+    names: Sequence[str],
+    texts: Sequence[str],
+    weights: Sequence[int],
+    prefix: str,
+    limit: int,
+) -> List[Suggestion]:
+    """
+    The heaviest of the sorted, normalized names starting with a normalized
+    prefix. names, texts and weights are parallel; any sequences that index and
+    slice like lists will do, e.g. the columns of a search snapshot.
+    """
+    start = bisect_left(names, prefix)
+    # every name starting with prefix sorts before prefix + U+FFFF
+    end = bisect_left(names, prefix + "\uffff", start)
+    # (weight, -position) pairs, so ties go to the name that sorts first
+    best = nlargest(limit, zip(weights[start:end], range(-start, -end, -1)))
+    return [Suggestion(texts[-i], weight) for weight, i in best]
+
+
+def _splice(seq, out, edits: List[Tuple[int, int, str]], value_of: Callable):
+    start = 0
+    for position, drop, name in edits:
+        out += seq[start:position]
+        if drop:
+            start = position + 1
+        else:
+            out.append(value_of(name))
+            start = position
+    out += seq[start:]
+    return out
@@ -0,0 +1,47 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from medsearch_api.app.database.loading import MED_LIST
+from medsearch_api.app.database.models import Med
+from medsearch_api.app.database.upsert import DEFAULT_CHUNK_SIZE, chunks
+
+MAX_CODES = 1000
+
+
+def find_meds_by_codes(
+    session: Session,
+    normalized_codes: Iterable[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, List[Med]]:
+    """
+    Finds the live meds of many normalized product codes at once, with one
+    IN query on the (normalized_code, deleted_at) index per chunk of codes.
+    Meds are loaded with the MED_LIST plan, so their forms, organizations and
+    ingredients cost a fixed number of queries per chunk too.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        normalized_codes (Iterable[str]): Codes as normalize_ndc returns them;
+            repeats are looked up once.
+        chunk_size (int): Codes per IN query.
+
+    Returns:
+        Dict[str, List[Med]]: The meds of each code that has any, in id order.
+    """
+    codes = sorted(set(normalized_codes))
+    by_code: Dict[str, List[Med]] = defaultdict(list)
+    for chunk in chunks(codes, chunk_size):
+        # selected alongside the med since Med.normalized_code is nullable;
+        # the in_() filter only returns rows that have one
+        rows = session.execute(
+            select(Med.normalized_code, Med)
+            .where(Med.normalized_code.in_(chunk), Med.deleted_at.is_(None))
+            .order_by(Med.id)
+            .options(*MED_LIST)
+        )
+        for code, med in rows:
+            by_code[code].append(med)
+    return dict(by_code)
@@ -0,0 +1,96 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, scoped_session
+
+from medsearch_api.app.database.models import SPL, Med
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class EquivalentMed:
+    med_id: int
+    name: Optional[str]
+    generic_name: Optional[str]
+    code: Optional[str]
+    med_form_id: Optional[int]
+    set_id: str
+    title: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def find_equivalents(
+    session: Union[Session, scoped_session],
+    med_id: int,
+    same_form: bool = True,
+    limit: int = DEFAULT_LIMIT,
+) -> Optional[List[EquivalentMed]]:
+    """
+    Finds other live meds with the same active ingredient set as med_id, and
+    with same_form also the same dosage form. One lookup on the
+    (ingredient_fingerprint, med_form_id) index replaces the relational
+    division over med_ingredient_map.
+
+    Args:
+        session (Union[Session, scoped_session]): The SQLAlchemy session.
+        med_id (int): The med to find equivalents of.
+        same_form (bool): Whether equivalents must share the med's form.
+        limit (int): Maximum number of equivalents.
+
+    Returns:
+        Optional[List[EquivalentMed]]: Equivalents ordered by med id, or None if
+            the med does not exist.
+    """
+    med = session.execute(
+        select(Med.ingredient_fingerprint, Med.med_form_id).where(
+            Med.id == med_id, Med.deleted_at.is_(None)
+        )
+    ).one_or_none()
+    if med is None:
+        return None
+    if med.ingredient_fingerprint is None:
+        return []
+
+    conditions = [
+        Med.ingredient_fingerprint == med.ingredient_fingerprint,
+        Med.id != med_id,
+        Med.deleted_at.is_(None),
+    ]
+    if same_form:
+        conditions.append(
+            Med.med_form_id == med.med_form_id
+            if med.med_form_id is not None
+            else Med.med_form_id.is_(None)
+        )
+    stmt = (
+        select(
+            Med.id,
+            Med.name,
+            Med.generic_name,
+            Med.code,
+            Med.med_form_id,
+            SPL.set_id,
+            SPL.title,
+        )
+        .join(SPL, SPL.id == Med.spl_id)
+        .where(*conditions)
+        .order_by(Med.id)
+        .limit(limit)
+    )
+    return [
+        EquivalentMed(
+            med_id=row.id,
+            name=row.name,
+            generic_name=row.generic_name,
+            code=row.code,
+            med_form_id=row.med_form_id,
+            set_id=row.set_id,
+            title=row.title,
+        )
+        for row in session.execute(stmt)
+    ]
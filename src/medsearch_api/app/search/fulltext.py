@@ -0,0 +1,190 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import (
+    ColumnElement,
+    CompoundSelect,
+    Select,
+    and_,
+    case,
+    desc,
+    func,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from medsearch_api.app.database.models import SPL, Ingredient, Med, MedIngredientMap
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# relevance weights per matched field
+MED_NAME_WEIGHT = 2.0
+INGREDIENT_WEIGHT = 1.0
+TITLE_WEIGHT = 0.5
+
+# characters with special meaning in MySQL boolean mode queries
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+
+@dataclass(frozen=True, slots=True)
+class SearchResult:
+    med_id: int
+    name: Optional[str]
+    generic_name: Optional[str]
+    code: Optional[str]
+    set_id: str
+    title: str
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def search_terms(query: str) -> List[str]:
+    return _BOOLEAN_OPERATORS.sub(" ", query).lower().split()
+
+
+def build_boolean_query(terms: List[str]) -> str:
+    """
+    Builds a MySQL boolean mode query that requires every term, matching
+    each one as a prefix so partially typed words still hit.
+    """
+    return " ".join(f"+{term}*" for term in terms)
+
+
+def _score_fulltext(against: str, *columns) -> ColumnElement:
+    return match(*columns, against=against).in_boolean_mode()
+
+
+def _score_like(terms: List[str], *columns) -> ColumnElement:
+    # portable fallback for non-MySQL databases (local development and tests):
+    # scores 1 when every term appears in one of the columns
+    every_term = and_(
+        *(or_(*(column.ilike(f"%{term}%") for column in columns)) for term in terms)
+    )
+    return case((every_term, 1.0), else_=0.0)
+
+
+def _hits_query(dialect_name: str, terms: List[str]) -> CompoundSelect:
+    if dialect_name == "mysql":
+        against = build_boolean_query(terms)
+
+        def score(*columns):
+            return _score_fulltext(against, *columns)
+
+    else:
+
+        def score(*columns):
+            return _score_like(terms, *columns)
+
+    med_score = score(Med.name, Med.generic_name)
+    ingredient_score = score(Ingredient.name)
+    title_score = score(SPL.title)
+
+    med_hits = select(
+        Med.id.label("med_id"), (med_score * MED_NAME_WEIGHT).label("score")
+    ).where(med_score > 0, Med.deleted_at.is_(None))
+    ingredient_hits = (
+        select(
+            MedIngredientMap.med_id.label("med_id"),
+            (ingredient_score * INGREDIENT_WEIGHT).label("score"),
+        )
+        .join(Ingredient, Ingredient.id == MedIngredientMap.ingredient_id)
+        .join(Med, Med.id == MedIngredientMap.med_id)
+        .where(
+            ingredient_score > 0,
+            Ingredient.deleted_at.is_(None),
+            MedIngredientMap.deleted_at.is_(None),
+            Med.deleted_at.is_(None),
+        )
+    )
+    title_hits = (
+        select(Med.id.label("med_id"), (title_score * TITLE_WEIGHT).label("score"))
+        .join(SPL, SPL.id == Med.spl_id)
+        .where(title_score > 0, SPL.deleted_at.is_(None), Med.deleted_at.is_(None))
+    )
+    return union_all(med_hits, ingredient_hits, title_hits)
+
+
+def search_statement(dialect_name: str, query: str, limit: int) -> Optional[Select]:
+    """
+    Builds the search query for search_meds, for callers executing it
+    themselves, e.g. on an async session.
+
+    Args:
+        dialect_name (str): Name of the database dialect, e.g. "mysql".
+        query (str): Free text typed by the user.
+        limit (int): Maximum number of results.
+
+    Returns:
+        Optional[Select]: The statement, or None if query has no search terms.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+
+    hits = _hits_query(dialect_name, terms).subquery()
+    ranked = (
+        select(hits.c.med_id, func.sum(hits.c.score).label("score"))
+        .group_by(hits.c.med_id)
+        .order_by(desc("score"), hits.c.med_id)
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        select(
+            Med.id,
+            Med.name,
+            Med.generic_name,
+            Med.code,
+            SPL.set_id,
+            SPL.title,
+            ranked.c.score,
+        )
+        .join(ranked, ranked.c.med_id == Med.id)
+        .join(SPL, SPL.id == Med.spl_id)
+        .order_by(ranked.c.score.desc(), Med.id)
+    )
+
+
+def to_results(rows: Iterable[Row]) -> List[SearchResult]:
+    return [
+        SearchResult(
+            med_id=row.id,
+            name=row.name,
+            generic_name=row.generic_name,
+            code=row.code,
+            set_id=row.set_id,
+            title=row.title,
+            score=float(row.score),
+        )
+        for row in rows
+    ]
+
+
+def search_meds(
+    session: Session, query: str, limit: int = DEFAULT_LIMIT
+) -> List[SearchResult]:
+    """
+    Relevance-ranked search over med names, generic names, ingredient names and
+    SPL titles, backed by the FULLTEXT indexes on those columns. Soft-deleted
+    rows are excluded.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        query (str): Free text typed by the user.
+        limit (int): Maximum number of results.
+
+    Returns:
+        List[SearchResult]: Matching meds, best match first.
+    """
+    stmt = search_statement(session.get_bind().dialect.name, query, limit)
+    if stmt is None:
+        return []
+    return to_results(session.execute(stmt))
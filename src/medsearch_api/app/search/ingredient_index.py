@@ -0,0 +1,267 @@
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+
+from medsearch_api.app.database.models import Med, MedIngredientMap
+from medsearch_api.app.database.upsert import DEFAULT_CHUNK_SIZE, chunks
+from medsearch_api.app.search.refresh import WATERMARK_LAG, RefreshingIndex
+
+# rebuild a posting list instead of inserting and removing ids one at a time
+# once the changes reach this share of its length
+REBUILD_RATIO = 1 / 16
+# intersect by probing the larger list with bisect when it is this many times
+# longer than the running result, rather than reading all of it
+PROBE_RATIO = 32
+
+
+class IngredientQueryException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+def _contains(postings: Sequence[int], med_id: int) -> bool:
+    i = bisect_left(postings, med_id)
+    return i < len(postings) and postings[i] == med_id
+
+
+class IngredientPostings:
+    """
+    Posting lists from ingredient id to the sorted ids of the meds containing it,
+    for "contains all/any/none of these ingredients" queries without self-joins
+    on med_ingredient_map.
+
+    Each list is an array of unsigned ints, 4 bytes per map row. The index also
+    keeps each med's ingredient ids, so a med can be replaced or removed without
+    scanning every list.
+    """
+
+    def __init__(self):
+        self._postings: Dict[int, array] = {}
+        self._meds: Dict[int, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._meds)
+
+    def postings(self, ingredient_id: int) -> Sequence[int]:
+        return self._postings.get(ingredient_id, array("I"))
+
+    def replace(self, meds: Mapping[int, Iterable[int]]) -> int:
+        """
+        Replaces the ingredient sets of the given meds.
+
+        Args:
+            meds (Mapping[int, Iterable[int]]): Ingredient ids per med id; an empty
+                set removes the med.
+
+        Returns:
+            int: The number of meds whose ingredient set changed.
+        """
+        added: Dict[int, Set[int]] = {}
+        removed: Dict[int, Set[int]] = {}
+        changed = 0
+        for med_id, ingredient_ids in meds.items():
+            new = tuple(sorted(set(ingredient_ids)))
+            old = self._meds.get(med_id, ())
+            if new == old:
+                continue
+            changed += 1
+            for ingredient_id in set(old).difference(new):
+                removed.setdefault(ingredient_id, set()).add(med_id)
+            for ingredient_id in set(new).difference(old):
+                added.setdefault(ingredient_id, set()).add(med_id)
+            if new:
+                self._meds[med_id] = new
+            else:
+                del self._meds[med_id]
+
+        for ingredient_id in added.keys() | removed.keys():
+            self._update_postings(
+                ingredient_id,
+                added.get(ingredient_id, set()),
+                removed.get(ingredient_id, set()),
+            )
+        return changed
+
+    def _update_postings(
+        self, ingredient_id: int, added: Set[int], removed: Set[int]
+    ) -> None:
+        postings = self._postings.get(ingredient_id)
+        edits = len(added) + len(removed)
+        if postings is None or edits > REBUILD_RATIO * len(postings):
+            kept = set(postings or ()).difference(removed)
+            postings = array("I", sorted(kept.union(added)))
+        else:
+            # edits to a live list are visible to concurrent queries; each one
+            # leaves the list sorted
+            for med_id in removed:
+                del postings[bisect_left(postings, med_id)]
+            for med_id in added:
+                insort(postings, med_id)
+        if postings:
+            self._postings[ingredient_id] = postings
+        else:
+            self._postings.pop(ingredient_id, None)
+
+    def query(
+        self,
+        all_of: Sequence[int] = (),
+        any_of: Sequence[int] = (),
+        none_of: Sequence[int] = (),
+    ) -> List[int]:
+        """
+        Finds the meds containing every ingredient in all_of, at least one in
+        any_of and none in none_of.
+
+        Args:
+            all_of (Sequence[int]): Ingredient ids that must all be present.
+            any_of (Sequence[int]): Ingredient ids of which one must be present.
+            none_of (Sequence[int]): Ingredient ids that must all be absent.
+
+        Returns:
+            List[int]: Matching med ids, ascending.
+
+        Raises:
+            IngredientQueryException: If neither all_of nor any_of is given.
+        """
+        return query_postings(self.postings, all_of, any_of, none_of)
+
+
+def query_postings(
+    postings_of: Callable[[int], Sequence[int]],
+    all_of: Sequence[int] = (),
+    any_of: Sequence[int] = (),
+    none_of: Sequence[int] = (),
+) -> List[int]:
+    """
+    IngredientPostings.query over any source of posting lists, e.g. a search
+    snapshot's; postings_of returns the sorted med ids of an ingredient.
+    """
+    if not all_of and not any_of:
+        raise IngredientQueryException(
+            "At least one ingredient to include is required."
+        )
+
+    # OR of any_of behaves like one more list to intersect
+    lists = [postings_of(i) for i in all_of]
+    if any_of:
+        union: Set[int] = set()
+        for ingredient_id in any_of:
+            union.update(postings_of(ingredient_id))
+        lists.append(array("I", sorted(union)))
+    lists.sort(key=len)
+
+    # intersect smallest first, so the running result only shrinks
+    result = set(lists[0])
+    for postings in lists[1:]:
+        if not result:
+            break
+        if len(postings) > PROBE_RATIO * len(result):
+            result = {med_id for med_id in result if _contains(postings, med_id)}
+        else:
+            result.intersection_update(postings)
+
+    for ingredient_id in none_of:
+        if not result:
+            break
+        postings = postings_of(ingredient_id)
+        if len(postings) > PROBE_RATIO * len(result):
+            result = {med_id for med_id in result if not _contains(postings, med_id)}
+        else:
+            result.difference_update(postings)
+    return sorted(result)
+
+
+def load_med_ingredients(
+    conn: Connection,
+    since: Optional[datetime] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[Dict[int, Set[int]], Optional[datetime]]:
+    """
+    Reads the live ingredient ids of meds updated at or after
+    since - WATERMARK_LAG, or of all live meds when since is None. The writer
+    rewrites a med's map rows whenever it upserts the med, so meds.updated_at
+    also marks map changes. Soft-deleted meds come back with an empty set.
+
+    Args:
+        conn (Connection): The SQLAlchemy connection.
+        since (Optional[datetime]): Watermark from the previous load.
+        chunk_size (int): Maximum med ids per IN list.
+
+    Returns:
+        Tuple[Dict[int, Set[int]], Optional[datetime]]: Ingredient ids per med id,
+            and the new watermark.
+    """
+    live_maps = MedIngredientMap.deleted_at.is_(None)
+    meds: Dict[int, Set[int]] = {}
+    if since is None:
+        stmt = (
+            select(MedIngredientMap.med_id, MedIngredientMap.ingredient_id)
+            .join(Med, Med.id == MedIngredientMap.med_id)
+            .where(live_maps, Med.deleted_at.is_(None))
+        )
+        for med_id, ingredient_id in conn.execute(stmt):
+            meds.setdefault(med_id, set()).add(ingredient_id)
+        watermark = conn.execute(
+            select(Med.updated_at).order_by(Med.updated_at.desc()).limit(1)
+        ).scalar()
+        return meds, watermark
+
+    # from before since: see load_name_changes
+    changed = conn.execute(
+        select(Med.id, Med.deleted_at, Med.updated_at).where(
+            Med.updated_at >= since - WATERMARK_LAG
+        )
+    ).all()
+    # rows re-read from the lag window never move the watermark back
+    watermark = max([since, *(row.updated_at for row in changed)])
+    live_ids = []
+    for row in changed:
+        meds[row.id] = set()
+        if row.deleted_at is None:
+            live_ids.append(row.id)
+    for id_chunk in chunks(live_ids, chunk_size):
+        stmt = select(MedIngredientMap.med_id, MedIngredientMap.ingredient_id).where(
+            MedIngredientMap.med_id.in_(id_chunk), live_maps
+        )
+        for med_id, ingredient_id in conn.execute(stmt):
+            meds[med_id].add(ingredient_id)
+    return meds, watermark
+
+
+class IngredientIndex(RefreshingIndex):
+    """
+    IngredientPostings kept in sync with med_ingredient_map.
+    """
+
+    def __init__(self, engine: Engine, refresh_seconds: float = 60.0):
+        super().__init__(engine, refresh_seconds)
+        self.postings = IngredientPostings()
+
+    def load_changes(
+        self, conn: Connection, since: Optional[datetime]
+    ) -> Tuple[int, Optional[datetime]]:
+        meds, watermark = load_med_ingredients(conn, since)
+        return self.postings.replace(meds), watermark
+
+    def query(
+        self,
+        all_of: Sequence[int] = (),
+        any_of: Sequence[int] = (),
+        none_of: Sequence[int] = (),
+    ) -> List[int]:
+        self.ensure_fresh()
+        return self.postings.query(all_of, any_of, none_of)
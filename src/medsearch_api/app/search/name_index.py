@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.engine import Connection, Engine
+
+from medsearch_api.app.search import autocomplete, trigram
+from medsearch_api.app.search.autocomplete import PrefixIndex, Suggestion
+from medsearch_api.app.search.names import NameRows, load_name_changes
+from medsearch_api.app.search.refresh import RefreshingIndex
+from medsearch_api.app.search.trigram import FuzzyMatch, TrigramIndex
+
+
+class NameIndex(RefreshingIndex):
+    """
+    In-process indexes over med, generic and ingredient names, kept in sync
+    with the database: a PrefixIndex for autocomplete and a TrigramIndex for
+    typo-tolerant lookups, both fed from one set of row changes.
+    """
+
+    def __init__(self, engine: Engine, refresh_seconds: float = 60.0):
+        super().__init__(engine, refresh_seconds)
+        self.rows = NameRows()
+        self.prefixes = PrefixIndex()
+        self.trigrams = TrigramIndex()
+
+    def load_changes(
+        self, conn: Connection, since: Optional[datetime]
+    ) -> Tuple[int, Optional[datetime]]:
+        changes, watermark = load_name_changes(conn, since)
+        delta = self.rows.diff(changes)
+        self.prefixes.update(delta)
+        self.trigrams.update(delta)
+        return delta.changed_rows, watermark
+
+    def complete(
+        self, prefix: str, limit: int = autocomplete.DEFAULT_LIMIT
+    ) -> List[Suggestion]:
+        self.ensure_fresh()
+        return self.prefixes.complete(prefix, limit)
+
+    def fuzzy(self, query: str, limit: int = trigram.DEFAULT_LIMIT) -> List[FuzzyMatch]:
+        self.ensure_fresh()
+        return self.trigrams.search(query, limit)
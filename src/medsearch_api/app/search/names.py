@@ -0,0 +1,140 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from medsearch_api.app.database.models import Ingredient, Med
+from medsearch_api.app.search.refresh import WATERMARK_LAG
+
+# ranking weight contributed by each row a name appears in, per source column
+MED_NAME = "med_name"
+GENERIC_NAME = "generic_name"
+INGREDIENT_NAME = "ingredient_name"
+SOURCE_WEIGHTS = {MED_NAME: 3, GENERIC_NAME: 2, INGREDIENT_NAME: 1}
+
+# (source, row id, name); a None name removes the row's contribution
+NameChange = Tuple[str, int, Optional[str]]
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+@dataclass(slots=True)
+class NameDelta:
+    """
+    Weight changes per normalized name from one batch of row changes, with the
+    display text of names that gained weight.
+    """
+
+    changed_rows: int = 0
+    weights: Dict[str, int] = field(default_factory=dict)
+    texts: Dict[str, str] = field(default_factory=dict)
+
+
+class NameRows:
+    """
+    Remembers which normalized name each source row contributes, so row changes
+    can be turned into per-name weight changes without rereading other rows.
+    """
+
+    def __init__(self):
+        # source -> row id -> normalized name the row contributes
+        self._rows: Dict[str, Dict[int, str]] = {
+            source: {} for source in SOURCE_WEIGHTS
+        }
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._rows.values())
+
+    def diff(self, changes: Iterable[NameChange]) -> NameDelta:
+        """
+        Records row changes and returns the name weight changes they cause.
+
+        Args:
+            changes (Iterable[NameChange]): (source, row id, name) for each added or
+                changed row, with a None name for deleted rows. Repeating a change
+                that is already recorded is a no-op.
+
+        Returns:
+            NameDelta: The weight changes, without names whose weight is unchanged.
+        """
+        delta = NameDelta()
+        weights, texts = delta.weights, delta.texts
+        for source, row_id, text in changes:
+            rows = self._rows[source]
+            weight = SOURCE_WEIGHTS[source]
+            previous = rows.get(row_id)
+            if not text:
+                if previous is not None:
+                    delta.changed_rows += 1
+                    weights[previous] = weights.get(previous, 0) - weight
+                    del rows[row_id]
+                continue
+            name = normalize(text)
+            if previous == name:
+                continue
+            delta.changed_rows += 1
+            if previous is not None:
+                weights[previous] = weights.get(previous, 0) - weight
+            rows[row_id] = name
+            weights[name] = weights.get(name, 0) + weight
+            texts.setdefault(name, text.strip())
+
+        # e.g. a row moving between two spellings of the same name
+        for name in [name for name, weight in weights.items() if weight == 0]:
+            del weights[name]
+        return delta
+
+
+def load_name_changes(
+    conn: Connection, since: Optional[datetime] = None
+) -> Tuple[List[NameChange], Optional[datetime]]:
+    """
+    Reads med and ingredient names changed at or after since - WATERMARK_LAG,
+    or all of them when since is None. Soft-deleted rows come back with a None
+    name so they are removed from the index.
+
+    Args:
+        conn (Connection): The SQLAlchemy connection.
+        since (Optional[datetime]): updated_at watermark from the previous load.
+
+    Returns:
+        Tuple[List[NameChange], Optional[datetime]]: The changes and the new watermark.
+    """
+    changes: List[NameChange] = []
+    watermark = since
+
+    med_stmt = select(
+        Med.id, Med.name, Med.generic_name, Med.deleted_at, Med.updated_at
+    )
+    ingredient_stmt = select(
+        Ingredient.id, Ingredient.name, Ingredient.deleted_at, Ingredient.updated_at
+    )
+    if since is not None:
+        # rows stamped before the last load may have committed after it
+        lagged = since - WATERMARK_LAG
+        med_stmt = med_stmt.where(Med.updated_at >= lagged)
+        ingredient_stmt = ingredient_stmt.where(Ingredient.updated_at >= lagged)
+    else:
+        med_stmt = med_stmt.where(Med.deleted_at.is_(None))
+        ingredient_stmt = ingredient_stmt.where(Ingredient.deleted_at.is_(None))
+
+    for med in conn.execute(med_stmt):
+        live = med.deleted_at is None
+        changes.append((MED_NAME, med.id, med.name if live else None))
+        changes.append((GENERIC_NAME, med.id, med.generic_name if live else None))
+        if med.updated_at and (watermark is None or med.updated_at > watermark):
+            watermark = med.updated_at
+    for ingredient in conn.execute(ingredient_stmt):
+        live = ingredient.deleted_at is None
+        changes.append(
+            (INGREDIENT_NAME, ingredient.id, ingredient.name if live else None)
+        )
+        if ingredient.updated_at and (
+            watermark is None or ingredient.updated_at > watermark
+        ):
+            watermark = ingredient.updated_at
+    return changes, watermark
@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# how far back of the watermark each refresh re-reads. A row's updated_at is
+# stamped when it is written but it only becomes visible when its transaction
+# commits, possibly after rows with later timestamps were loaded; a lag longer
+# than any write transaction (plus clock skew between writers) catches it.
+# Re-reading a row that is already applied is a no-op.
+WATERMARK_LAG = timedelta(minutes=5)
+
+
+class RefreshingIndex(ABC):
+    """
+    Base class for in-process indexes kept in sync with the database by
+    polling. The first refresh loads everything; later ones pass the updated_at
+    watermark of the previous one so subclasses only read what changed, from
+    WATERMARK_LAG before it.
+    """
+
+    def __init__(self, engine: Engine, refresh_seconds: float = 60.0):
+        self.engine = engine
+        self.refresh_seconds = refresh_seconds
+        self.watermark: Optional[datetime] = None
+        self.refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def load_changes(
+        self, conn: Connection, since: Optional[datetime]
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        Reads and applies rows changed at or after since - WATERMARK_LAG, or
+        everything when since is None.
+
+        Args:
+            conn (Connection): The SQLAlchemy connection.
+            since (Optional[datetime]): Watermark returned by the previous call.
+
+        Returns:
+            Tuple[int, Optional[datetime]]: The number of changed entries and the
+                new watermark.
+        """
+
+    def refresh(self) -> int:
+        """
+        Applies changes since the last refresh.
+
+        Returns:
+            int: The number of changed entries.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        started = time.monotonic()
+        with self.engine.connect() as conn:
+            changed, watermark = self.load_changes(conn, self.watermark)
+        self.watermark = watermark
+        self.refreshed_at = time.monotonic()
+        logger.debug(
+            f"{type(self).__name__} refresh applied {changed} changes "
+            f"in {self.refreshed_at - started:.3f}s"
+        )
+        return changed
+
+    @property
+    def stale(self) -> bool:
+        """
+        Whether the next ensure_fresh() call will read from the database.
+        """
+        return (
+            self.refreshed_at is None
+            or time.monotonic() - self.refreshed_at >= self.refresh_seconds
+        )
+
+    def ensure_fresh(self) -> None:
+        """
+        Loads the index on first use, then refreshes it once refresh_seconds have
+        passed. Only one thread refreshes; the others keep answering from the
+        current index meanwhile.
+        """
+        if self.refreshed_at is None:
+            self.refresh()
+        elif time.monotonic() - self.refreshed_at >= self.refresh_seconds:
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._refresh()
+                finally:
+                    self._lock.release()
@@ -0,0 +1,554 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from medsearch_api.app.database.models import (
+    Ingredient,
+    Med,
+    MedForm,
+    MedOrganizationMap,
+    Organization,
+)
+from medsearch_api.app.search import autocomplete, trigram
+from medsearch_api.app.search.autocomplete import Suggestion, complete_sorted
+from medsearch_api.app.search.ingredient_index import (
+    load_med_ingredients,
+    query_postings,
+)
+from medsearch_api.app.search.names import NameRows, load_name_changes, normalize
+from medsearch_api.app.search.trigram import FuzzyMatch, search_postings, trigrams
+
+logger = logging.getLogger(__name__)
+
+# Layout: a header, a directory of sections, then the sections, each 8 byte
+# aligned. A section is one array-backed column (ids, weights, offsets) or the
+# UTF-8 bytes of a string table, whose strings are found through an offsets
+# column. Columns are in native byte order, so a snapshot is read on the same
+# kind of host that built it.
+MAGIC = b"MEDSNAP\x00"
+# bump when the layout or the meaning of a section changes
+FORMAT_VERSION = 1
+# magic, format version, section count, built at and watermark in microseconds
+_HEADER = struct.Struct("<8sIIqq")
+# section name, array typecode, offset and length in bytes
+_SECTION = struct.Struct("<32scQQ")
+_ALIGNMENT = 8
+_EPOCH = datetime(1970, 1, 1)
+_NO_WATERMARK = -1
+
+DEFAULT_CHECK_SECONDS = 30.0
+
+
+class SnapshotException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+def _microseconds(value: Optional[datetime]) -> int:
+    if value is None:
+        return _NO_WATERMARK
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(microseconds: int) -> Optional[datetime]:
+    if microseconds == _NO_WATERMARK:
+        return None
+    return _EPOCH + timedelta(microseconds=microseconds)
+
+
+class StringTable(Sequence[str]):
+    """
+    Strings stored back to back as UTF-8, with an offsets column of one more
+    entry than there are strings. Strings are decoded on access only.
+    """
+
+    def __init__(self, offsets: Sequence[int], data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self._data[self._offsets[i] : self._offsets[i + 1]], "utf-8")
+
+
+class _Lists:
+    """
+    Variable length lists of ids stored in compressed sparse row form: list i
+    is ids[offsets[i]:offsets[i + 1]], a zero-copy slice of the snapshot.
+    """
+
+    def __init__(self, offsets: Sequence[int], ids: memoryview):
+        self._offsets = offsets
+        self._ids = ids
+
+    def __getitem__(self, i: int) -> Sequence[int]:
+        return self._ids[self._offsets[i] : self._offsets[i + 1]]
+
+
+class _TrigramLookup(Mapping[str, Sequence[int]]):
+    # trigram -> ascending name ids, by bisecting the sorted trigram table
+
+    def __init__(self, grams: StringTable, names: _Lists):
+        self._grams = grams
+        self._names = names
+
+    def __getitem__(self, gram: str) -> Sequence[int]:
+        i = bisect_left(self._grams, gram)
+        if i == len(self._grams) or self._grams[i] != gram:
+            raise KeyError(gram)
+        return self._names[i]
+
+    def __iter__(self):
+        return iter(self._grams)
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+
+class _SnapshotTrigrams:
+    # the snapshot's columns in the shape trigram.search_postings reads
+    __slots__ = ("names", "texts", "weights", "postings")
+
+    def __init__(self, names, texts, weights, postings):
+        self.names = names
+        self.texts = texts
+        self.weights = weights
+        self.postings = postings
+
+
+class _SectionWriter:
+    def __init__(self):
+        self.sections: List[Tuple[str, str, bytes]] = []
+
+    def column(self, name: str, typecode: str, values: Iterable[int]) -> None:
+        self.sections.append((name, typecode, array(typecode, values).tobytes()))
+
+    def strings(self, name: str, values: Iterable[Optional[str]]) -> None:
+        offsets = array("I", [0])
+        data = bytearray()
+        for value in values:
+            data += (value or "").encode()
+            offsets.append(len(data))
+        self.sections.append((f"{name}.offsets", "I", offsets.tobytes()))
+        self.sections.append((f"{name}.data", "B", bytes(data)))
+
+    def lists(self, name: str, lists: Iterable[Iterable[int]]) -> None:
+        offsets = array("I", [0])
+        ids = array("I")
+        for values in lists:
+            ids.extend(values)
+            offsets.append(len(ids))
+        self.sections.append((f"{name}.offsets", "I", offsets.tobytes()))
+        self.sections.append((f"{name}.ids", "I", ids.tobytes()))
+
+    def write(self, path: str, built_at: int, watermark: int) -> int:
+        """
+        Writes the snapshot next to path and renames it into place, so readers
+        only ever see a complete file.
+
+        Returns:
+            int: The size of the snapshot in bytes.
+        """
+        position = _HEADER.size + _SECTION.size * len(self.sections)
+        directory = []
+        for name, typecode, data in self.sections:
+            position += -position % _ALIGNMENT
+            directory.append(
+                _SECTION.pack(name.encode(), typecode.encode(), position, len(data))
+            )
+            position += len(data)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(
+                    _HEADER.pack(
+                        MAGIC, FORMAT_VERSION, len(self.sections), built_at, watermark
+                    )
+                )
+                f.writelines(directory)
+                for _, _, data in self.sections:
+                    f.write(b"\x00" * (-f.tell() % _ALIGNMENT))
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return position
+
+
+def _by_id(rows) -> Tuple[List[int], Dict[str, List[Any]]]:
+    ids: List[int] = []
+    columns: Dict[str, List[Any]] = {}
+    for row in rows:
+        ids.append(row.id)
+        for key, value in row._mapping.items():
+            if key != "id":
+                columns.setdefault(key, []).append(value)
+    return ids, columns
+
+
+def build_snapshot(conn: Connection, path: str) -> int:
+    """
+    Writes the search projection of the catalog to a snapshot file: live meds
+    with their names, form, organizations and ingredients, the forms,
+    organizations and ingredients themselves, the autocomplete and trigram
+    indexes over their names and the ingredient posting lists.
+
+    Run it in one transaction, so every table is read at the same point in
+    time on MySQL.
+
+    Args:
+        conn (Connection): The SQLAlchemy connection.
+        path (str): Where to write the snapshot; an existing one is replaced
+            atomically.
+
+    Returns:
+        int: The size of the snapshot in bytes.
+    """
+    writer = _SectionWriter()
+
+    changes, watermark = load_name_changes(conn)
+    delta = NameRows().diff(changes)
+    names = sorted(name for name, weight in delta.weights.items() if weight > 0)
+    writer.strings("names", names)
+    writer.strings("names.text", (delta.texts[name] for name in names))
+    writer.column("names.weight", "q", (delta.weights[name] for name in names))
+    # names are numbered in sorted order, so each posting list is ascending
+    grams: Dict[str, List[int]] = {}
+    for name_id, name in enumerate(names):
+        for gram in trigrams(name):
+            grams.setdefault(gram, []).append(name_id)
+    writer.strings("grams", sorted(grams))
+    writer.lists("grams.names", (grams[gram] for gram in sorted(grams)))
+    del changes, delta, names, grams
+
+    med_ingredients, ingredients_watermark = load_med_ingredients(conn)
+    if ingredients_watermark and (
+        watermark is None or ingredients_watermark > watermark
+    ):
+        watermark = ingredients_watermark
+
+    med_ids, meds = _by_id(
+        conn.execute(
+            select(Med.id, Med.name, Med.generic_name, Med.code, Med.med_form_id)
+            .where(Med.deleted_at.is_(None))
+            .order_by(Med.id)
+        )
+    )
+    med_organizations: Dict[int, List[int]] = {}
+    for med_id, org_id in conn.execute(
+        select(MedOrganizationMap.med_id, MedOrganizationMap.org_id)
+        .join(Med, Med.id == MedOrganizationMap.med_id)
+        .where(Med.deleted_at.is_(None))
+        .order_by(MedOrganizationMap.med_id, MedOrganizationMap.org_id)
+    ):
+        med_organizations.setdefault(med_id, []).append(org_id)
+    writer.column("meds.id", "I", med_ids)
+    writer.strings("meds.name", meds.get("name", ()))
+    writer.strings("meds.generic_name", meds.get("generic_name", ()))
+    writer.strings("meds.code", meds.get("code", ()))
+    writer.column("meds.form_id", "I", (i or 0 for i in meds.get("med_form_id", ())))
+    writer.lists(
+        "meds.ingredients", (sorted(med_ingredients.get(i, ())) for i in med_ids)
+    )
+    writer.lists("meds.organizations", (med_organizations.get(i, ()) for i in med_ids))
+    del meds, med_organizations
+
+    form_ids, forms = _by_id(
+        conn.execute(
+            select(MedForm.id, MedForm.code, MedForm.name)
+            .where(MedForm.deleted_at.is_(None))
+            .order_by(MedForm.id)
+        )
+    )
+    writer.column("forms.id", "I", form_ids)
+    writer.strings("forms.code", forms.get("code", ()))
+    writer.strings("forms.name", forms.get("name", ()))
+
+    org_ids, organizations = _by_id(
+        conn.execute(
+            select(Organization.id, Organization.name)
+            .where(Organization.deleted_at.is_(None))
+            .order_by(Organization.id)
+        )
+    )
+    writer.column("organizations.id", "I", org_ids)
+    writer.strings("organizations.name", organizations.get("name", ()))
+
+    ingredient_ids, ingredients = _by_id(
+        conn.execute(
+            select(Ingredient.id, Ingredient.name, Ingredient.code)
+            .where(Ingredient.deleted_at.is_(None))
+            .order_by(Ingredient.id)
+        )
+    )
+    ingredient_meds: Dict[int, List[int]] = {}
+    for med_id in sorted(med_ingredients):
+        for ingredient_id in med_ingredients[med_id]:
+            ingredient_meds.setdefault(ingredient_id, []).append(med_id)
+    writer.column("ingredients.id", "I", ingredient_ids)
+    writer.strings("ingredients.name", ingredients.get("name", ()))
+    writer.strings("ingredients.code", ingredients.get("code", ()))
+    writer.lists(
+        "ingredients.meds", (ingredient_meds.get(i, ()) for i in ingredient_ids)
+    )
+
+    size = writer.write(path, time.time_ns() // 1000, _microseconds(watermark))
+    logger.info(
+        f"Wrote search snapshot {path}: {len(med_ids)} meds, "
+        f"{len(ingredient_ids)} ingredients, {size} bytes"
+    )
+    return size
+
+
+class Snapshot:
+    """
+    A read-only, memory-mapped search snapshot. Lookups read the mapped columns
+    directly: nothing is loaded into Python objects up front, so opening one
+    takes milliseconds, and every process mapping the same file shares its
+    pages through the OS page cache.
+
+    Answers autocomplete, fuzzy and ingredient queries the way NameIndex and
+    IngredientIndex do, and describes meds without a database round trip.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.file_id = (stat.st_dev, stat.st_ino)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        if len(buffer) < _HEADER.size:
+            raise SnapshotException(f"{path} is not a search snapshot.")
+        magic, version, count, built_at, watermark = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise SnapshotException(f"{path} is not a search snapshot.")
+        if version != FORMAT_VERSION:
+            raise SnapshotException(
+                f"{path} has snapshot format {version}; this version reads "
+                f"format {FORMAT_VERSION}."
+            )
+        # the build time is always written; only the watermark may be missing
+        self.built_at: datetime = _EPOCH + timedelta(microseconds=built_at)
+        self.watermark = _datetime(watermark)
+
+        self._sections: Dict[str, memoryview] = {}
+        for i in range(count):
+            name, typecode, offset, length = _SECTION.unpack_from(
+                buffer, _HEADER.size + i * _SECTION.size
+            )
+            self._sections[name.rstrip(b"\x00").decode()] = buffer[
+                offset : offset + length
+            ].cast(typecode.decode())
+
+        self.names = self._strings("names")
+        self.name_texts = self._strings("names.text")
+        self.name_weights = self._sections["names.weight"]
+        self._trigrams = _SnapshotTrigrams(
+            self.names,
+            self.name_texts,
+            self.name_weights,
+            _TrigramLookup(self._strings("grams"), self._lists("grams.names")),
+        )
+        self.med_ids = self._sections["meds.id"]
+        self._med_names = self._strings("meds.name")
+        self._med_generic_names = self._strings("meds.generic_name")
+        self._med_codes = self._strings("meds.code")
+        self._med_form_ids = self._sections["meds.form_id"]
+        self._med_ingredients = self._lists("meds.ingredients")
+        self._med_organizations = self._lists("meds.organizations")
+        self._form_ids = self._sections["forms.id"]
+        self._form_codes = self._strings("forms.code")
+        self._form_names = self._strings("forms.name")
+        self._org_ids = self._sections["organizations.id"]
+        self._org_names = self._strings("organizations.name")
+        self.ingredient_ids = self._sections["ingredients.id"]
+        self._ingredient_names = self._strings("ingredients.name")
+        self._ingredient_codes = self._strings("ingredients.code")
+        self._ingredient_meds = self._lists("ingredients.meds")
+        # the snapshot never changes, so answers can be cached for its lifetime
+        self._cached_complete = lru_cache(maxsize=autocomplete.RESULT_CACHE_SIZE)(
+            self._complete
+        )
+
+    def _strings(self, name: str) -> StringTable:
+        return StringTable(
+            self._sections[f"{name}.offsets"], self._sections[f"{name}.data"]
+        )
+
+    def _lists(self, name: str) -> _Lists:
+        return _Lists(self._sections[f"{name}.offsets"], self._sections[f"{name}.ids"])
+
+    def __len__(self) -> int:
+        return len(self.med_ids)
+
+    def complete(
+        self, prefix: str, limit: int = autocomplete.DEFAULT_LIMIT
+    ) -> List[Suggestion]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        return self._cached_complete(prefix, limit)
+
+    def _complete(self, prefix: str, limit: int) -> List[Suggestion]:
+        return complete_sorted(
+            self.names, self.name_texts, self.name_weights, prefix, limit
+        )
+
+    def fuzzy(self, query: str, limit: int = trigram.DEFAULT_LIMIT) -> List[FuzzyMatch]:
+        return search_postings(self._trigrams, query, limit)
+
+    def postings(self, ingredient_id: int) -> Sequence[int]:
+        i = _find(self.ingredient_ids, ingredient_id)
+        return () if i is None else self._ingredient_meds[i]
+
+    def query(
+        self,
+        all_of: Sequence[int] = (),
+        any_of: Sequence[int] = (),
+        none_of: Sequence[int] = (),
+    ) -> List[int]:
+        return query_postings(self.postings, all_of, any_of, none_of)
+
+    def med(self, med_id: int) -> Optional[Dict[str, Any]]:
+        """
+        A live med with its form, organizations and ingredients, shaped like
+        api.meds.med_to_dict without the label fields, or None.
+        """
+        i = _find(self.med_ids, med_id)
+        if i is None:
+            return None
+        form = _find(self._form_ids, self._med_form_ids[i])
+        organizations = [_find(self._org_ids, o) for o in self._med_organizations[i]]
+        ingredients = [_find(self.ingredient_ids, g) for g in self._med_ingredients[i]]
+        return {
+            "id": med_id,
+            "name": self._med_names[i] or None,
+            "generic_name": self._med_generic_names[i] or None,
+            "code": self._med_codes[i] or None,
+            "form": (
+                None
+                if form is None
+                else {
+                    "id": self._form_ids[form],
+                    "code": self._form_codes[form] or None,
+                    "name": self._form_names[form] or None,
+                }
+            ),
+            "organizations": [
+                {"id": self._org_ids[o], "name": self._org_names[o] or None}
+                for o in organizations
+                if o is not None
+            ],
+            "ingredients": [
+                {
+                    "id": self.ingredient_ids[g],
+                    "name": self._ingredient_names[g] or None,
+                    "code": self._ingredient_codes[g] or None,
+                }
+                for g in ingredients
+                if g is not None
+            ],
+        }
+
+
+def _find(ids: Sequence[int], id_: int) -> Optional[int]:
+    i = bisect_left(ids, id_)
+    return i if i < len(ids) and ids[i] == id_ else None
+
+
+class SnapshotIndex:
+    """
+    Serves lookups from the snapshot at path and picks up a new one once it is
+    renamed into place: every check_seconds the path is stat()ed, and a file
+    that was built later than the current snapshot replaces it. Lookups already
+    running finish on the snapshot they started with, whose mapping stays
+    valid until the last reference to it is gone.
+
+    Has the lookup methods of NameIndex and IngredientIndex, so the API can use
+    it in place of either.
+    """
+
+    def __init__(self, path: str, check_seconds: float = DEFAULT_CHECK_SECONDS):
+        self.path = path
+        self.check_seconds = check_seconds
+        self.snapshot = Snapshot(path)
+        self.checked_at = time.monotonic()
+        self._lock = threading.Lock()
+        logger.info(f"Serving search snapshot {path} built at {self.snapshot.built_at}")
+
+    def reload(self) -> bool:
+        """
+        Opens the file at path if it is a newer snapshot than the current one.
+
+        Returns:
+            bool: Whether the snapshot was replaced.
+        """
+        self.checked_at = time.monotonic()
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            logger.warning(f"Keeping the current search snapshot: {e}")
+            return False
+        if (stat.st_dev, stat.st_ino) == self.snapshot.file_id:
+            return False
+        try:
+            snapshot = Snapshot(self.path)
+        except (OSError, SnapshotException, ValueError) as e:
+            logger.warning(f"Keeping the current search snapshot: {e}")
+            return False
+        if snapshot.built_at <= self.snapshot.built_at:
+            return False
+        self.snapshot = snapshot
+        logger.info(f"Swapped in search snapshot built at {snapshot.built_at}")
+        return True
+
+    @property
+    def current(self) -> Snapshot:
+        if time.monotonic() - self.checked_at >= self.check_seconds:
+            if self._lock.acquire(blocking=False):
+                try:
+                    self.reload()
+                finally:
+                    self._lock.release()
+        return self.snapshot
+
+    def complete(
+        self, prefix: str, limit: int = autocomplete.DEFAULT_LIMIT
+    ) -> List[Suggestion]:
+        return self.current.complete(prefix, limit)
+
+    def fuzzy(self, query: str, limit: int = trigram.DEFAULT_LIMIT) -> List[FuzzyMatch]:
+        return self.current.fuzzy(query, limit)
+
+    def query(
+        self,
+        all_of: Sequence[int] = (),
+        any_of: Sequence[int] = (),
+        none_of: Sequence[int] = (),
+    ) -> List[int]:
+        return self.current.query(all_of, any_of, none_of)
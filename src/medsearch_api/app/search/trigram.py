@@ -0,0 +1,248 @@
+import re
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from heapq import nlargest
+from math import ceil
+from operator import itemgetter
+from typing import (
+    Dict,
+    FrozenSet,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from medsearch_api.app.search.names import NameDelta, normalize
+
+DEFAULT_LIMIT = 5
+# minimum Jaccard similarity of trigram sets for a name to be a candidate
+DEFAULT_THRESHOLD = 0.3
+# names with the most trigrams in common with the query that are scored
+CANDIDATES = 200
+# candidates re-ranked by edit distance, most similar first
+RERANK_CANDIDATES = 20
+# compact postings once this share of the indexed names has been removed
+COMPACT_RATIO = 0.25
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True, slots=True)
+class FuzzyMatch:
+    text: str
+    weight: int
+    distance: int
+    similarity: float
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "text": self.text,
+            "weight": self.weight,
+            "distance": self.distance,
+            "similarity": round(self.similarity, 3),
+        }
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """
+    Trigrams of each word padded with two leading spaces and one trailing space,
+    as pg_trgm does, so word starts weigh more than word ends.
+    """
+    grams: Set[str] = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def edit_distance(a: str, b: str, maximum: Optional[int] = None) -> int:
+    """
+    Levenshtein distance between a and b. With maximum set, gives up once the
+    distance is known to exceed it and returns maximum + 1.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if maximum is not None and len(a) - len(b) > maximum:
+        return maximum + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        if maximum is not None and min(current) > maximum:
+            return maximum + 1
+        previous = current
+    return previous[-1]
+
+
+class TrigramPostings(Protocol):
+    """
+    What a fuzzy lookup reads: names, display texts and weights by name id, and
+    for each trigram the ascending ids of the names containing it.
+    """
+
+    names: Sequence[Optional[str]]
+    texts: Sequence[Optional[str]]
+    weights: Sequence[int]
+    postings: Mapping[str, Sequence[int]]
+
+
+class _Postings:
+    __slots__ = ("ids", "names", "texts", "weights", "postings", "removed")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[Optional[str]] = []
+        self.texts: List[Optional[str]] = []
+        self.weights = array("q")
+        self.postings: Dict[str, array] = {}
+        self.removed = 0
+
+    def add(self, name: str, text: str, weight: int) -> None:
+        name_id = len(self.names)
+        grams = trigrams(name)
+        self.ids[name] = name_id
+        self.names.append(name)
+        self.texts.append(text)
+        self.weights.append(weight)
+        for gram in grams:
+            postings = self.postings.get(gram)
+            if postings is None:
+                postings = self.postings[gram] = array("I")
+            postings.append(name_id)
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigram to the ids of the names containing it, for
+    typo-tolerant lookups.
+
+    Names get increasing ids and are never renumbered, so every posting list is
+    a sorted array. A lookup counts hits in the rarest query trigrams to find
+    candidates, recomputes the trigrams of the CANDIDATES with the most hits to
+    score their similarity to the query, and only computes edit distances for
+    the best few. Removed names are tombstoned and the postings rebuilt once
+    enough of them pile up.
+    """
+
+    def __init__(self):
+        # replaced as a whole when compacting, so lookups running meanwhile
+        # keep a consistent view
+        self._data = _Postings()
+
+    def __len__(self) -> int:
+        return len(self._data.ids)
+
+    def update(self, delta: NameDelta) -> None:
+        """
+        Applies name weight changes; names whose weight drops to zero are removed.
+
+        Args:
+            delta (NameDelta): Weight changes from NameRows.diff().
+        """
+        data = self._data
+        for name, change in delta.weights.items():
+            name_id = data.ids.get(name)
+            if name_id is None:
+                if change > 0:
+                    data.add(name, delta.texts[name], change)
+                continue
+            data.weights[name_id] += change
+            if data.weights[name_id] <= 0:
+                del data.ids[name]
+                data.names[name_id] = data.texts[name_id] = None
+                data.removed += 1
+
+        if data.removed > COMPACT_RATIO * len(data.names):
+            compacted = _Postings()
+            for i, name in enumerate(data.names):
+                if name is not None:
+                    compacted.add(name, data.texts[i], data.weights[i])
+            self._data = compacted
+
+    def search(
+        self,
+        query: str,
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> List[FuzzyMatch]:
+        """
+        Finds the names closest to a possibly misspelled query.
+
+        Args:
+            query (str): The text to match.
+            limit (int): Maximum number of matches.
+            threshold (float): Minimum trigram similarity of a candidate.
+
+        Returns:
+            List[FuzzyMatch]: Matches by edit distance, then similarity and weight.
+        """
+        return search_postings(self._data, query, limit, threshold)
+
+
+def search_postings(
+    data: TrigramPostings,
+    query: str,
+    limit: int = DEFAULT_LIMIT,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[FuzzyMatch]:
+    """
+    TrigramIndex.search over any TrigramPostings, e.g. a search snapshot's.
+    Names that are None are removed ones, and skipped.
+    """
+    query = normalize(query)
+    grams = trigrams(query)
+    if not grams:
+        return []
+
+    # a name with similarity >= threshold shares at least min_overlap of
+    # the query's trigrams, so it appears in at least one of the
+    # len(grams) - min_overlap + 1 rarest posting lists; the commonest ones
+    # (shared suffixes like -cillin) never need reading
+    min_overlap = max(1, ceil(threshold * len(grams)))
+    lists = sorted((data.postings.get(gram, ()) for gram in grams), key=len)
+    overlaps: Counter[int] = Counter()
+    for postings in lists[: len(lists) - min_overlap + 1]:
+        overlaps.update(postings)
+
+    # counting runs in C; only the names sharing the most of the rare
+    # trigrams are scored exactly in Python
+    # name id -> (name, text, similarity) of the names above the threshold
+    scored: Dict[int, Tuple[str, str, float]] = {}
+    for name_id, _ in nlargest(CANDIDATES, overlaps.items(), key=itemgetter(1)):
+        name, text = data.names[name_id], data.texts[name_id]
+        if name is None or text is None:
+            continue
+        name_grams = trigrams(name)
+        overlap = len(grams & name_grams)
+        similarity = overlap / (len(grams | name_grams))
+        if similarity >= threshold:
+            scored[name_id] = (name, text, similarity)
+
+    candidates = nlargest(
+        max(RERANK_CANDIDATES, limit),
+        scored,
+        key=lambda name_id: (scored[name_id][2], data.weights[name_id]),
+    )
+    # names this far off rank last whatever their exact distance
+    max_distance = max(3, len(query) // 2)
+    matches = []
+    for name_id in candidates:
+        name, text, similarity = scored[name_id]
+        matches.append(
+            FuzzyMatch(
+                text=text,
+                weight=data.weights[name_id],
+                distance=edit_distance(query, name, max_distance),
+                similarity=similarity,
+            )
+        )
+    matches.sort(key=lambda m: (m.distance, -m.similarity, -m.weight))
+    return matches[:limit]
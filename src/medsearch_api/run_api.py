@@ -1,26 +1,72 @@
+from typing import Any, Mapping, Optional
 from flask import Flask
 import logging
-from medsearch_api.app.db import db
-from medsearch_api.app.config import settings
+from medsearch_api.app.db import REPLICA_BIND_KEY, db
+from medsearch_api.app.config import configure_logging, get_settings
 
+from medsearch_api.app.api.autocomplete import autocomplete_blueprint
+from medsearch_api.app.api.codes import codes_blueprint
+from medsearch_api.app.api.equivalents import equivalents_blueprint
+from medsearch_api.app.api.export import export_blueprint
+from medsearch_api.app.api.ingredients import ingredients_blueprint
+from medsearch_api.app.api.lists import lists_blueprint
+from medsearch_api.app.api.meds import meds_blueprint
+from medsearch_api.app.api.metrics import metrics_blueprint
+from medsearch_api.app.api.search import search_blueprint
+from medsearch_api.app.api.utils import register_error_handlers
+from medsearch_api.app.database.engines import engine_options
+from medsearch_api.app.database.loading import register_lazy_load_guard
 from medsearch_api.app.database.utils import verify_database
+from medsearch_api.app.monitoring.instrumentation import init_instrumentation
 
 logger = logging.getLogger(__name__)
 
 # Initialize SQLAlchemy instance outside create_app()
 
 
-def create_app() -> Flask:
+def create_app(config: Optional[Mapping[str, Any]] = None) -> Flask:
     app = Flask(__name__)
-    app.config.from_object(settings)
+    app.config.from_object(get_settings())
+    # overrides, e.g. a local database URI for tests
+    if config:
+        app.config.update(config)
+
+    # pool settings, and the read replica as a bind for db.RoutingSession
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS",
+        engine_options(app.config["SQLALCHEMY_DATABASE_URI"]),
+    )
+    replica_uri = app.config.get("REPLICA_DATABASE_URI")
+    if replica_uri:
+        app.config["SQLALCHEMY_BINDS"] = {
+            **app.config.get("SQLALCHEMY_BINDS", {}),
+            REPLICA_BIND_KEY: {"url": replica_uri, **engine_options(replica_uri)},
+        }
 
     # Initialize SQLAlchemy with the app
     db.init_app(app)
+    # the replica mirrors the primary's tables and has no models of its own;
+    # without metadata for it, create_all()/drop_all() never run DDL against it
+    db.metadatas.pop(REPLICA_BIND_KEY, None)
+    register_lazy_load_guard()
+    init_instrumentation(app)
+
+    register_error_handlers(app)
+    app.register_blueprint(search_blueprint)
+    app.register_blueprint(autocomplete_blueprint)
+    app.register_blueprint(ingredients_blueprint)
+    app.register_blueprint(codes_blueprint)
+    app.register_blueprint(equivalents_blueprint)
+    app.register_blueprint(lists_blueprint)
+    app.register_blueprint(meds_blueprint)
+    app.register_blueprint(export_blueprint)
+    app.register_blueprint(metrics_blueprint)
 
     return app
 
 
 if __name__ == "__main__":
+    configure_logging()
     verify_database()
     app = create_app()
 
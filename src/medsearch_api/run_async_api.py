@@ -0,0 +1,37 @@
+import uvicorn
+
+from medsearch_api.app.asgi.app import AsyncReadAPI
+from medsearch_api.app.config import configure_logging, get_settings
+from medsearch_api.app.database.utils import (
+    DatabaseConfigurationException,
+    verify_database,
+)
+
+
+def create_asgi_app() -> AsyncReadAPI:
+    # uvicorn calls this in each worker process, which starts from a fresh interpreter
+    configure_logging()
+    settings = get_settings()
+    if settings.SQLALCHEMY_DATABASE_URI is None:
+        raise DatabaseConfigurationException("SQLALCHEMY_DATABASE_URI is not set.")
+    return AsyncReadAPI(
+        settings.SQLALCHEMY_DATABASE_URI,
+        settings.REPLICA_DATABASE_URI,
+        settings.NAME_INDEX_REFRESH_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    configure_logging()
+    settings = get_settings()
+    verify_database()
+    # each worker process runs one event loop and its own async pool
+    uvicorn.run(
+        "medsearch_api.run_async_api:create_asgi_app",
+        factory=True,
+        host=settings.ASYNC_API_HOST,
+        port=settings.ASYNC_API_PORT,
+        workers=settings.API_WORKERS,
+        timeout_keep_alive=settings.API_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.API_GRACEFUL_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,72 @@
+import argparse
+import logging
+import time
+from typing import List, Optional, TextIO
+
+from medsearch_api.app.config import configure_logging, get_settings
+from medsearch_api.app.database.engines import get_engine
+from medsearch_api.app.database.export import (
+    DEFAULT_EXPORT_BATCH_SIZE,
+    EXPORT_FORMATS,
+    export_meds,
+)
+from medsearch_api.app.database.utils import get_mysql_uri, verify_database
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export every med with its form, label, organizations and "
+        "ingredients as NDJSON or CSV."
+    )
+    parser.add_argument(
+        "--format",
+        choices=tuple(EXPORT_FORMATS),
+        default="ndjson",
+        help="output format (default: ndjson)",
+    )
+    # a file rather than standard output, where the logs go
+    parser.add_argument("output", help="file to write the export to")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_EXPORT_BATCH_SIZE,
+        help=f"meds read and written at a time (default: {DEFAULT_EXPORT_BATCH_SIZE})",
+    )
+    return parser.parse_args(argv)
+
+
+def write_export(uri: str, export_format: str, out: TextIO, batch_size: int) -> int:
+    """
+    Streams the export of the database at uri to out.
+
+    Returns:
+        int: The number of characters written.
+    """
+    written = 0
+    for chunk in export_meds(get_engine(uri), export_format, batch_size):
+        out.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def export(args: argparse.Namespace) -> int:
+    settings = get_settings()
+    # the export reads the whole catalog; keep it off the primary when possible
+    uri = settings.REPLICA_DATABASE_URI or get_mysql_uri(settings.MYSQL_DATABASE)
+    started = time.perf_counter()
+    with open(args.output, "w", encoding="utf-8", newline="") as out:
+        written = write_export(uri, args.format, out, args.batch_size)
+    logger.info(
+        f"Exported {written} characters of {args.format} to {args.output} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return written
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_logging()
+    verify_database()
+    export(args)
@@ -0,0 +1,77 @@
+import argparse
+import logging
+from typing import Iterator, List, Optional
+
+from medsearch_api.app.config import configure_logging, get_settings
+from medsearch_api.app.ingestion.cache import SPLCache
+from medsearch_api.app.ingestion.fetch import (
+    DEFAULT_FETCH_WORKERS,
+    FetchStats,
+    SPLDirectory,
+    SPLFetcher,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Download SPL documents from DailyMed into a directory that "
+        "run_ingest.py can load; labels unchanged since the last run are skipped."
+    )
+    parser.add_argument("set_ids", help="file of DailyMed set ids, one per line")
+    parser.add_argument("directory", help="where to write the documents")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_FETCH_WORKERS,
+        help=f"concurrent downloads (default: {DEFAULT_FETCH_WORKERS})",
+    )
+    parser.add_argument(
+        "--cache",
+        help="also add downloaded labels to the SPL cache at this path "
+        "(default: SPL_CACHE_PATH, if set)",
+    )
+    parser.add_argument(
+        "--base-url", help="DailyMed web services URL (default: DAILYMED_BASE_URL)"
+    )
+    return parser.parse_args(argv)
+
+
+def read_set_ids(path: str) -> Iterator[str]:
+    """
+    Set ids from a file, one per line; blank lines and # comments are skipped.
+    """
+    with open(path) as f:
+        for line in f:
+            set_id = line.split("#", 1)[0].strip()
+            if set_id:
+                yield set_id
+
+
+def fetch(args: argparse.Namespace) -> FetchStats:
+    settings = get_settings()
+    cache_path = args.cache or settings.SPL_CACHE_PATH
+    cache = SPLCache(cache_path, settings.SPL_CACHE_MAX_BYTES) if cache_path else None
+    with SPLFetcher(
+        SPLDirectory(args.directory),
+        args.base_url or settings.DAILYMED_BASE_URL,
+        workers=args.workers,
+        cache=cache,
+    ) as fetcher:
+        stats = fetcher.fetch_all(read_set_ids(args.set_ids))
+
+    logger.info(
+        f"Fetched {stats.documents} SPLs ({stats.downloaded} downloaded, "
+        f"{stats.unchanged} unchanged, {stats.failed} failed, {stats.bytes} bytes) "
+        f"in {stats.elapsed_seconds:.1f}s, {stats.documents_per_second:.1f} docs/sec"
+    )
+    for failure in stats.failures:
+        logger.warning(f"{failure.set_id}: {failure.error}")
+    return stats
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_logging()
+    fetch(args)
@@ -0,0 +1,99 @@
+import argparse
+import logging
+import os
+from typing import Iterable, List, Optional
+
+from medsearch_api.app.config import configure_logging, get_settings
+from medsearch_api.app.database.utils import create_app_user_engine, verify_database
+from medsearch_api.app.ingestion.cache import SPLCache
+from medsearch_api.app.ingestion.delta import DeltaFilter
+from medsearch_api.app.ingestion.pool import (
+    DEFAULT_BATCH_SIZE,
+    IngestionStats,
+    SPLSourceFile,
+    iter_spl_sources,
+    run_ingestion,
+)
+from medsearch_api.app.ingestion.writer import WriterPool
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Ingest SPL documents from a directory, XML file or zip archive."
+    )
+    parser.add_argument(
+        "path",
+        help="SPL XML file, zip archive or directory, or with --from-cache an SPL cache",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of parser processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--writers",
+        type=int,
+        default=2,
+        help="number of database writer connections (default: 2)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"documents per parse task and write transaction (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="parse and rewrite every document, even ones unchanged since the last run",
+    )
+    parser.add_argument(
+        "--from-cache",
+        action="store_true",
+        help="ingest the latest cached version of every label in the SPL cache at path",
+    )
+    return parser.parse_args(argv)
+
+
+def spl_sources(args: argparse.Namespace) -> Iterable[SPLSourceFile]:
+    if not args.from_cache:
+        return iter_spl_sources(args.path)
+    cache = SPLCache(args.path, get_settings().SPL_CACHE_MAX_BYTES)
+    return (SPLSourceFile(cached.path) for cached in cache.latest())
+
+
+def ingest(args: argparse.Namespace) -> IngestionStats:
+    # one extra connection for the delta filter's lookups
+    engine = create_app_user_engine(
+        get_settings().MYSQL_DATABASE, pool_size=args.writers + 1, max_overflow=0
+    )
+    change_filter = None if args.full else DeltaFilter(engine)
+    try:
+        with WriterPool(engine, writers=args.writers) as writers:
+            stats = run_ingestion(
+                spl_sources(args),
+                writers.submit,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                change_filter=change_filter,
+                failure_sink=writers.submit_failures,
+            )
+    finally:
+        engine.dispose()
+
+    logger.info(
+        f"Ingested {stats.parsed} of {stats.documents} SPLs "
+        f"({stats.skipped} unchanged, {stats.missing} missing, {stats.failed} failed) "
+        f"in {stats.elapsed_seconds:.1f}s, {stats.documents_per_second:.1f} docs/sec"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_logging()
+    verify_database()
+    ingest(args)
@@ -0,0 +1,119 @@
+import os
+import sys
+import tempfile
+from typing import Any, Dict
+
+from flask import Flask
+from gunicorn.app.base import BaseApplication  # type: ignore[import-untyped]
+from prometheus_client import multiprocess
+
+from medsearch_api.app.config import configure_logging, get_settings
+from medsearch_api.app.database.engines import dispose_engines
+from medsearch_api.app.database.utils import verify_database
+from medsearch_api.app.db import db
+from medsearch_api.app.monitoring.instrumentation import MULTIPROCESS_DIR_VARIABLE
+from medsearch_api.run_api import create_app
+
+
+def dispose_app_engines(app: Flask, close: bool = True) -> None:
+    """
+    Empties the pools of the app's engines and of the engine registry.
+
+    Args:
+        app (Flask): The app.
+        close (bool): Whether to close the pooled connections; False after a
+            fork, where they are the parent's.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+    dispose_engines(close=close)
+
+
+def clear_metrics_dir(directory: str) -> None:
+    """
+    Removes the metrics files of a previous run, so counters start over with
+    the server as they would in one process.
+    """
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+
+
+def server_options() -> Dict[str, Any]:
+    """
+    Gunicorn settings from Settings. Each worker process runs API_THREADS
+    request threads and holds its own connection pools.
+    """
+    settings = get_settings()
+    return {
+        "bind": settings.API_BIND,
+        "workers": settings.API_WORKERS,
+        "threads": settings.API_THREADS,
+        "worker_class": "gthread",
+        "timeout": settings.API_TIMEOUT_SECONDS,
+        "graceful_timeout": settings.API_GRACEFUL_TIMEOUT_SECONDS,
+        "keepalive": settings.API_KEEPALIVE_SECONDS,
+        # restart workers now and then, staggered, to cap slow memory growth
+        "max_requests": settings.API_MAX_REQUESTS,
+        "max_requests_jitter": settings.API_MAX_REQUESTS // 10,
+        # the app is imported and created once in the master, then forked
+        "preload_app": True,
+    }
+
+
+class APIServer(BaseApplication):
+    """
+    Pre-forking server for the API. The master creates the app once; each
+    worker drops the connection pools it inherited, so workers never share
+    MySQL sockets, and closes its own when it exits. SIGTERM stops accepting
+    connections and lets in-flight requests finish for up to
+    API_GRACEFUL_TIMEOUT_SECONDS before workers are killed.
+
+    Workers merge their metrics through prometheus_client's multiprocess
+    mode, in PROMETHEUS_MULTIPROC_DIR. The master marks an exited worker dead
+    so its gauges are no longer reported.
+    """
+
+    def __init__(self, app: Flask, options: Dict[str, Any]):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("post_fork", self.post_fork)
+        self.cfg.set("worker_exit", self.worker_exit)
+        self.cfg.set("child_exit", self.child_exit)
+
+    def load(self) -> Flask:
+        return self.application
+
+    def post_fork(self, server, worker) -> None:
+        dispose_app_engines(self.application, close=False)
+
+    def worker_exit(self, server, worker) -> None:
+        dispose_app_engines(self.application)
+
+    def child_exit(self, server, worker) -> None:
+        # runs in the master, also for workers killed before worker_exit ran
+        if MULTIPROCESS_DIR_VARIABLE in os.environ:
+            multiprocess.mark_process_dead(worker.pid)
+
+
+if __name__ == "__main__":
+    if MULTIPROCESS_DIR_VARIABLE not in os.environ:
+        # prometheus_client picks multiprocess mode when it is imported, which
+        # this module already did; start over with a temporary directory
+        os.environ[MULTIPROCESS_DIR_VARIABLE] = tempfile.mkdtemp(
+            prefix="medsearch-metrics-"
+        )
+        os.execv(sys.executable, [sys.executable, *sys.argv])
+    clear_metrics_dir(os.environ[MULTIPROCESS_DIR_VARIABLE])
+    configure_logging()
+    verify_database()
+    app = create_app()
+    # verify_database's connection belongs to the master; don't hand it to workers
+    dispose_app_engines(app)
+    APIServer(app, server_options()).run()
@@ -0,0 +1,49 @@
+import argparse
+import logging
+from typing import List, Optional
+
+from medsearch_api.app.config import configure_logging, get_settings
+from medsearch_api.app.database.engines import get_engine
+from medsearch_api.app.database.utils import get_mysql_uri, verify_database
+from medsearch_api.app.search.snapshot import build_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build the memory-mapped search snapshot that API processes "
+        "serve autocomplete, fuzzy and ingredient queries from."
+    )
+    parser.add_argument(
+        "path",
+        nargs="?",
+        help="where to write the snapshot (default: SEARCH_SNAPSHOT_PATH); an "
+        "existing one is replaced atomically",
+    )
+    return parser.parse_args(argv)
+
+
+def snapshot(uri: str, path: str) -> int:
+    """
+    Builds a snapshot of the database at uri in one transaction.
+
+    Returns:
+        int: The size of the snapshot in bytes.
+    """
+    with get_engine(uri).connect() as conn, conn.begin():
+        return build_snapshot(conn, path)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_logging()
+    settings = get_settings()
+    path = args.path or settings.SEARCH_SNAPSHOT_PATH
+    if not path:
+        raise SystemExit("Pass a path or set SEARCH_SNAPSHOT_PATH.")
+    verify_database()
+    # reads every table in full; keep it off the primary when possible
+    snapshot(
+        settings.REPLICA_DATABASE_URI or get_mysql_uri(settings.MYSQL_DATABASE), path
+    )
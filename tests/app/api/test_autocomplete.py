@@ -0,0 +1,21 @@
+class TestAutocompleteEndpoint:
+    def test_suggests_names_for_prefix(self, client, ingest):
+
+        ingest(
+            {"set_id": "a", "name": "Amoxil", "generic_name": "amoxicillin"},
+            {"set_id": "b", "name": "Amoxil", "code": "0002-0002"},
+        )
+
+        response = client.get("/autocomplete?q=amox")
+
+        assert response.status_code == 200
+        assert response.json["suggestions"] == [
+            {"text": "Amoxil", "weight": 6},
+            {"text": "amoxicillin", "weight": 2},
+        ]
+
+    def test_missing_query_is_bad_request(self, client):
+
+        response = client.get("/autocomplete")
+
+        assert response.status_code == 400
@@ -0,0 +1,56 @@
+from medsearch_api.app.db import db
+from medsearch_api.app.search.codes import MAX_CODES, find_meds_by_codes
+
+
+class TestFindMedsByCodes:
+    def test_looks_up_every_chunk(self, ingest):
+
+        ingest(*({"set_id": f"s{i}", "code": f"0001-000{i}"} for i in range(3)))
+
+        meds = find_meds_by_codes(
+            db.session, ["000010000", "000010002", "000010002", "999999999"], 1
+        )
+
+        assert {code: [m.code for m in ms] for code, ms in meds.items()} == {
+            "000010000": ["0001-0000"],
+            "000010002": ["0001-0002"],
+        }
+
+
+class TestMedsByCodesEndpoint:
+    def test_resolves_codes_in_any_layout(self, client, ingest):
+
+        ingest(
+            {"set_id": "a", "name": "A", "code": "0002-3227"},
+            {"set_id": "b", "name": "B", "code": "12345-678"},
+        )
+
+        response = client.post(
+            "/meds/by-codes",
+            json={"codes": ["00002-3227-30", "12345067801", "1234-5678", "nope"]},
+        )
+
+        assert response.status_code == 200
+        results = response.json["results"]
+        assert response.json["matched"] == 2
+        assert [r["normalized_code"] for r in results] == [
+            "000023227",
+            "123450678",
+            "012345678",
+            None,
+        ]
+        assert [[m["name"] for m in r["meds"]] for r in results] == [
+            ["A"],
+            ["B"],
+            [],
+            [],
+        ]
+        assert results[0]["meds"][0]["ingredients"]
+
+    def test_bad_requests(self, client):
+
+        assert client.post("/meds/by-codes", data="codes").status_code == 400
+        assert client.post("/meds/by-codes", json={"codes": "1"}).status_code == 400
+        assert client.post("/meds/by-codes", json={"codes": [1]}).status_code == 400
+        too_many = {"codes": ["000023227"] * (MAX_CODES + 1)}
+        assert client.post("/meds/by-codes", json=too_many).status_code == 400
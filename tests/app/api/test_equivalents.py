@@ -0,0 +1,39 @@
+from sqlalchemy import select
+
+from medsearch_api.app.database.models import SPL, Med
+from medsearch_api.app.db import db
+
+
+def med_id(set_id):
+    return db.session.execute(
+        select(Med.id).join(SPL).where(SPL.set_id == set_id)
+    ).scalar_one()
+
+
+class TestEquivalentsEndpoint:
+    def test_lists_meds_with_same_ingredients_and_form(self, client, ingest):
+
+        both = (("U1", "ONE"), ("U2", "TWO"))
+        ingest(
+            {"set_id": "a", "code": "1", "ingredients": both},
+            {"set_id": "b", "code": "2", "ingredients": tuple(reversed(both))},
+            {"set_id": "c", "code": "3", "ingredients": both, "form_code": "C1"},
+            {"set_id": "d", "code": "4", "ingredients": both[:1]},
+        )
+
+        same_form = client.get(f"/meds/{med_id('a')}/equivalents")
+        any_form = client.get(f"/meds/{med_id('a')}/equivalents?same_form=false")
+
+        assert same_form.status_code == 200
+        assert [m["set_id"] for m in same_form.json["equivalents"]] == ["b"]
+        assert [m["set_id"] for m in any_form.json["equivalents"]] == ["b", "c"]
+
+    def test_unknown_med_is_not_found(self, client):
+
+        response = client.get("/meds/999/equivalents")
+
+        assert response.status_code == 404
+
+    def test_bad_same_form_is_bad_request(self, client):
+
+        assert client.get("/meds/1/equivalents?same_form=maybe").status_code == 400
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import update
+
+from medsearch_api.app.database.export import CSV_COLUMNS
+from medsearch_api.app.database.models import Med
+from medsearch_api.app.db import db
+
+
+class TestExportEndpoint:
+    def test_ndjson_lines_match_med_details(self, client, ingest):
+
+        ingest(
+            {"set_id": "a", "code": "1"},
+            {
+                "set_id": "b",
+                "code": "2",
+                "ingredients": (("U1", "AMOXICILLIN"), ("U2", "CLAVULANATE")),
+            },
+        )
+
+        response = client.get("/export/meds")
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [client.get(f"/meds/{i}").json for i in (1, 2)]
+
+    def test_streams_one_chunk_per_batch(self, client, ingest):
+
+        ingest(*({"set_id": f"s{i}", "code": f"c{i}"} for i in range(5)))
+
+        response = client.get("/export/meds?batch_size=2")
+
+        chunks = [chunk for chunk in response.response if chunk]
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+    def test_leaves_out_deleted_meds(self, client, ingest):
+
+        ingest({"set_id": "a", "code": "1"}, {"set_id": "b", "code": "2"})
+        db.session.execute(
+            update(Med).where(Med.code == "1").values(deleted_at=datetime.now())
+        )
+        db.session.commit()
+
+        response = client.get("/export/meds")
+
+        assert [json.loads(line)["code"] for line in response.text.splitlines()] == [
+            "2"
+        ]
+
+    def test_csv_joins_lists_into_one_cell(self, client, ingest):
+
+        ingest({"ingredients": (("U1", "AMOXICILLIN"), ("U2", "CLAVULANATE"))})
+
+        response = client.get("/export/meds?format=csv")
+
+        assert response.mimetype == "text/csv"
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert tuple(rows[0]) == CSV_COLUMNS
+        med = dict(zip(rows[0], rows[1]))
+        assert med["spl_set_id"] == "set-1"
+        assert med["form_name"] == "TABLET"
+        assert med["organization_names"] == "Test Pharma"
+        assert med["ingredient_codes"] == "U1|U2"
+        assert med["ingredient_names"] == "AMOXICILLIN|CLAVULANATE"
+
+    def test_empty_catalog_is_a_csv_header(self, client):
+
+        response = client.get("/export/meds?format=csv")
+
+        assert response.text.splitlines() == [",".join(CSV_COLUMNS)]
+
+    def test_bad_format_or_batch_size_is_bad_request(self, client):
+
+        assert client.get("/export/meds?format=xml").status_code == 400
+        assert client.get("/export/meds?batch_size=0").status_code == 400
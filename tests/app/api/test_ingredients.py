@@ -0,0 +1,64 @@
+from sqlalchemy import delete, select
+
+from medsearch_api.app.database.models import Ingredient, Med, MedIngredientMap
+from medsearch_api.app.db import db
+from medsearch_api.app.search.snapshot import build_snapshot
+
+
+class TestMedsByIngredientsEndpoint:
+    def test_filters_by_ingredient_ids(self, client, ingest):
+
+        ingest(
+            {"set_id": "a", "name": "Both", "ingredients": (("U1", "A"), ("U2", "B"))},
+            {
+                "set_id": "b",
+                "name": "Only A",
+                "code": "2",
+                "ingredients": (("U1", "A"),),
+            },
+        )
+        ids = dict(db.session.execute(select(Ingredient.code, Ingredient.id)).all())
+
+        response = client.get(f"/meds/by-ingredients?all={ids['U1']}&none={ids['U2']}")
+
+        assert response.status_code == 200
+        assert response.json["count"] == 1
+        assert [med["name"] for med in response.json["meds"]] == ["Only A"]
+
+    def test_limit_caps_listed_meds_not_count(self, client, ingest):
+
+        ingest(*({"set_id": f"s{i}", "code": f"c{i}"} for i in range(3)))
+        ingredient_id = db.session.execute(select(Ingredient.id)).scalar()
+
+        response = client.get(f"/meds/by-ingredients?any={ingredient_id}&limit=2")
+
+        assert response.json["count"] == 3
+        assert len(response.json["meds"]) == 2
+
+    def test_bad_requests(self, client):
+
+        assert client.get("/meds/by-ingredients?none=1").status_code == 400
+        assert client.get("/meds/by-ingredients?all=x").status_code == 400
+
+    def test_served_from_the_search_snapshot_when_configured(
+        self, app, client, ingest, tmp_path
+    ):
+
+        ingest({"set_id": "a", "name": "Amoxil", "ingredients": (("U1", "A"),)})
+        ingredient_id = db.session.execute(select(Ingredient.id)).scalar()
+        path = str(tmp_path / "search.snapshot")
+        with db.engine.connect() as conn:
+            build_snapshot(conn, path)
+        app.config["SEARCH_SNAPSHOT_PATH"] = path
+        # the snapshot answers on its own
+        db.session.execute(delete(MedIngredientMap))
+        db.session.execute(delete(Med))
+        db.session.commit()
+
+        response = client.get(f"/meds/by-ingredients?all={ingredient_id}")
+
+        assert response.json["count"] == 1
+        assert [med["name"] for med in response.json["meds"]] == ["Amoxil"]
+        assert client.get("/autocomplete?q=amo").json["suggestions"][0]["text"] == (
+            "Amoxil"
+        )
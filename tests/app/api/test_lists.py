@@ -0,0 +1,40 @@
+class TestListEndpoints:
+    def test_walks_meds_page_by_page(self, client, ingest):
+
+        ingest(*({"set_id": f"s{i}", "code": f"c{i}"} for i in range(5)))
+
+        seen, cursor = [], ""
+        while True:
+            response = client.get(f"/meds?limit=2&cursor={cursor}")
+            assert response.status_code == 200
+            seen.extend(item["code"] for item in response.json["items"])
+            cursor = response.json["next_cursor"]
+            if cursor is None:
+                break
+
+        assert sorted(seen) == [f"c{i}" for i in range(5)]
+
+    def test_spls_sort_by_published_date_with_iso_dates(self, client, ingest):
+
+        ingest(
+            {"set_id": "late", "effective_time": "20240301"},
+            {"set_id": "early", "code": "2", "effective_time": "20230101"},
+        )
+
+        response = client.get("/spls?sort=published_date")
+
+        assert [item["set_id"] for item in response.json["items"]] == ["early", "late"]
+        assert response.json["items"][0]["published_date"] == "2023-01-01"
+
+    def test_organizations(self, client, ingest):
+
+        ingest({"org_name": "Acme"})
+
+        response = client.get("/organizations?sort=updated_at")
+
+        assert [item["name"] for item in response.json["items"]] == ["Acme"]
+
+    def test_bad_sort_or_cursor_is_bad_request(self, client):
+
+        assert client.get("/meds?sort=title").status_code == 400
+        assert client.get("/spls?cursor=garbage").status_code == 400
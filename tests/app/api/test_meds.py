@@ -0,0 +1,31 @@
+class TestMedEndpoints:
+    def test_med_detail(self, client, ingest):
+
+        ingest({"ingredients": (("U1", "AMOXICILLIN"), ("U2", "CLAVULANATE"))})
+
+        response = client.get("/meds/1")
+
+        assert response.status_code == 200
+        med = response.json
+        assert med["spl"]["set_id"] == "set-1"
+        assert med["form"]["name"] == "TABLET"
+        assert [o["name"] for o in med["organizations"]] == ["Test Pharma"]
+        assert sorted(i["name"] for i in med["ingredients"]) == [
+            "AMOXICILLIN",
+            "CLAVULANATE",
+        ]
+
+    def test_unknown_med_is_not_found(self, client):
+
+        assert client.get("/meds/99").status_code == 404
+
+    def test_expanded_list_keeps_page_order(self, client, ingest):
+
+        ingest(*({"set_id": f"s{i}", "code": f"c{i}"} for i in range(3)))
+
+        response = client.get("/meds?sort=id&limit=2&expand=true")
+
+        items = response.json["items"]
+        assert [item["id"] for item in items] == [1, 2]
+        assert items[0]["ingredients"][0]["name"] == "TESTAMINE"
+        assert response.json["next_cursor"] is not None
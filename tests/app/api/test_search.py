@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from sqlalchemy import update
+
+from medsearch_api.app.database.models import Med
+from medsearch_api.app.db import db
+
+
+class TestSearchEndpoint:
+    def test_ranks_name_matches_above_ingredient_and_title_matches(
+        self, client, ingest
+    ):
+
+        ingest(
+            {"set_id": "a", "name": "Amoxil", "generic_name": "amoxicillin"},
+            {
+                "set_id": "b",
+                "name": "Augmentin",
+                "generic_name": "clavulanate",
+                "code": "0002-0002",
+                "ingredients": (("U1", "AMOXICILLIN"),),
+            },
+            {"set_id": "c", "name": "Other", "title": "Not amoxicillin"},
+        )
+
+        response = client.get("/search?q=amoxicillin")
+
+        assert response.status_code == 200
+        assert [r["set_id"] for r in response.json["results"]] == ["a", "b", "c"]
+
+    def test_requires_every_term(self, client, ingest):
+
+        ingest(
+            {"set_id": "a", "name": "Amoxil", "generic_name": "amoxicillin"},
+            {"set_id": "b", "name": "Amoxil Chewable", "code": "0002-0002"},
+        )
+
+        response = client.get("/search?q=amoxil+chew")
+
+        assert [r["set_id"] for r in response.json["results"]] == ["b"]
+
+    def test_excludes_soft_deleted_meds(self, client, ingest):
+
+        ingest({"set_id": "a", "name": "Amoxil"})
+        db.session.execute(update(Med).values(deleted_at=datetime.now()))
+        db.session.commit()
+
+        response = client.get("/search?q=amoxil")
+
+        assert response.json["results"] == []
+
+    def test_limit_is_applied(self, client, ingest):
+
+        ingest(*({"set_id": f"s{i}", "code": f"c{i}"} for i in range(5)))
+
+        response = client.get("/search?q=testra&limit=2")
+
+        assert len(response.json["results"]) == 2
+
+    def test_falls_back_to_closest_name_when_nothing_matches(self, client, ingest):
+
+        ingest(
+            {"set_id": "a", "name": "Amoxil", "generic_name": "amoxicillin"},
+            {"set_id": "b", "name": "Glucophage", "generic_name": "metformin"},
+        )
+
+        response = client.get("/search?q=metforman")
+
+        assert response.json["corrected_query"] == "metformin"
+        assert [r["set_id"] for r in response.json["results"]] == ["b"]
+
+    def test_exact_hits_are_not_corrected(self, client, ingest):
+
+        ingest({"set_id": "a", "name": "Amoxil", "generic_name": "amoxicillin"})
+
+        response = client.get("/search?q=amoxicillin")
+
+        assert response.json["corrected_query"] is None
+
+    def test_fuzzy_lists_close_names(self, client, ingest):
+
+        ingest({"set_id": "a", "name": "Amoxil", "generic_name": "amoxicillin"})
+
+        response = client.get("/search/fuzzy?q=amoxicilin")
+
+        assert response.status_code == 200
+        assert response.json["matches"][0]["text"] == "amoxicillin"
+        assert response.json["matches"][0]["distance"] == 1
+
+    def test_missing_query_is_bad_request(self, client):
+
+        response = client.get("/search")
+
+        assert response.status_code == 400
+        assert "q" in response.json["error"]
+
+    def test_out_of_range_limit_is_bad_request(self, client):
+
+        response = client.get("/search?q=x&limit=1000")
+
+        assert response.status_code == 400
@@ -0,0 +1,108 @@
+import asyncio
+import io
+import json
+
+import pytest
+from sqlalchemy import create_engine
+
+from medsearch_api.app.asgi.app import AsyncReadAPI
+from medsearch_api.app.database.models import MedSearchBaseModel
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+from medsearch_api.app.ingestion.writer import SPLBatchWriter
+
+
+@pytest.fixture
+def database_uri(tmp_path, make_spl_xml):
+    uri = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    engine = create_engine(uri)
+    MedSearchBaseModel.metadata.create_all(engine)
+    labels = (
+        {"set_id": "a", "code": "1", "name": "Amoxil", "generic_name": "amoxicillin"},
+        {"set_id": "b", "code": "2", "name": "Zocor", "generic_name": "simvastatin"},
+    )
+    SPLBatchWriter(engine).write(
+        [parse_spl(io.BytesIO(make_spl_xml(**label))) for label in labels]
+    )
+    engine.dispose()
+    return uri
+
+
+async def _get(api, path, query=""):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+    }
+    await api(scope, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def _run(database_uri, *requests):
+    """
+    Sends the (path, query) requests concurrently on one event loop.
+    """
+
+    async def run():
+        api = AsyncReadAPI(database_uri)
+        try:
+            return await asyncio.gather(*(_get(api, *request) for request in requests))
+        finally:
+            await api.engine.dispose()
+
+    return asyncio.run(run())
+
+
+class TestAsyncReadAPI:
+    def test_search_and_detail(self, database_uri):
+
+        (status, search), (_, detail) = _run(
+            database_uri, ("/search", "q=zocor"), ("/meds/1", "")
+        )
+
+        assert status == 200
+        assert [r["name"] for r in search["results"]] == ["Zocor"]
+        assert detail["name"] == "Amoxil"
+        assert detail["spl"]["set_id"] == "a"
+        assert [i["name"] for i in detail["ingredients"]] == ["TESTAMINE"]
+
+    def test_search_falls_back_to_the_closest_name(self, database_uri):
+
+        ((_, search),) = _run(database_uri, ("/search", "q=amoxcillin"))
+
+        assert search["corrected_query"] == "amoxicillin"
+        assert [r["name"] for r in search["results"]] == ["Amoxil"]
+
+    def test_autocomplete(self, database_uri):
+
+        ((_, response),) = _run(database_uri, ("/autocomplete", "q=zo"))
+
+        assert [s["text"] for s in response["suggestions"]] == ["Zocor"]
+
+    def test_many_concurrent_requests(self, database_uri):
+
+        responses = _run(database_uri, *([("/meds/2", "")] * 200))
+
+        assert {status for status, _ in responses} == {200}
+        assert {body["name"] for _, body in responses} == {"Zocor"}
+
+    def test_errors(self, database_uri):
+
+        responses = _run(
+            database_uri,
+            ("/meds/99", ""),
+            ("/search", ""),
+            ("/search", "q=x&limit=abc"),
+            ("/nope", ""),
+        )
+
+        assert [status for status, _ in responses] == [404, 400, 400, 404]
+        assert responses[1][1] == {"error": "Query parameter 'q' is required."}
@@ -0,0 +1,33 @@
+from medsearch_api.app.config import get_settings
+from medsearch_api.app.database.engines import engine_options, get_engine
+
+
+class TestEngineRegistry:
+    def test_same_uri_shares_an_engine(self, tmp_path):
+
+        uri = f"sqlite:///{tmp_path / 'a.db'}"
+
+        assert get_engine(uri) is get_engine(uri)
+        assert get_engine(uri) is not get_engine(f"sqlite:///{tmp_path / 'b.db'}")
+
+    def test_overrides_get_their_own_engine(self, tmp_path):
+
+        uri = f"sqlite:///{tmp_path / 'a.db'}"
+
+        assert get_engine(uri, pool_size=2) is get_engine(uri, pool_size=2)
+        assert get_engine(uri, pool_size=2) is not get_engine(uri)
+        assert get_engine(uri, pool_size=2).pool.size() == 2
+
+    def test_mysql_pool_options_come_from_settings(self):
+
+        options = engine_options("mysql://user:pw@db:3306/medsearch")
+
+        settings = get_settings()
+        assert options["pool_size"] == settings.DB_POOL_SIZE
+        assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+        assert options["pool_recycle"] == settings.DB_POOL_RECYCLE_SECONDS
+        assert options["pool_pre_ping"] == settings.DB_POOL_PRE_PING
+
+    def test_sqlite_keeps_its_pool_defaults(self):
+
+        assert engine_options("sqlite://") == {}
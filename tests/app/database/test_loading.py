@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import event, select
+
+from medsearch_api.app.database.loading import MED_DETAIL, MED_LIST, LazyLoadException
+from medsearch_api.app.database.models import Med
+from medsearch_api.app.db import db
+
+
+@pytest.fixture
+def count_queries(app):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", count)
+
+
+def _labels(n):
+    return (
+        {
+            "set_id": f"s{i}",
+            "code": f"c{i}",
+            "org_id": f"org{i % 3}",
+            "ingredients": ((f"U{i}", f"ING{i}"), ("UCOMMON", "COMMON")),
+        }
+        for i in range(n)
+    )
+
+
+class TestLoaderPlans:
+    def test_list_plan_query_count_does_not_grow_with_meds(self, ingest, count_queries):
+
+        counts = []
+        for n in (2, 20):
+            ingest(*_labels(n))
+            db.session.expunge_all()
+            count_queries.clear()
+            meds = db.session.scalars(select(Med).options(*MED_LIST)).all()
+            for med in meds:
+                med.form.name
+                [m.organization.name for m in med.organization_maps]
+                [m.ingredient.name for m in med.ingredient_maps]
+            counts.append(len(count_queries))
+
+        assert counts[0] == counts[1] == 4
+
+    def test_detail_plan_loads_everything_in_three_queries(self, ingest, count_queries):
+
+        ingest(*_labels(1))
+        db.session.expunge_all()
+        count_queries.clear()
+
+        med = db.session.scalars(select(Med).options(*MED_DETAIL)).one()
+        assert med.spl.set_id == "s0"
+        assert med.form.name == "TABLET"
+        assert sorted(m.ingredient.name for m in med.ingredient_maps) == [
+            "COMMON",
+            "ING0",
+        ]
+        assert [m.organization.name for m in med.organization_maps] == ["Test Pharma"]
+
+        assert len(count_queries) == 3
+
+    def test_lazy_load_raises_in_test_mode(self, ingest):
+
+        ingest(*_labels(1))
+        db.session.expunge_all()
+
+        med = db.session.scalars(select(Med)).one()
+        with pytest.raises(LazyLoadException, match="ingredient_maps"):
+            med.ingredient_maps
+
+    def test_lazy_load_allowed_when_switched_off(self, app, ingest):
+
+        ingest(*_labels(1))
+        db.session.expunge_all()
+        app.config["RAISE_ON_LAZY_LOAD"] = False
+
+        med = db.session.scalars(select(Med)).one()
+
+        assert len(med.ingredient_maps) == 2
@@ -0,0 +1,85 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from medsearch_api.app.database.models import SPL, Med
+from medsearch_api.app.database.pagination import (
+    PaginationException,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+)
+
+# normalized_code is nullable, unlike name
+SORTS = {"id": Med.id, "code": Med.normalized_code}
+
+
+@pytest.fixture
+def session(sqlite_engine, med_row):
+    codes = ["b", "a", None, "b", "c", None, "a"]
+    with sqlite_engine.begin() as conn:
+        conn.execute(
+            insert(SPL),
+            [
+                {
+                    "id": i,
+                    "set_id": str(i),
+                    "title": "t",
+                    "published_date": date.today(),
+                }
+                for i in range(1, len(codes) + 1)
+            ],
+        )
+        conn.execute(
+            insert(Med),
+            [med_row(i, normalized_code=c) for i, c in enumerate(codes, 1)],
+        )
+    with Session(sqlite_engine) as session:
+        yield session
+
+
+def walk(session, sort, limit):
+    stmt = select(Med.id, Med.normalized_code)
+    pages, cursor = [], None
+    while True:
+        page = keyset_page(session, stmt, SORTS, sort, Med.id, cursor, limit)
+        pages.append([row.id for row in page.rows])
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+class TestKeysetPage:
+    def test_walks_every_row_once_in_sort_order(self, session):
+
+        assert walk(session, "id", 3) == [[1, 2, 3], [4, 5, 6], [7]]
+        # NULL codes first, ties broken by id
+        assert walk(session, "code", 2) == [[3, 6], [2, 7], [1, 4], [5]]
+
+    def test_exact_last_page_has_no_cursor(self, session):
+
+        assert walk(session, "id", 7) == [[1, 2, 3, 4, 5, 6, 7]]
+
+    def test_cursor_round_trips_dates(self):
+
+        cursor = encode_cursor("published_date", date(2024, 2, 29), 12)
+
+        assert decode_cursor(cursor, "published_date", SPL.published_date) == (
+            date(2024, 2, 29),
+            12,
+        )
+
+    @pytest.mark.parametrize(
+        "cursor", ["not base64!", encode_cursor("code", "a", 1), "W10"]
+    )
+    def test_rejects_bad_or_mismatched_cursors(self, session, cursor):
+
+        with pytest.raises(PaginationException):
+            keyset_page(session, select(Med.id), SORTS, "id", Med.id, cursor)
+
+    def test_rejects_unknown_sort(self, session):
+
+        with pytest.raises(PaginationException):
+            keyset_page(session, select(Med.id), SORTS, "generic_name", Med.id)
@@ -0,0 +1,187 @@
+import io
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+
+from medsearch_api.app.database.models import Med, MedSearchBaseModel
+from medsearch_api.app.database.pagination import encode_cursor
+from medsearch_api.app.database.query_plans import full_table_scans
+from medsearch_api.app.ingestion.delta import stored_fingerprints
+from medsearch_api.app.ingestion.issues import ParsingIssueRecord, ParsingIssueStore
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+from medsearch_api.app.ingestion.writer import SPLBatchWriter
+from medsearch_api.app.search.ingredient_index import load_med_ingredients
+from medsearch_api.app.search.names import load_name_changes
+from medsearch_api.run_api import create_app
+
+_SINCE = datetime(2024, 1, 1)
+# three labels sharing an ingredient and a form, two of them an organization
+_LABELS = [
+    {"set_id": f"set-{i}", "code": f"000{i}-0001", "org_id": f"{i % 2:09d}"}
+    for i in range(1, 4)
+]
+
+
+@contextmanager
+def _executed():
+    """
+    Collects the SELECT, UPDATE and DELETE statements run on any engine with
+    their driver parameters, the first set of an executemany.
+    """
+    statements: List[Tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+def _get(path: str) -> Callable:
+    def run(client, engine, make_spl_xml):
+        response = client.get(path)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    return run
+
+
+def _later_page(path: str, sort: str, value) -> Callable:
+    # a page continuing from a cursor, as the API hands out after the first
+    def run(client, engine, make_spl_xml):
+        cursor = encode_cursor(sort, value, 1)
+        response = client.get(f"{path}sort={sort}&limit=1&cursor={cursor}")
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    return run
+
+
+def _meds_by_codes(client, engine, make_spl_xml):
+    response = client.post("/meds/by-codes", json={"codes": ["0001-0001", "0002-0001"]})
+    assert response.get_json()["matched"] == 2
+
+
+def _name_index_refresh(client, engine, make_spl_xml):
+    with engine.connect() as conn:
+        load_name_changes(conn, _SINCE)
+
+
+def _ingredient_index_refresh(client, engine, make_spl_xml):
+    with engine.connect() as conn:
+        load_med_ingredients(conn, _SINCE)
+
+
+def _delta_check(client, engine, make_spl_xml):
+    with engine.connect() as conn:
+        assert len(stored_fingerprints(conn, ["set-1", "set-2"])) == 2
+
+
+def _ingestion(client, engine, make_spl_xml):
+    # a revised label, so its med, maps and dimensions are upserted again
+    label = {**_LABELS[0], "title": "Revised Label", "version_number": 2}
+    SPLBatchWriter(engine).write([parse_spl(io.BytesIO(make_spl_xml(**label)))])
+
+
+def _known_parsing_issue(client, engine, make_spl_xml):
+    issue = ParsingIssueRecord(
+        spl_id=1,
+        error="Unexpected end of file at line 3",
+        content_hash="0" * 32,
+        xml_content="<document>",
+        xml_structure="document",
+    )
+    # the second time, the issue is found and updated by id
+    for _ in range(2):
+        with engine.begin() as conn:
+            ParsingIssueStore().record(conn, [issue])
+
+
+# The selective work the API, the index refreshes and ingestion do, run through
+# the code that does it; every statement it issues should be answered from an
+# index. Full loads (index startup, the SQLite search fallback, exports) read
+# whole tables by design and are left out, as are FULLTEXT searches, which
+# MySQL plans on its own.
+CANONICAL_OPERATIONS: Dict[str, Callable] = {
+    "med detail": _get("/meds/1"),
+    "expanded meds page": _later_page("/meds?expand=true&", "id", 1),
+    "meds page by name": _later_page("/meds?", "name", "Testra"),
+    "spls page by published date": _later_page(
+        "/spls?", "published_date", _SINCE.date()
+    ),
+    "organizations page by updated at": _later_page(
+        "/organizations?", "updated_at", _SINCE
+    ),
+    "equivalents": _get("/meds/1/equivalents"),
+    "meds by codes": _meds_by_codes,
+    "name index refresh": _name_index_refresh,
+    "ingredient index refresh": _ingredient_index_refresh,
+    "delta check": _delta_check,
+    "ingestion": _ingestion,
+    "known parsing issue": _known_parsing_issue,
+}
+
+# Deleting a referenced row makes MySQL look up the rows referencing it, so
+# every foreign key needs an index leading with its column.
+FOREIGN_KEYS = {
+    f"{fk.parent.table.name}.{fk.parent.name}": fk.parent
+    for table in MedSearchBaseModel.metadata.sorted_tables
+    for fk in table.foreign_keys
+}
+
+
+@pytest.fixture(scope="module")
+def client(migrated_engine, make_spl_xml):
+    batch = [parse_spl(io.BytesIO(make_spl_xml(**label))) for label in _LABELS]
+    SPLBatchWriter(migrated_engine).write(batch)
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": migrated_engine.url.render_as_string(
+                hide_password=False
+            ),
+            "TESTING": True,
+            "RAISE_ON_LAZY_LOAD": True,
+        }
+    )
+    with app.app_context():
+        yield app.test_client()
+
+
+class TestQueryPlans:
+    @pytest.mark.parametrize("name", sorted(CANONICAL_OPERATIONS))
+    def test_canonical_operation_uses_indexes(
+        self, client, migrated_engine, make_spl_xml, name
+    ):
+
+        with _executed() as statements:
+            CANONICAL_OPERATIONS[name](client, migrated_engine, make_spl_xml)
+
+        assert statements
+        with migrated_engine.connect() as conn:
+            scans = {
+                statement: full_table_scans(conn, statement, parameters)
+                for statement, parameters in statements
+            }
+        assert {s: t for s, t in scans.items() if t} == {}, f"{name}; add an index"
+
+    @pytest.mark.parametrize("name", sorted(FOREIGN_KEYS))
+    def test_foreign_key_lookup_uses_an_index(self, migrated_engine, name):
+
+        column = FOREIGN_KEYS[name]
+        with migrated_engine.connect() as conn:
+            scans = full_table_scans(conn, select(column).where(column == 1))
+
+        assert scans == [], f"{name} has no index to look up references by"
+
+    def test_detects_full_table_scans(self, migrated_engine):
+
+        with migrated_engine.connect() as conn:
+            scans = full_table_scans(conn, select(Med.id).where(Med.code == "x"))
+
+        assert scans == ["meds"]
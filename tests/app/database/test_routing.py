@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, select
+
+from medsearch_api.app.database.models import SPL, Med, MedSearchBaseModel
+from medsearch_api.app.db import REPLICA_BIND_KEY, db, read_engine, use_replica
+from medsearch_api.run_api import create_app
+
+
+@pytest.fixture
+def replicated_app(tmp_path, med_row):
+    """
+    An app whose primary and replica are two SQLite files holding a med with
+    a different name, so every read shows where it went.
+    """
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+            "REPLICA_DATABASE_URI": f"sqlite:///{tmp_path / 'replica.db'}",
+            "TESTING": True,
+        }
+    )
+    with app.app_context():
+        for key, name in ((None, "primary"), (REPLICA_BIND_KEY, "replica")):
+            engine = db.engines[key]
+            MedSearchBaseModel.metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(SPL),
+                    {
+                        "id": 1,
+                        "set_id": "s",
+                        "title": "t",
+                        "published_date": date.today(),
+                    },
+                )
+                conn.execute(insert(Med), med_row(1, name=name))
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _med_name():
+    return db.session.scalar(select(Med.name).where(Med.id == 1))
+
+
+class TestReadReplicaRouting:
+    def test_sessions_read_from_the_primary_by_default(self, replicated_app):
+
+        assert _med_name() == "primary"
+        assert read_engine() is db.engines[REPLICA_BIND_KEY]
+
+    def test_replica_sessions_read_from_the_replica_and_write_to_the_primary(
+        self, replicated_app
+    ):
+
+        use_replica()
+        assert _med_name() == "replica"
+
+        db.session.add(SPL(id=2, set_id="s2", title="new", published_date=date.today()))
+        db.session.commit()
+
+        with db.engines[None].connect() as conn:
+            assert conn.scalar(select(SPL.title).where(SPL.id == 2)) == "new"
+        with db.engines[REPLICA_BIND_KEY].connect() as conn:
+            assert conn.scalar(select(SPL.title).where(SPL.id == 2)) is None
+
+    def test_read_only_endpoints_use_the_replica(self, replicated_app):
+
+        response = replicated_app.test_client().get("/meds/1")
+
+        assert response.json["name"] == "replica"
+
+    def test_without_replica_reads_stay_on_the_primary(self, app, ingest):
+
+        ingest({"name": "Testra"})
+        use_replica()
+
+        assert _med_name() == "Testra"
+        assert read_engine() is db.engine
@@ -0,0 +1,63 @@
+import zlib
+
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from medsearch_api.app.database.models import SPLParsingIssue
+
+XML = "<document>" + "<section>amoxicillin</section>" * 1000 + "</document>"
+
+
+def _add_issue(engine) -> int:
+    with Session(engine) as session:
+        issue = SPLParsingIssue(
+            spl_id=1,
+            error="bad date",
+            error_fingerprint="f",
+            content_hash="h",
+            xml_content=XML,
+            xml_structure="document",
+        )
+        session.add(issue)
+        session.commit()
+        return issue.id
+
+
+class TestCompressedText:
+    def test_values_are_stored_compressed_and_read_back_as_text(self, sqlite_engine):
+
+        issue_id = _add_issue(sqlite_engine)
+
+        with sqlite_engine.connect() as conn:
+            stored = conn.execute(
+                text("SELECT xml_content FROM spl_parsing_issues WHERE id = :id"),
+                {"id": issue_id},
+            ).scalar_one()
+        assert len(stored) < len(XML) // 10
+        assert zlib.decompress(stored).decode() == XML
+        with Session(sqlite_engine) as session:
+            issue = session.get(SPLParsingIssue, issue_id)
+            assert issue.xml_content == XML
+            assert issue.xml_structure == "document"
+
+    def test_listing_issues_leaves_the_xml_unread_until_accessed(self, sqlite_engine):
+
+        _add_issue(sqlite_engine)
+        statements = []
+        event.listen(
+            sqlite_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+        with Session(sqlite_engine) as session:
+            (issue,) = session.scalars(select(SPLParsingIssue)).all()
+            assert issue.error == "bad date"
+            assert "xml_content" not in statements[0]
+
+            assert issue.xml_structure == "document"
+            # both xml columns load together, in one query
+            assert len(statements) == 2
+            assert "xml_content" in statements[1]
+            assert issue.xml_content == XML
+            assert len(statements) == 2
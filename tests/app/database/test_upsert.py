@@ -0,0 +1,120 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, select
+
+from medsearch_api.app.database.models import (
+    Ingredient,
+    MedForm,
+    MedSearchBaseModel,
+    Organization,
+)
+from medsearch_api.app.database.upsert import (
+    DimensionUpsertEngine,
+    LRUIdCache,
+    UnsupportedDialectException,
+)
+from medsearch_api.app.ingestion.records import (
+    IngredientRecord,
+    MedFormRecord,
+    OrganizationRecord,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    MedSearchBaseModel.metadata.create_all(
+        engine,
+        tables=[MedForm.__table__, Ingredient.__table__, Organization.__table__],
+    )
+    return engine
+
+
+class TestLRUIdCache:
+    def test_evicts_least_recently_used(self):
+
+        cache = LRUIdCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert len(cache) == 2
+
+    def test_counts_hits_and_misses(self):
+
+        cache = LRUIdCache(max_size=2)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("z")
+
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+class TestDimensionUpserter:
+    def test_inserts_new_rows_and_returns_ids(self, engine):
+
+        upserter = DimensionUpsertEngine().ingredients
+        records = [
+            IngredientRecord("A", "unii", "Alpha"),
+            IngredientRecord("B", "unii", "Beta"),
+            IngredientRecord("A", "unii", "Alpha"),
+        ]
+
+        with engine.begin() as conn:
+            ids = upserter.upsert(conn, records)
+            rows = conn.execute(select(Ingredient.id, Ingredient.code)).all()
+
+        assert sorted(ids) == [("A", "unii"), ("B", "unii")]
+        assert {code: id_ for id_, code in rows} == {
+            "A": ids[("A", "unii")],
+            "B": ids[("B", "unii")],
+        }
+
+    def test_existing_rows_keep_their_ids_and_update_name(self, engine):
+
+        with engine.begin() as conn:
+            first = DimensionUpsertEngine().organizations.upsert(
+                conn, [OrganizationRecord("123", "root", "Old Name")]
+            )
+        with engine.begin() as conn:
+            second = DimensionUpsertEngine().organizations.upsert(
+                conn, [OrganizationRecord("123", "root", "New Name")]
+            )
+            rows = conn.execute(select(Organization.id, Organization.name)).all()
+
+        assert first == second
+        assert rows == [(first[("123", "root")], "New Name")]
+
+    def test_cached_keys_skip_the_database(self, engine):
+
+        upserter = DimensionUpsertEngine().med_forms
+        record = MedFormRecord("C42998", "fda", "TABLET")
+        with engine.begin() as conn:
+            ids = upserter.upsert(conn, [record])
+
+        conn = MagicMock()
+        assert upserter.upsert(conn, [record]) == ids
+        conn.execute.assert_not_called()
+
+    def test_chunks_large_batches(self, engine):
+
+        upserter = DimensionUpsertEngine(chunk_size=7).ingredients
+        records = [IngredientRecord(str(i), "unii", f"I{i}") for i in range(50)]
+
+        with engine.begin() as conn:
+            ids = upserter.upsert(conn, records)
+
+        assert len(ids) == 50
+        assert len(set(ids.values())) == 50
+
+    def test_raises_for_unsupported_dialect(self):
+
+        upserter = DimensionUpsertEngine().ingredients
+        conn = MagicMock()
+        conn.dialect.name = "oracle"
+
+        with pytest.raises(UnsupportedDialectException):
+            upserter.upsert(conn, [IngredientRecord("A", "unii", "Alpha")])
@@ -0,0 +1,132 @@
+import io
+import threading
+import zipfile
+
+from medsearch_api.app.ingestion import cache as cache_module
+from medsearch_api.app.ingestion.cache import SPLCache
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+
+
+def _add(cache, make_spl_xml, **kwargs):
+    return cache.add(io.BytesIO(make_spl_xml(**kwargs)))
+
+
+class TestSPLCache:
+    def test_stores_documents_under_their_parsed_content_hash(
+        self, tmp_path, make_spl_xml
+    ):
+
+        cache = SPLCache(str(tmp_path))
+        document = make_spl_xml(set_id="a", version_number=3)
+
+        cached = cache.add(io.BytesIO(document))
+
+        assert cached.content_hash == parse_spl(io.BytesIO(document)).content_hash
+        assert (cached.set_id, cached.version_number) == ("a", 3)
+        with open(cache.get(cached.content_hash).path, "rb") as f:
+            assert f.read() == document
+
+    def test_looks_up_labels_by_set_id_and_version(self, tmp_path, make_spl_xml):
+
+        cache = SPLCache(str(tmp_path))
+        first = _add(cache, make_spl_xml, set_id="a", version_number=1)
+        second = _add(cache, make_spl_xml, set_id="a", version_number=2)
+        other = _add(cache, make_spl_xml, set_id="b")
+
+        assert cache.lookup("a") == second
+        assert cache.lookup("a", 1) == first
+        assert cache.lookup("a", 5) is None
+        assert cache.lookup("c") is None
+        assert list(cache.latest()) == [second, other]
+
+    def test_identical_documents_are_stored_once(self, tmp_path, make_spl_xml):
+
+        cache = SPLCache(str(tmp_path))
+
+        first = _add(cache, make_spl_xml)
+        again = _add(cache, make_spl_xml)
+
+        assert first == again
+        assert cache.size() == first.size
+
+    def test_evicts_least_recently_used_documents(
+        self, tmp_path, make_spl_xml, monkeypatch
+    ):
+
+        monkeypatch.setattr(cache_module, "TOUCH_INTERVAL_SECONDS", -1)
+        size = len(make_spl_xml(set_id="a"))
+        cache = SPLCache(str(tmp_path), max_bytes=int(size * 2.5))
+        a = _add(cache, make_spl_xml, set_id="a")
+        b = _add(cache, make_spl_xml, set_id="b")
+        cache.lookup("a")
+
+        c = _add(cache, make_spl_xml, set_id="c")
+
+        assert cache.lookup("b") is None
+        assert cache.get(b.content_hash) is None
+        assert cache.lookup("a") == a
+        assert cache.lookup("c") == c
+        assert cache.size() == a.size + c.size
+        assert sorted(p.name for p in (tmp_path / "objects").rglob("*.xml")) == sorted(
+            f"{d.content_hash}.xml" for d in (a, c)
+        )
+
+    def test_listing_the_latest_documents_counts_as_use(
+        self, tmp_path, make_spl_xml, monkeypatch
+    ):
+
+        monkeypatch.setattr(cache_module, "TOUCH_INTERVAL_SECONDS", -1)
+        monkeypatch.setattr(cache_module, "TOUCH_BATCH_SIZE", 1)
+        size = len(make_spl_xml(set_id="a"))
+        cache = SPLCache(str(tmp_path), max_bytes=int(size * 2.5))
+        b = _add(cache, make_spl_xml, set_id="b")
+        a = _add(cache, make_spl_xml, set_id="a")
+        # listed in set id order, so b is used last
+        assert list(cache.latest()) == [a, b]
+
+        _add(cache, make_spl_xml, set_id="c")
+
+        assert cache.lookup("a") is None
+        assert cache.lookup("b") == b
+
+    def test_adds_the_document_of_a_label_zip(self, tmp_path, make_spl_xml):
+
+        path = tmp_path / "label.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("label.xml", make_spl_xml(set_id="a"))
+            archive.writestr("image.jpg", b"\xff\xd8")
+        cache = SPLCache(str(tmp_path / "cache"))
+
+        [cached] = cache.add_file(str(path))
+
+        assert cache.lookup("a") == cached
+        assert cached.size == len(make_spl_xml(set_id="a"))
+
+    def test_concurrent_writers_share_one_index(self, tmp_path, make_spl_xml):
+
+        # one SPLCache per thread, as separate ingestion processes would have
+        errors = []
+
+        def add_labels(worker):
+            try:
+                cache = SPLCache(str(tmp_path))
+                for i in range(10):
+                    _add(cache, make_spl_xml, set_id=f"s{i}", version_number=worker)
+                cache.close()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=add_labels, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cache = SPLCache(str(tmp_path))
+        assert errors == []
+        assert [c.version_number for c in cache.latest()] == [3] * 10
+        assert cache.size() == sum(
+            len(make_spl_xml(set_id=f"s{i}", version_number=w))
+            for i in range(10)
+            for w in range(4)
+        )
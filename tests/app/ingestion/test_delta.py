@@ -0,0 +1,83 @@
+import io
+from datetime import date
+
+from medsearch_api.app.ingestion.delta import (
+    DeltaFilter,
+    SPLFingerprint,
+    find_changed,
+    fingerprint_spl,
+)
+from medsearch_api.app.ingestion.pool import iter_spl_sources, run_ingestion
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+from medsearch_api.app.ingestion.writer import SPLBatchWriter
+
+
+class TestFingerprintSPL:
+    def test_reads_header_and_hashes_whole_document(self, make_spl_xml):
+
+        xml = make_spl_xml(set_id="a", version_number=3, effective_time="20240220")
+
+        fingerprint = fingerprint_spl(io.BytesIO(xml))
+
+        assert fingerprint.set_id == "a"
+        assert fingerprint.version_number == 3
+        assert fingerprint.effective_date == date(2024, 2, 20)
+        assert fingerprint.content_hash == parse_spl(io.BytesIO(xml)).content_hash
+
+    def test_does_not_parse_document_body(self, make_spl_xml):
+
+        xml = make_spl_xml(set_id="a").replace(b"</section>", b"</broken>")
+
+        fingerprint = fingerprint_spl(io.BytesIO(xml))
+
+        assert fingerprint.set_id == "a"
+
+    def test_hash_changes_with_content(self, make_spl_xml):
+
+        first = fingerprint_spl(io.BytesIO(make_spl_xml(name="One")))
+        second = fingerprint_spl(io.BytesIO(make_spl_xml(name="Two")))
+
+        assert first.set_id == second.set_id
+        assert first.content_hash != second.content_hash
+
+
+class TestFindChanged:
+    def test_only_new_or_modified_documents_are_changed(
+        self, sqlite_engine, make_spl_xml
+    ):
+
+        stored = make_spl_xml(set_id="a")
+        SPLBatchWriter(sqlite_engine).write([parse_spl(io.BytesIO(stored))])
+        unchanged = fingerprint_spl(io.BytesIO(stored))
+        modified = fingerprint_spl(io.BytesIO(make_spl_xml(set_id="a", name="New")))
+        new = fingerprint_spl(io.BytesIO(make_spl_xml(set_id="b")))
+        no_set_id = SPLFingerprint(None, None, None, "hash")
+
+        with sqlite_engine.connect() as conn:
+            changed = find_changed(conn, [unchanged, modified, new, no_set_id])
+
+        assert changed == [modified, new, no_set_id]
+
+
+class TestDeltaIngestion:
+    def test_second_run_skips_unchanged_documents(
+        self, sqlite_engine, tmp_path, make_spl_xml
+    ):
+
+        for i in range(4):
+            (tmp_path / f"{i}.xml").write_bytes(make_spl_xml(set_id=f"set-{i}"))
+        writer = SPLBatchWriter(sqlite_engine)
+
+        def ingest():
+            return run_ingestion(
+                iter_spl_sources(str(tmp_path)),
+                writer.write,
+                change_filter=DeltaFilter(sqlite_engine),
+            )
+
+        first = ingest()
+        (tmp_path / "2.xml").write_bytes(make_spl_xml(set_id="set-2", version_number=2))
+        second = ingest()
+
+        assert (first.parsed, first.skipped) == (4, 0)
+        assert (second.parsed, second.skipped) == (1, 3)
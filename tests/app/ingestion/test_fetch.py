@@ -0,0 +1,193 @@
+import json
+import threading
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from medsearch_api.app.ingestion.cache import SPLCache
+from medsearch_api.app.ingestion.fetch import (
+    FetchStatus,
+    RetryPolicy,
+    SPLDirectory,
+    SPLFetcher,
+)
+
+NO_WAIT = RetryPolicy(attempts=3, base_seconds=0, max_seconds=0)
+
+
+class StubDailyMed:
+    """
+    Serves /spls/<set_id>.xml from documents, honoring If-None-Match. Each
+    path can be given statuses to answer with first, e.g. [503, 503].
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.failures = defaultdict(deque)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        set_id = handler.path.rsplit("/", 1)[-1].removesuffix(".xml")
+        with self.lock:
+            self.requests.append((set_id, handler.headers.get("If-None-Match")))
+            failure = self.failures[set_id].popleft() if self.failures[set_id] else None
+        body = self.documents.get(set_id)
+        etag = f'"{hash(body)}"'
+        if failure is not None:
+            handler.send_response(failure)
+            handler.send_header("Retry-After", "0")
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+        elif body is None:
+            handler.send_response(404)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+        elif handler.headers.get("If-None-Match") == etag:
+            handler.send_response(304)
+            handler.end_headers()
+        else:
+            handler.send_response(200)
+            handler.send_header("ETag", etag)
+            handler.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+
+
+@pytest.fixture
+def dailymed():
+    stub = StubDailyMed()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            stub.handle(self)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.url = f"http://127.0.0.1:{server.server_port}"
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(dailymed, tmp_path):
+    with SPLFetcher(
+        SPLDirectory(str(tmp_path)), dailymed.url, workers=4, retry=NO_WAIT
+    ) as fetcher:
+        yield fetcher
+
+
+class TestSPLFetcher:
+    def test_downloads_documents_with_their_validators(self, dailymed, fetcher):
+
+        dailymed.documents = {"a": b"<document>a</document>", "b": b"<document/>"}
+
+        stats = fetcher.fetch_all(["a", "b"])
+
+        assert (stats.documents, stats.downloaded, stats.failed) == (2, 2, 0)
+        assert stats.bytes == 33
+        with open(fetcher.directory.document_path("a"), "rb") as f:
+            assert f.read() == b"<document>a</document>"
+        with open(fetcher.directory.validators_path("a")) as f:
+            assert json.load(f)["last_modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    def test_unchanged_documents_are_not_downloaded_again(self, dailymed, fetcher):
+
+        dailymed.documents = {"a": b"<document>a</document>", "b": b"<document/>"}
+        fetcher.fetch_all(["a", "b"])
+        dailymed.documents["b"] = b"<document>new</document>"
+
+        stats = fetcher.fetch_all(["a", "b"])
+
+        assert (stats.unchanged, stats.downloaded) == (1, 1)
+        assert all(etag for _, etag in dailymed.requests[2:])
+        with open(fetcher.directory.document_path("b"), "rb") as f:
+            assert f.read() == b"<document>new</document>"
+
+    def test_missing_document_is_fetched_unconditionally(
+        self, dailymed, fetcher, tmp_path
+    ):
+
+        dailymed.documents = {"a": b"<document/>"}
+        fetcher.fetch("a")
+        (tmp_path / "a.xml").unlink()
+
+        result = fetcher.fetch("a")
+
+        assert result.status is FetchStatus.DOWNLOADED
+        assert dailymed.requests[-1] == ("a", None)
+
+    def test_retries_server_errors(self, dailymed, fetcher):
+
+        dailymed.documents = {"a": b"<document/>"}
+        dailymed.failures["a"].extend([503, 429])
+
+        result = fetcher.fetch("a")
+
+        assert result.status is FetchStatus.DOWNLOADED
+        assert result.attempts == 3
+
+    def test_gives_up_after_the_last_attempt(self, dailymed, fetcher, tmp_path):
+
+        dailymed.documents = {"a": b"<document/>"}
+        dailymed.failures["a"].extend([500] * 3)
+
+        stats = fetcher.fetch_all(["a"])
+
+        assert stats.failed == 1
+        assert stats.failures[0].error == "HTTP 500"
+        assert list(tmp_path.iterdir()) == []
+
+    def test_client_errors_are_not_retried(self, dailymed, fetcher):
+
+        result = fetcher.fetch("unknown")
+
+        assert result.status is FetchStatus.FAILED
+        assert result.attempts == 1
+
+    def test_rejects_set_ids_that_are_not_file_names(self, dailymed, fetcher):
+
+        result = fetcher.fetch("../a")
+
+        assert result.status is FetchStatus.FAILED
+        assert dailymed.requests == []
+
+    def test_fetches_many_labels_concurrently(self, dailymed, fetcher):
+
+        set_ids = [f"s{i}" for i in range(50)]
+        dailymed.documents = {s: f"<document>{s}</document>".encode() for s in set_ids}
+
+        stats = fetcher.fetch_all(set_ids)
+
+        assert stats.downloaded == 50
+        assert sorted(s for s, _ in dailymed.requests) == sorted(set_ids)
+
+    def test_adds_downloads_to_the_cache(self, dailymed, tmp_path, make_spl_xml):
+
+        dailymed.documents = {"a": make_spl_xml(set_id="a", version_number=2)}
+        cache = SPLCache(str(tmp_path / "cache"))
+        with SPLFetcher(
+            SPLDirectory(str(tmp_path / "labels")), dailymed.url, cache=cache
+        ) as fetcher:
+            fetcher.fetch("a")
+
+        assert cache.lookup("a", 2).size == len(dailymed.documents["a"])
+
+
+class TestRetryPolicy:
+    def test_backoff_is_jittered_and_capped(self):
+
+        policy = RetryPolicy(base_seconds=1, max_seconds=5)
+
+        assert all(0 <= policy.delay(1) <= 2 for _ in range(100))
+        assert all(policy.delay(10) <= 5 for _ in range(100))
+        assert policy.delay(0, retry_after=60) == 5
@@ -0,0 +1,118 @@
+import io
+
+from sqlalchemy import create_engine, event, select
+
+from medsearch_api.app.database.models import MedSearchBaseModel, SPLParsingIssue
+from medsearch_api.app.ingestion.delta import DeltaFilter, fingerprint_spl
+from medsearch_api.app.ingestion.issues import (
+    ParsingIssueRecord,
+    ParsingIssueStore,
+    error_fingerprint,
+    xml_structure,
+)
+from medsearch_api.app.ingestion.pool import iter_spl_sources, run_ingestion
+from medsearch_api.app.ingestion.writer import WriterPool
+
+
+def _issue(spl_id=1, error="mismatched tag: line 3, column 4", content_hash="h1"):
+    return ParsingIssueRecord(
+        spl_id=spl_id,
+        error=error,
+        content_hash=content_hash,
+        xml_content="<document>" + "x" * 10_000,
+        xml_structure="document",
+    )
+
+
+def _issues(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(
+                SPLParsingIssue.spl_id,
+                SPLParsingIssue.content_hash,
+                SPLParsingIssue.occurrences,
+            ).order_by(SPLParsingIssue.id)
+        ).all()
+
+
+class TestErrorFingerprint:
+    def test_ignores_positions_and_whitespace(self):
+
+        assert error_fingerprint("bad tag: line 3, column 4") == error_fingerprint(
+            "bad  tag: line 17, column 12 "
+        )
+        assert error_fingerprint("bad tag") != error_fingerprint("bad date")
+
+
+class TestXMLStructure:
+    def test_outlines_elements_up_to_the_error(self):
+
+        structure = xml_structure("<document><title/><section><a></b></section>")
+
+        assert structure == "document\n  title\n  section\n    a"
+
+
+class TestParsingIssueStore:
+    def test_repeats_bump_occurrences_instead_of_adding_rows(self, sqlite_engine):
+        store = ParsingIssueStore()
+
+        with sqlite_engine.begin() as conn:
+            assert store.record(conn, [_issue(), _issue(), _issue(spl_id=2)]) == 2
+        with sqlite_engine.begin() as conn:
+            assert (
+                store.record(conn, [_issue(error="mismatched tag: line 9, column 1")])
+                == 0
+            )
+            assert store.record(conn, [_issue(content_hash="h2")]) == 1
+
+        assert _issues(sqlite_engine) == [(1, "h1", 3), (2, "h1", 1), (1, "h2", 1)]
+
+    def test_known_issues_are_not_rewritten(self, sqlite_engine):
+        store = ParsingIssueStore()
+        with sqlite_engine.begin() as conn:
+            store.record(conn, [_issue()])
+        statements = []
+        event.listen(
+            sqlite_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+        with sqlite_engine.begin() as conn:
+            store.record(conn, [_issue()] * 5)
+
+        # one keyed lookup and one update, no insert carrying the xml
+        assert [s.split()[0] for s in statements] == ["SELECT", "UPDATE"]
+        assert _issues(sqlite_engine) == [(1, "h1", 6)]
+
+
+class TestParsingIssueIngestion:
+    def test_label_failing_again_bumps_its_issue(self, tmp_path, make_spl_xml):
+
+        # in-memory sqlite databases are per connection, so use a file
+        engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+        MedSearchBaseModel.metadata.create_all(engine)
+        labels = tmp_path / "labels"
+        labels.mkdir()
+        (labels / "a.xml").write_bytes(make_spl_xml(set_id="a"))
+        malformed = make_spl_xml(set_id="a", version_number=2).replace(
+            b"</section>", b"</broken>"
+        )
+
+        def ingest():
+            with WriterPool(engine, writers=1) as writers:
+                return run_ingestion(
+                    iter_spl_sources(str(labels)),
+                    writers.submit,
+                    change_filter=DeltaFilter(engine),
+                    failure_sink=writers.submit_failures,
+                )
+
+        ingest()
+        (labels / "a.xml").write_bytes(malformed)
+        first, second = ingest(), ingest()
+
+        assert (first.failed, second.failed) == (1, 1)
+        content_hash = fingerprint_spl(io.BytesIO(malformed)).content_hash
+        assert _issues(engine) == [(1, content_hash, 2)]
+        engine.dispose()
@@ -0,0 +1,54 @@
+import pytest
+
+from medsearch_api.app.ingestion.ndc import (
+    NDC_CODE_SYSTEM,
+    normalize_ndc,
+    normalized_med_code,
+)
+
+
+class TestNormalizeNDC:
+    @pytest.mark.parametrize(
+        "code",
+        [
+            "0002-3227-30",
+            "00002-3227-3",
+            "00002-3227-30",
+            "00002322730",
+            "0002-3227",
+            "00002-3227",
+            "000023227",
+            " 00002-3227 ",
+        ],
+    )
+    def test_layouts_normalize_to_the_same_product_code(self, code):
+
+        assert normalize_ndc(code) == "000023227"
+
+    def test_pads_the_short_segment(self):
+
+        assert normalize_ndc("1234-5678-90") == "012345678"
+        assert normalize_ndc("12345-678-90") == "123450678"
+        assert normalize_ndc("12345-6789-0") == "123456789"
+        assert normalize_ndc("12345678901") == "123456789"
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            None,
+            "",
+            "1234567890",
+            "123-4567-89",
+            "12345-67890",
+            "1234a-5678",
+            "１２３４５６７８９",
+        ],
+    )
+    def test_rejects_ambiguous_and_malformed_codes(self, code):
+
+        assert normalize_ndc(code) is None
+
+    def test_only_ndc_med_codes_are_normalized(self):
+
+        assert normalized_med_code("0002-3227", NDC_CODE_SYSTEM) == "000023227"
+        assert normalized_med_code("0002-3227", "2.16.840.1.113883.4.9") is None
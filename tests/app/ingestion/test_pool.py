@@ -0,0 +1,127 @@
+import io
+from zipfile import ZipFile
+
+from medsearch_api.app.ingestion.pool import (
+    ParseFailure,
+    SPLSourceFile,
+    iter_spl_sources,
+    parse_source,
+    run_ingestion,
+)
+
+
+def _zip_bytes(members):
+    buf = io.BytesIO()
+    with ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+class TestIterSPLSources:
+    def test_finds_xml_zip_members_and_nested_label_zips(self, tmp_path, make_spl_xml):
+
+        (tmp_path / "a.xml").write_bytes(make_spl_xml(set_id="a"))
+        (tmp_path / "notes.txt").write_text("ignored")
+        (tmp_path / "release.zip").write_bytes(
+            _zip_bytes(
+                {
+                    "b.xml": make_spl_xml(set_id="b"),
+                    "c_label.zip": _zip_bytes(
+                        {"c.xml": make_spl_xml(set_id="c"), "c.jpg": b"img"}
+                    ),
+                }
+            )
+        )
+
+        sources = list(iter_spl_sources(str(tmp_path)))
+
+        assert [str(s).rsplit("/", 1)[-1] for s in sources] == [
+            "a.xml",
+            "release.zip!b.xml",
+            "release.zip!c_label.zip",
+        ]
+        assert [parse_source(s).spl.set_id for s in sources] == ["a", "b", "c"]
+
+    def test_parse_source_returns_failure_for_bad_document(self, tmp_path):
+
+        path = tmp_path / "bad.xml"
+        path.write_bytes(b"<document><title>")
+
+        result = parse_source(SPLSourceFile(str(path)))
+
+        assert isinstance(result, ParseFailure)
+        assert result.source == str(path)
+        assert result.xml_content == "<document><title>"
+        assert result.fingerprint.set_id is None
+
+
+class TestRunIngestion:
+    def _write_labels(self, tmp_path, make_spl_xml, count):
+        for i in range(count):
+            (tmp_path / f"{i:03d}.xml").write_bytes(make_spl_xml(set_id=f"set-{i}"))
+        (tmp_path / "broken.xml").write_bytes(b"<document>")
+
+    def test_serial_ingestion_batches_parsed_documents(self, tmp_path, make_spl_xml):
+
+        self._write_labels(tmp_path, make_spl_xml, 5)
+        batches = []
+
+        stats = run_ingestion(
+            iter_spl_sources(str(tmp_path)), batches.append, workers=1, batch_size=2
+        )
+
+        assert (stats.documents, stats.parsed, stats.failed) == (6, 5, 1)
+        assert sorted(p.spl.set_id for b in batches for p in b) == [
+            f"set-{i}" for i in range(5)
+        ]
+
+    def test_process_pool_ingestion_matches_serial(self, tmp_path, make_spl_xml):
+
+        self._write_labels(tmp_path, make_spl_xml, 7)
+        batches = []
+
+        stats = run_ingestion(
+            iter_spl_sources(str(tmp_path)), batches.append, workers=2, batch_size=2
+        )
+
+        assert (stats.documents, stats.parsed, stats.failed) == (8, 7, 1)
+        assert sorted(p.spl.set_id for b in batches for p in b) == [
+            f"set-{i}" for i in range(7)
+        ]
+
+    def test_process_pool_parses_only_documents_passing_change_filter(
+        self, tmp_path, make_spl_xml
+    ):
+
+        self._write_labels(tmp_path, make_spl_xml, 6)
+        batches = []
+
+        stats = run_ingestion(
+            iter_spl_sources(str(tmp_path)),
+            batches.append,
+            workers=2,
+            batch_size=2,
+            change_filter=lambda fps: [fp for fp in fps if fp.set_id != "set-3"],
+        )
+
+        assert (stats.documents, stats.skipped, stats.parsed) == (7, 1, 5)
+        assert "set-3" not in {p.spl.set_id for b in batches for p in b}
+
+    def test_documents_gone_before_they_are_read_are_skipped(
+        self, tmp_path, make_spl_xml
+    ):
+
+        self._write_labels(tmp_path, make_spl_xml, 2)
+        sources = list(iter_spl_sources(str(tmp_path)))
+        # e.g. evicted from the SPL cache after it was listed
+        (tmp_path / "001.xml").unlink()
+
+        stats = run_ingestion(
+            sources,
+            lambda batch: None,
+            change_filter=lambda fps: fps,
+        )
+
+        assert (stats.documents, stats.parsed, stats.missing) == (3, 1, 1)
+        assert [f.source for f in stats.failures] == [str(tmp_path / "broken.xml")]
@@ -0,0 +1,131 @@
+import io
+from datetime import date
+
+import pytest
+
+from medsearch_api.app.ingestion.records import (
+    IngredientRecord,
+    MedFormRecord,
+    OrganizationRecord,
+)
+from medsearch_api.app.ingestion.spl_parser import SPLParsingException, parse_spl
+
+SPL_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<document xmlns="urn:hl7-org:v3">
+  <id root="doc-id"/>
+  <title>AMOXICILLIN <sup>capsules</sup>, for oral use</title>
+  <effectiveTime value="20230415120000-0500"/>
+  <setId root="set-1"/>
+  <versionNumber value="7"/>
+  <author><assignedEntity><representedOrganization>
+    <id extension="123456789" root="1.3.6.1.4.1.519.1"/>
+    <name>Acme Pharma</name>
+    <assignedEntity><assignedOrganization><id extension="999" root="x"/></assignedOrganization></assignedEntity>
+  </representedOrganization></assignedEntity></author>
+  <component><structuredBody>
+    <component><section><title>Indications</title><text><paragraph>Take it.</paragraph></text></section></component>
+    <component><section><subject><manufacturedProduct><manufacturedProduct>
+      <code code="1234-5678" codeSystem="2.16.840.1.113883.6.69"/>
+      <name>Amoxil</name>
+      <formCode code="C25158" codeSystem="2.16.840.1.113883.3.26.1.1" displayName="CAPSULE"/>
+      <asEntityWithGeneric><genericMedicine><name>amoxicillin</name></genericMedicine></asEntityWithGeneric>
+      <ingredient classCode="ACTIB"><ingredientSubstance>
+        <code code="804826J2HU" codeSystem="2.16.840.1.113883.4.9"/>
+        <name>AMOXICILLIN</name>
+        <activeMoiety><activeMoiety><code code="9EM05410Q9" codeSystem="2.16.840.1.113883.4.9"/><name>AMOXICILLIN ANHYDROUS</name></activeMoiety></activeMoiety>
+      </ingredientSubstance></ingredient>
+      <ingredient classCode="IACT"><ingredientSubstance>
+        <code code="70097M6I30" codeSystem="2.16.840.1.113883.4.9"/>
+        <name>MAGNESIUM STEARATE</name>
+      </ingredientSubstance></ingredient>
+    </manufacturedProduct></manufacturedProduct></subject></section></component>
+    <component><section><subject><manufacturedProduct><manufacturedProduct>
+      <code code="1234-9999" codeSystem="2.16.840.1.113883.6.69"/>
+      <name>Second Product</name>
+    </manufacturedProduct></manufacturedProduct></subject></section></component>
+  </structuredBody></component>
+</document>
+"""
+
+
+class TestParseSPL:
+    def test_extracts_document_fields(self):
+
+        parsed = parse_spl(io.BytesIO(SPL_XML.encode()))
+
+        assert parsed.spl.set_id == "set-1"
+        assert parsed.spl.title == "AMOXICILLIN capsules, for oral use"
+        assert parsed.spl.published_date == date(2023, 4, 15)
+
+    def test_extracts_first_product_only(self):
+
+        parsed = parse_spl(io.BytesIO(SPL_XML.encode()))
+
+        assert parsed.med is not None
+        assert parsed.med.code == "1234-5678"
+        assert parsed.med.name == "Amoxil"
+        assert parsed.med.generic_name == "amoxicillin"
+        assert parsed.med.version_number == 7
+        assert parsed.med.effective_date == date(2023, 4, 15)
+        assert parsed.form == MedFormRecord(
+            "C25158", "2.16.840.1.113883.3.26.1.1", "CAPSULE"
+        )
+
+    def test_extracts_active_ingredients_only(self):
+
+        parsed = parse_spl(io.BytesIO(SPL_XML.encode()))
+
+        assert parsed.ingredients == [
+            IngredientRecord("804826J2HU", "2.16.840.1.113883.4.9", "AMOXICILLIN")
+        ]
+
+    def test_lists_an_ingredient_once_whatever_its_names(self, make_spl_xml):
+
+        xml = make_spl_xml(
+            ingredients=(("U1", "SYNTHETICOL"), ("U1", "Syntheticol"), ("U2", "TWO"))
+        )
+
+        parsed = parse_spl(io.BytesIO(xml))
+
+        assert [(i.code, i.name) for i in parsed.ingredients] == [
+            ("U1", "SYNTHETICOL"),
+            ("U2", "TWO"),
+        ]
+
+    def test_extracts_labeler_organization(self):
+
+        parsed = parse_spl(io.BytesIO(SPL_XML.encode()))
+
+        assert parsed.organizations == [
+            OrganizationRecord("123456789", "1.3.6.1.4.1.519.1", "Acme Pharma")
+        ]
+
+    def test_document_without_product_has_no_med(self):
+        xml = SPL_XML.split("<component><structuredBody>")[0] + "</document>"
+
+        parsed = parse_spl(io.BytesIO(xml.encode()))
+
+        assert parsed.med is None
+        assert parsed.ingredients == []
+
+    def test_raises_if_set_id_missing(self):
+        xml = SPL_XML.replace('<setId root="set-1"/>', "")
+
+        with pytest.raises(SPLParsingException):
+            parse_spl(io.BytesIO(xml.encode()))
+
+    def test_raises_if_xml_malformed(self):
+
+        with pytest.raises(SPLParsingException):
+            parse_spl(io.BytesIO(SPL_XML[:500].encode()))
+
+    def test_to_models_wires_relationships(self):
+
+        parsed = parse_spl(io.BytesIO(SPL_XML.encode()))
+        models = parsed.to_models()
+
+        med = models[1]
+        assert med.spl is models[0]
+        assert med.form.code == "C25158"
+        assert [m.ingredient.code for m in med.ingredient_maps] == ["804826J2HU"]
+        assert [m.organization.name for m in med.organization_maps] == ["Acme Pharma"]
@@ -0,0 +1,163 @@
+import io
+from dataclasses import replace
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from medsearch_api.app.database.models import (
+    SPL,
+    Ingredient,
+    Med,
+    MedIngredientMap,
+    MedOrganizationMap,
+    MedSearchBaseModel,
+    SPLDataIssue,
+)
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+from medsearch_api.app.ingestion.writer import SPLBatchWriter, WriterPool
+
+
+@pytest.fixture
+def parse(make_spl_xml):
+    return lambda **kwargs: parse_spl(io.BytesIO(make_spl_xml(**kwargs)))
+
+
+class TestSPLBatchWriter:
+    def test_writes_all_tables(self, sqlite_engine, parse):
+
+        batch = [
+            parse(set_id="a", ingredients=(("U1", "ONE"), ("U2", "TWO"))),
+            parse(set_id="b", code="0002-0002", ingredients=(("U1", "ONE"),)),
+        ]
+
+        written = SPLBatchWriter(sqlite_engine).write(batch)
+
+        with sqlite_engine.connect() as conn:
+            assert conn.execute(
+                select(SPL.set_id).order_by(SPL.set_id)
+            ).scalars().all() == ["a", "b"]
+            meds = conn.execute(select(Med.id, Med.code, Med.med_form_id)).all()
+            assert len(conn.execute(select(Ingredient.id)).all()) == 2
+            assert len(conn.execute(select(MedIngredientMap.med_id)).all()) == 3
+            assert len(conn.execute(select(MedOrganizationMap.med_id)).all()) == 2
+        assert written == 2
+        assert sorted(m.code for m in meds) == ["0001-0001", "0002-0002"]
+        assert len({m.med_form_id for m in meds}) == 1
+
+    def test_repeated_ingredients_and_organizations_are_mapped_once(
+        self, sqlite_engine, parse
+    ):
+
+        parsed = parse(set_id="a", ingredients=(("U1", "ONE"),))
+        parsed.ingredients.append(replace(parsed.ingredients[0], name="One"))
+        parsed.organizations.append(replace(parsed.organizations[0], name="Other"))
+
+        SPLBatchWriter(sqlite_engine).write([parsed])
+
+        with sqlite_engine.connect() as conn:
+            assert len(conn.execute(select(MedIngredientMap.med_id)).all()) == 1
+            assert len(conn.execute(select(MedOrganizationMap.med_id)).all()) == 1
+
+    def test_rewrite_updates_rows_in_place_and_replaces_maps(
+        self, sqlite_engine, parse
+    ):
+
+        writer = SPLBatchWriter(sqlite_engine)
+        writer.write([parse(set_id="a", ingredients=(("U1", "ONE"),))])
+        writer.write(
+            [parse(set_id="a", version_number=2, ingredients=(("U2", "TWO"),))]
+        )
+
+        with sqlite_engine.connect() as conn:
+            meds = conn.execute(select(Med.id, Med.version_number)).all()
+            maps = (
+                conn.execute(select(Ingredient.code).join(MedIngredientMap))
+                .scalars()
+                .all()
+            )
+        assert [m.version_number for m in meds] == [2]
+        assert maps == ["U2"]
+
+    def test_stores_order_independent_ingredient_fingerprint(
+        self, sqlite_engine, parse
+    ):
+
+        writer = SPLBatchWriter(sqlite_engine)
+        writer.write(
+            [
+                parse(set_id="a", ingredients=(("U1", "ONE"), ("U2", "TWO"))),
+                parse(set_id="b", code="2", ingredients=(("U2", "TWO"), ("U1", "ONE"))),
+                parse(set_id="c", code="3", ingredients=(("U1", "ONE"),)),
+            ]
+        )
+        writer.write(
+            [parse(set_id="c", code="3", ingredients=(("U2", "TWO"), ("U1", "ONE")))]
+        )
+
+        with sqlite_engine.connect() as conn:
+            fingerprints = (
+                conn.execute(select(Med.ingredient_fingerprint)).scalars().all()
+            )
+        assert len(fingerprints) == 3
+        assert len(set(fingerprints)) == 1
+        assert fingerprints[0] is not None
+
+    def test_stores_normalized_ndc(self, sqlite_engine, parse):
+
+        SPLBatchWriter(sqlite_engine).write(
+            [parse(set_id="a", code="0001-0001"), parse(set_id="b", code="bad")]
+        )
+
+        with sqlite_engine.connect() as conn:
+            codes = conn.execute(
+                select(Med.normalized_code).order_by(Med.code)
+            ).scalars()
+            assert codes.all() == ["000010001", None]
+
+    def test_med_missing_required_fields_is_recorded_as_data_issue(
+        self, sqlite_engine, parse
+    ):
+
+        parsed = parse(set_id="a", generic_name="")
+
+        SPLBatchWriter(sqlite_engine).write([parsed])
+
+        with sqlite_engine.connect() as conn:
+            assert conn.execute(select(Med.id)).all() == []
+            issue = conn.execute(select(SPLDataIssue)).one()
+        assert issue.table_name == "meds"
+        assert "generic_name" in issue.error_message
+
+    def test_med_dropped_from_a_new_version_is_soft_deleted(self, sqlite_engine, parse):
+
+        writer = SPLBatchWriter(sqlite_engine)
+        writer.write([parse(set_id="a"), parse(set_id="b", code="0002-0002")])
+        without_med = parse(set_id="a", version_number=2)
+        without_med.med = None
+
+        writer.write([without_med, parse(set_id="b", version_number=2, name="")])
+
+        with sqlite_engine.connect() as conn:
+            meds = conn.execute(select(Med.deleted_at)).all()
+        assert len(meds) == 2
+        assert all(med.deleted_at is not None for med in meds)
+
+
+class TestWriterPool:
+    def test_writes_batches_from_all_threads(self, tmp_path, parse):
+
+        # in-memory sqlite databases are per connection, so use a file
+        engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+        MedSearchBaseModel.metadata.create_all(engine)
+
+        with WriterPool(engine, writers=1) as writers:
+            for i in range(5):
+                writers.submit([parse(set_id=f"set-{i}")])
+
+        assert writers.written == 5
+
+    def test_close_reraises_writer_errors(self, sqlite_engine):
+
+        with pytest.raises(AttributeError):
+            with WriterPool(sqlite_engine, writers=1) as writers:
+                writers.submit([object()])
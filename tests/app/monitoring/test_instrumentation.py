@@ -0,0 +1,167 @@
+import logging
+
+import pytest
+from prometheus_client import multiprocess, values
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from medsearch_api.app.db import db
+from medsearch_api.app.monitoring.instrumentation import (
+    MULTIPROCESS_DIR_VARIABLE,
+    Instrumentation,
+    fingerprint,
+)
+from medsearch_api.run_api import create_app
+
+
+def _samples(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    return response.get_data(as_text=True).splitlines()
+
+
+class TestFingerprint:
+    def test_ignores_literals_in_list_lengths_and_whitespace(self):
+
+        assert fingerprint(
+            "SELECT * FROM meds\n WHERE id IN (?, ?, ?) AND name = 'x' LIMIT 10"
+        ) == fingerprint(
+            "SELECT * FROM meds WHERE id IN (%s, %s) AND name = 'y''s' LIMIT 5"
+        )
+
+
+class TestInstrumentation:
+    def test_records_queries_per_request(self, client, ingest):
+
+        ingest({})
+        client.get("/meds/1")
+
+        lines = _samples(client)
+
+        assert (
+            'medsearch_http_requests_total{endpoint="meds.med_detail",status="200"} 1.0'
+            in lines
+        )
+        # MED_DETAIL always takes three queries
+        assert (
+            'medsearch_db_queries_per_request_sum{endpoint="meds.med_detail"} 3.0'
+            in lines
+        )
+        assert any(
+            line.startswith(
+                'medsearch_db_query_duration_seconds_count{engine="default"}'
+            )
+            for line in lines
+        )
+        assert 'medsearch_db_pool_overflow{engine="default"} 0.0' in lines
+
+    def test_logs_slow_requests_with_fingerprints(self, app, client, ingest, caplog):
+
+        ingest({})
+        app.extensions["instrumentation"].slow_request_seconds = 0
+
+        with caplog.at_level(logging.WARNING):
+            client.get("/meds/1")
+
+        (record,) = [r for r in caplog.records if "Slow request" in r.getMessage()]
+        assert "3 queries" in record.getMessage()
+        assert "FROM meds" in record.getMessage()
+        assert (
+            'medsearch_http_slow_requests_total{endpoint="meds.med_detail"} 1.0'
+            in _samples(client)
+        )
+
+
+class TestPoolGauges:
+    def test_follow_the_pool_as_connections_come_and_go(self, tmp_path):
+
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=QueuePool,
+            pool_size=2,
+            max_overflow=3,
+        )
+        instrumentation = Instrumentation(slow_request_seconds=1)
+        instrumentation.instrument_engine(engine, "default")
+        registry = instrumentation.registry
+
+        def gauges():
+            return [
+                registry.get_sample_value(name, {"engine": "default"})
+                for name in (
+                    "medsearch_db_pool_checked_out",
+                    "medsearch_db_pool_overflow",
+                    "medsearch_db_pool_size",
+                )
+            ]
+
+        connections = [engine.connect() for _ in range(4)]
+        assert gauges() == [4, 2, 2]
+        for conn in connections:
+            conn.close()
+            assert gauges() == [engine.pool.checkedout(), engine.pool.overflow(), 2]
+        assert gauges() == [0, 0, 2]
+        engine.dispose()
+
+
+def _worker(pid, monkeypatch):
+    """
+    Instrumentation as the process with this pid would create it.
+    """
+    monkeypatch.setattr(values, "ValueClass", values.MultiProcessValue(lambda: pid))
+    instrumentation = Instrumentation(slow_request_seconds=1)
+    instrumentation.pool_size.labels("default").set(10)
+    return instrumentation
+
+
+class TestMultiprocess:
+    def test_merges_the_metrics_of_every_process(self, tmp_path, monkeypatch):
+
+        monkeypatch.setenv(MULTIPROCESS_DIR_VARIABLE, str(tmp_path))
+        for pid, requests in ((101, 2), (102, 1)):
+            worker = _worker(pid, monkeypatch)
+            worker.requests.labels("meds.med_detail", "200").inc(requests)
+
+        lines = worker.render().decode().splitlines()
+
+        assert (
+            'medsearch_http_requests_total{endpoint="meds.med_detail",status="200"} 3.0'
+            in lines
+        )
+        assert 'medsearch_db_pool_size{engine="default",pid="101"} 10.0' in lines
+        assert 'medsearch_db_pool_size{engine="default",pid="102"} 10.0' in lines
+
+    def test_exited_processes_keep_their_totals_but_not_their_gauges(
+        self, tmp_path, monkeypatch
+    ):
+
+        monkeypatch.setenv(MULTIPROCESS_DIR_VARIABLE, str(tmp_path))
+        for pid in (101, 102):
+            worker = _worker(pid, monkeypatch)
+            worker.requests.labels("meds.med_detail", "200").inc()
+
+        multiprocess.mark_process_dead(101)
+        lines = worker.render().decode().splitlines()
+
+        assert (
+            'medsearch_http_requests_total{endpoint="meds.med_detail",status="200"} 2.0'
+            in lines
+        )
+        assert [
+            line for line in lines if line.startswith("medsearch_db_pool_size")
+        ] == ['medsearch_db_pool_size{engine="default",pid="102"} 10.0']
+
+
+@pytest.fixture
+def disabled_app():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "METRICS_ENABLED": False})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def test_metrics_disabled_is_not_found(disabled_app):
+
+    assert disabled_app.test_client().get("/metrics").status_code == 404
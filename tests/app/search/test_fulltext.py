@@ -0,0 +1,24 @@
+from sqlalchemy.dialects import mysql
+
+from medsearch_api.app.search.fulltext import (
+    _hits_query,
+    build_boolean_query,
+    search_terms,
+)
+
+
+class TestBooleanQuery:
+    def test_strips_operators_and_requires_prefixed_terms(self):
+
+        terms = search_terms('Amoxi-cillin +"clav" (500mg)*')
+
+        assert build_boolean_query(terms) == "+amoxi* +cillin* +clav* +500mg*"
+
+    def test_mysql_hits_use_fulltext_match(self):
+
+        sql = str(_hits_query("mysql", ["amox"]).compile(dialect=mysql.dialect()))
+
+        assert "MATCH (meds.name, meds.generic_name) AGAINST" in sql
+        assert "MATCH (ingredients.name) AGAINST" in sql
+        assert "MATCH (spls.title) AGAINST" in sql
+        assert "LIKE" not in sql
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+
+from medsearch_api.app.database.models import SPL, Ingredient, Med, MedIngredientMap
+from medsearch_api.app.search import ingredient_index
+from medsearch_api.app.search.ingredient_index import (
+    IngredientIndex,
+    IngredientPostings,
+    IngredientQueryException,
+)
+
+
+@pytest.fixture
+def postings():
+    index = IngredientPostings()
+    index.replace(
+        {
+            1: {10, 20},
+            2: {10, 20, 30},
+            3: {10},
+            4: {20, 30},
+            5: {40},
+        }
+    )
+    return index
+
+
+class TestIngredientPostings:
+    def test_all_any_none(self, postings):
+
+        assert postings.query(all_of=[10, 20]) == [1, 2]
+        assert postings.query(all_of=[10, 20], none_of=[30]) == [1]
+        assert postings.query(any_of=[30, 40]) == [2, 4, 5]
+        assert postings.query(all_of=[20], any_of=[10, 40], none_of=[30]) == [1]
+        assert postings.query(all_of=[10, 99]) == []
+
+    def test_probes_long_lists_with_bisect(self, postings, monkeypatch):
+
+        monkeypatch.setattr(ingredient_index, "PROBE_RATIO", 0)
+
+        assert postings.query(all_of=[10, 20], none_of=[30]) == [1]
+
+    def test_requires_an_ingredient_to_include(self, postings):
+
+        with pytest.raises(IngredientQueryException):
+            postings.query(none_of=[10])
+
+    def test_replace_updates_lists_in_place_and_by_rebuild(self, postings, monkeypatch):
+
+        assert postings.replace({3: {10}}) == 0
+
+        monkeypatch.setattr(ingredient_index, "REBUILD_RATIO", 1.0)
+        postings.replace({6: {10}, 1: {30}})
+        assert list(postings.postings(10)) == [2, 3, 6]
+        assert list(postings.postings(30)) == [1, 2, 4]
+
+        monkeypatch.setattr(ingredient_index, "REBUILD_RATIO", 0)
+        postings.replace({2: set(), 5: set()})
+        assert list(postings.postings(10)) == [3, 6]
+        assert list(postings.postings(40)) == []
+        assert len(postings) == 4
+
+
+class TestIngredientIndex:
+    def test_refresh_reloads_meds_updated_since_last_load(self, sqlite_engine, med_row):
+
+        loaded_at = datetime(2024, 1, 1)
+        with sqlite_engine.begin() as conn:
+            conn.execute(
+                insert(Ingredient),
+                [{"id": i, "name": f"I{i}", "code": f"U{i}"} for i in (1, 2, 3)],
+            )
+            for med_id, ingredient_ids in ((1, (1, 2)), (2, (2,))):
+                conn.execute(
+                    insert(SPL).values(
+                        id=med_id,
+                        set_id=f"set-{med_id}",
+                        title="t",
+                        published_date=loaded_at.date(),
+                    )
+                )
+                conn.execute(insert(Med), med_row(med_id, updated_at=loaded_at))
+                conn.execute(
+                    insert(MedIngredientMap),
+                    [{"med_id": med_id, "ingredient_id": i} for i in ingredient_ids],
+                )
+        index = IngredientIndex(sqlite_engine)
+        assert index.query(all_of=[2]) == [1, 2]
+        assert index.watermark == loaded_at
+
+        later = loaded_at + timedelta(hours=1)
+        with sqlite_engine.begin() as conn:
+            # what the writer does: upsert the med, then replace its map rows
+            conn.execute(update(Med).where(Med.id == 2).values(updated_at=later))
+            conn.execute(insert(MedIngredientMap).values(med_id=2, ingredient_id=3))
+            conn.execute(
+                update(Med)
+                .where(Med.id == 1)
+                .values(deleted_at=later, updated_at=later)
+            )
+
+        assert index.refresh() == 2
+        assert index.query(any_of=[1, 2, 3]) == [2]
+        assert index.query(all_of=[2, 3]) == [2]
+        assert index.watermark == later
+
+    def test_refresh_reads_meds_committed_after_a_later_load(
+        self, sqlite_engine, med_row
+    ):
+
+        loaded_at = datetime(2024, 1, 1)
+        with sqlite_engine.begin() as conn:
+            conn.execute(insert(Ingredient).values(id=1, name="I1", code="U1"))
+            for med_id, updated_at in (
+                (1, loaded_at),
+                (2, loaded_at - timedelta(minutes=1)),
+            ):
+                conn.execute(
+                    insert(SPL).values(
+                        id=med_id,
+                        set_id=f"set-{med_id}",
+                        title="t",
+                        published_date=loaded_at.date(),
+                    )
+                )
+                conn.execute(insert(Med), med_row(med_id, updated_at=updated_at))
+            conn.execute(insert(MedIngredientMap).values(med_id=1, ingredient_id=1))
+        index = IngredientIndex(sqlite_engine)
+        assert index.query(all_of=[1]) == [1]
+
+        # med 2 was stamped before the load, but its map rows commit after it
+        with sqlite_engine.begin() as conn:
+            conn.execute(insert(MedIngredientMap).values(med_id=2, ingredient_id=1))
+
+        assert index.refresh() == 1
+        assert index.query(all_of=[1]) == [1, 2]
+        assert index.watermark == loaded_at
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+
+from medsearch_api.app.database.models import SPL, Ingredient, Med
+from medsearch_api.app.search.name_index import NameIndex
+
+
+def texts(suggestions):
+    return [s.text for s in suggestions]
+
+
+class TestNameIndex:
+    def insert_med(self, conn, med_id, name, generic_name, updated_at):
+        conn.execute(
+            insert(SPL).values(
+                id=med_id,
+                set_id=f"set-{med_id}",
+                title="t",
+                published_date=updated_at.date(),
+            )
+        )
+        conn.execute(
+            insert(Med).values(
+                id=med_id,
+                spl_id=med_id,
+                code=f"{med_id:05d}-0001",
+                code_system="2.16.840.1.113883.6.69",
+                name=name,
+                generic_name=generic_name,
+                effective_date=updated_at.date(),
+                version_number=1,
+                updated_at=updated_at,
+            )
+        )
+
+    def test_refresh_only_applies_rows_updated_since_last_load(self, sqlite_engine):
+
+        loaded_at = datetime(2024, 1, 1)
+        with sqlite_engine.begin() as conn:
+            self.insert_med(conn, 1, "Amoxil", "amoxicillin", loaded_at)
+            self.insert_med(
+                conn, 2, "Zyrtec", "cetirizine", loaded_at - timedelta(days=1)
+            )
+            conn.execute(
+                insert(Ingredient).values(
+                    id=1, name="AMOXICILLIN", code="U1", updated_at=loaded_at
+                )
+            )
+        index = NameIndex(sqlite_engine)
+        index.refresh()
+        # equal weights: 3 for the med name, 2 + 1 for generic and ingredient name
+        assert texts(index.complete("am")) == ["amoxicillin", "Amoxil"]
+        assert index.watermark == loaded_at
+
+        later = loaded_at + timedelta(hours=1)
+        with sqlite_engine.begin() as conn:
+            conn.execute(
+                update(Med)
+                .where(Med.id == 1)
+                .values(deleted_at=later, updated_at=later)
+            )
+            self.insert_med(conn, 3, "Amlodine", "amlodipine", later)
+            # changed behind updated_at's back, so the refresh must not see it
+            conn.execute(
+                update(Med)
+                .where(Med.id == 2)
+                .values(name="Amzyr", updated_at=Med.updated_at)
+            )
+
+        changed = index.refresh()
+
+        # med 1's two names out, med 3's two names in, ingredient 1 re-read unchanged
+        assert changed == 4
+        assert texts(index.complete("am")) == [
+            "Amlodine",
+            "amlodipine",
+            "amoxicillin",
+        ]
+        assert index.watermark == later
+
+    def test_refresh_reads_rows_committed_after_a_later_load(self, sqlite_engine):
+
+        loaded_at = datetime(2024, 1, 1)
+        with sqlite_engine.begin() as conn:
+            self.insert_med(conn, 1, "Amoxil", "amoxicillin", loaded_at)
+        index = NameIndex(sqlite_engine)
+        index.refresh()
+
+        # stamped a minute before the last load, but committed after it
+        with sqlite_engine.begin() as conn:
+            self.insert_med(
+                conn, 2, "Amlodine", "amlodipine", loaded_at - timedelta(minutes=1)
+            )
+
+        assert index.refresh() == 2
+        assert "Amlodine" in texts(index.complete("am"))
+        assert index.watermark == loaded_at
+
+    def test_complete_loads_on_first_use(self, sqlite_engine):
+
+        with sqlite_engine.begin() as conn:
+            self.insert_med(conn, 1, "Amoxil", "amoxicillin", datetime(2024, 1, 1))
+        index = NameIndex(sqlite_engine, refresh_seconds=3600)
+
+        assert texts(index.complete("amox")) == ["Amoxil", "amoxicillin"]
+        assert index.refreshed_at is not None
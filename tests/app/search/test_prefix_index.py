@@ -0,0 +1,87 @@
+import threading
+
+from medsearch_api.app.search.autocomplete import PrefixIndex
+from medsearch_api.app.search.names import GENERIC_NAME, INGREDIENT_NAME, MED_NAME
+
+
+def texts(suggestions):
+    return [s.text for s in suggestions]
+
+
+class TestPrefixIndex:
+    def test_completes_prefix_by_weight_then_name(self):
+
+        index = PrefixIndex()
+        index.apply(
+            [
+                (INGREDIENT_NAME, 1, "AMOXICILLIN"),
+                (MED_NAME, 1, "Amoxil"),
+                (MED_NAME, 2, "Ampicillin"),
+                (MED_NAME, 3, "Aspirin"),
+                (GENERIC_NAME, 1, "amoxicillin"),
+            ]
+        )
+
+        suggestions = index.complete("  AM ")
+
+        assert texts(suggestions) == ["AMOXICILLIN", "Amoxil", "Ampicillin"]
+        assert [s.weight for s in suggestions] == [3, 3, 3]
+        assert texts(index.complete("amox", limit=1)) == ["AMOXICILLIN"]
+        assert index.complete("zz") == []
+        assert index.complete(" ") == []
+
+    def test_names_shared_by_rows_rank_higher(self):
+
+        index = PrefixIndex()
+        index.apply([(MED_NAME, 1, "Ibuprofen"), (MED_NAME, 2, "Ibuprofen IB")])
+        index.apply([(GENERIC_NAME, i, "ibuprofen ib") for i in range(3)])
+
+        assert [(s.text, s.weight) for s in index.complete("ibu")] == [
+            ("Ibuprofen IB", 9),
+            ("Ibuprofen", 3),
+        ]
+
+    def test_changed_and_removed_rows_update_in_place(self):
+
+        index = PrefixIndex()
+        index.apply([(MED_NAME, 1, "Amoxil"), (MED_NAME, 2, "Amoxil")])
+        assert texts(index.complete("amo")) == ["Amoxil"]
+
+        changed = index.apply(
+            [(MED_NAME, 1, "Augmentin"), (MED_NAME, 2, None), (MED_NAME, 3, None)]
+        )
+
+        assert changed == 2
+        assert index.complete("amo") == []
+        assert texts(index.complete("au")) == ["Augmentin"]
+        assert len(index) == 1
+
+    def test_reapplying_changes_is_a_no_op(self):
+
+        index = PrefixIndex()
+        changes = [(MED_NAME, 1, "Amoxil"), (INGREDIENT_NAME, 1, "AMOXICILLIN")]
+        index.apply(changes)
+
+        assert index.apply(changes) == 0
+        assert [s.weight for s in index.complete("amox")] == [3, 1]
+
+    def test_lookups_during_changes_see_one_version_of_the_index(self):
+
+        index = PrefixIndex()
+        index.apply([(MED_NAME, 1, "Amoxil"), (MED_NAME, 2, "Ampicillin")])
+        totals = set()
+        done = threading.Event()
+
+        def look_up():
+            while not done.is_set():
+                totals.add(sum(s.weight for s in index.complete("am")))
+
+        reader = threading.Thread(target=look_up)
+        reader.start()
+        # row 3 moving between the names never changes their total weight
+        for i in range(2000):
+            index.apply([(MED_NAME, 3, "Ampicillin" if i % 2 else "Amoxil")])
+        done.set()
+        reader.join()
+
+        assert totals <= {6, 9}
@@ -0,0 +1,13 @@
+import pytest
+
+from medsearch_api.app.search.refresh import RefreshingIndex
+
+
+class TestRefreshingIndex:
+    def test_subclass_without_load_changes_cannot_be_created(self, sqlite_engine):
+
+        class Incomplete(RefreshingIndex):
+            pass
+
+        with pytest.raises(TypeError, match="load_changes"):
+            Incomplete(sqlite_engine)
@@ -0,0 +1,157 @@
+import os
+
+import pytest
+
+from medsearch_api.app.db import db
+from medsearch_api.app.search import snapshot as snapshot_module
+from medsearch_api.app.search.ingredient_index import IngredientIndex
+from medsearch_api.app.search.name_index import NameIndex
+from medsearch_api.app.search.snapshot import (
+    Snapshot,
+    SnapshotException,
+    SnapshotIndex,
+    build_snapshot,
+)
+
+LABELS = (
+    {
+        "set_id": "a",
+        "code": "1",
+        "name": "Amoxil",
+        "generic_name": "amoxicillin",
+        "ingredients": (("U1", "AMOXICILLIN"),),
+    },
+    {
+        "set_id": "b",
+        "code": "2",
+        "name": "Augmentin",
+        "generic_name": "amoxicillin and clavulanate",
+        "org_id": "222",
+        "org_name": "Other Pharma",
+        "ingredients": (("U1", "AMOXICILLIN"), ("U2", "CLAVULANATE")),
+    },
+    {
+        "set_id": "c",
+        "code": "3",
+        "name": "Zyrtec",
+        "generic_name": "cetirizine",
+        "form_code": "C25158",
+        "form_name": "CAPSULE",
+        "ingredients": (("U3", "CETIRIZINE"),),
+    },
+)
+
+
+def build(path) -> Snapshot:
+    with db.engine.connect() as conn:
+        build_snapshot(conn, str(path))
+    return Snapshot(str(path))
+
+
+@pytest.fixture
+def snapshot_path(app, ingest, tmp_path):
+    ingest(*LABELS)
+    return tmp_path / "search.snapshot"
+
+
+class TestSnapshot:
+    def test_answers_like_the_database_indexes(self, snapshot_path):
+
+        snapshot = build(snapshot_path)
+        names = NameIndex(db.engine)
+        ingredients = IngredientIndex(db.engine)
+
+        for prefix in ("a", "amox", "zy", "clav", "x"):
+            assert snapshot.complete(prefix) == names.complete(prefix)
+        for query in ("amoxicilin", "zirtec", "augmentn"):
+            assert snapshot.fuzzy(query) == names.fuzzy(query)
+        for all_of, any_of, none_of in (
+            ([1], [], []),
+            ([1], [], [2]),
+            ([], [2, 3], []),
+            ([99], [], []),
+        ):
+            assert snapshot.query(all_of, any_of, none_of) == ingredients.query(
+                all_of, any_of, none_of
+            )
+
+    def test_describes_meds_without_the_database(self, snapshot_path):
+
+        snapshot = build(snapshot_path)
+
+        assert len(snapshot) == 3
+        med = snapshot.med(2)
+        assert med["form"]["name"] == "TABLET"
+        assert {**med, "form": None} == {
+            "id": 2,
+            "name": "Augmentin",
+            "generic_name": "amoxicillin and clavulanate",
+            "code": "2",
+            "form": None,
+            "organizations": [{"id": 2, "name": "Other Pharma"}],
+            "ingredients": [
+                {"id": 1, "name": "AMOXICILLIN", "code": "U1"},
+                {"id": 2, "name": "CLAVULANATE", "code": "U2"},
+            ],
+        }
+        assert snapshot.med(3)["form"]["name"] == "CAPSULE"
+        assert snapshot.med(99) is None
+
+    def test_empty_catalog(self, app, tmp_path):
+
+        snapshot = build(tmp_path / "empty.snapshot")
+
+        assert len(snapshot) == 0
+        assert snapshot.complete("a") == []
+        assert snapshot.fuzzy("amoxil") == []
+        assert snapshot.query([1]) == []
+        assert snapshot.watermark is None
+
+    def test_rejects_other_files_and_formats(self, snapshot_path, monkeypatch):
+
+        build(snapshot_path)
+        other = snapshot_path.with_name("other")
+        other.write_bytes(b"not a snapshot" * 10)
+        monkeypatch.setattr(snapshot_module, "FORMAT_VERSION", 2)
+
+        with pytest.raises(SnapshotException, match="not a search snapshot"):
+            Snapshot(str(other))
+        with pytest.raises(SnapshotException, match="format 1"):
+            Snapshot(str(snapshot_path))
+
+    def test_replacing_the_file_leaves_no_partial_snapshot(self, snapshot_path):
+
+        build(snapshot_path)
+        build(snapshot_path)
+
+        assert os.listdir(snapshot_path.parent) == [snapshot_path.name]
+
+
+class TestSnapshotIndex:
+    def test_swaps_in_a_newer_snapshot(self, snapshot_path, ingest):
+
+        build(snapshot_path)
+        index = SnapshotIndex(str(snapshot_path), check_seconds=0)
+        old = index.current
+        ingest({"set_id": "d", "code": "4", "name": "Amlodine"})
+        build(snapshot_path)
+
+        assert index.fuzzy("amlodine")[0].text == "Amlodine"
+        assert index.current is not old
+        # the old mapping still answers lookups that picked it up
+        assert (
+            old.fuzzy("amlodine") == [] or old.fuzzy("amlodine")[0].text != "Amlodine"
+        )
+
+    def test_keeps_the_current_snapshot_when_the_new_file_is_bad(self, snapshot_path):
+
+        build(snapshot_path)
+        index = SnapshotIndex(str(snapshot_path), check_seconds=0)
+        current = index.current
+        broken = snapshot_path.with_name("broken")
+        broken.write_bytes(b"garbage")
+        os.replace(broken, snapshot_path)
+
+        assert index.reload() is False
+        assert index.current is current
+        assert index.complete("amox")[0].text == "amoxicillin"
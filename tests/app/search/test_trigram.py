@@ -0,0 +1,81 @@
+from medsearch_api.app.search import trigram
+from medsearch_api.app.search.names import (
+    GENERIC_NAME,
+    INGREDIENT_NAME,
+    MED_NAME,
+    NameRows,
+)
+from medsearch_api.app.search.trigram import TrigramIndex, edit_distance, trigrams
+
+
+def build(changes):
+    rows = NameRows()
+    index = TrigramIndex()
+    index.update(rows.diff(changes))
+    return rows, index
+
+
+class TestTrigrams:
+    def test_pads_each_word(self):
+
+        assert trigrams("Ab-c") == {"  a", " ab", "ab ", "  c", " c "}
+        assert trigrams("--") == set()
+
+    def test_edit_distance(self):
+
+        assert edit_distance("amoxicilin", "amoxicillin") == 1
+        assert edit_distance("metforman", "metformin") == 1
+        assert edit_distance("", "abc") == 3
+        assert edit_distance("kitten", "sitting") == 3
+        assert edit_distance("kitten", "sitting", maximum=1) == 2
+        assert edit_distance("a", "abcdef", maximum=2) == 3
+
+
+class TestTrigramIndex:
+    def test_finds_misspelled_names_ranked_by_edit_distance(self):
+
+        _, index = build(
+            [
+                (GENERIC_NAME, 1, "amoxicillin"),
+                (INGREDIENT_NAME, 1, "AMOXICILLIN"),
+                (GENERIC_NAME, 2, "ampicillin"),
+                (GENERIC_NAME, 3, "metformin hydrochloride"),
+                (MED_NAME, 4, "Metformin"),
+            ]
+        )
+
+        matches = index.search("amoxicilin")
+
+        assert [(m.text, m.distance) for m in matches] == [
+            ("amoxicillin", 1),
+            ("ampicillin", 3),
+        ]
+        assert matches[0].weight == 3
+        assert [m.text for m in index.search("metforman", limit=1)] == ["Metformin"]
+        assert index.search("zzzz") == []
+        assert index.search("") == []
+
+    def test_threshold_limits_candidates(self):
+
+        _, index = build([(MED_NAME, 1, "amoxicillin"), (MED_NAME, 2, "ampicillin")])
+
+        matches = index.search("amoxicilin", threshold=0.6)
+
+        assert [m.text for m in matches] == ["amoxicillin"]
+        assert matches[0].similarity >= 0.6
+
+    def test_removed_names_are_not_returned_and_get_compacted(self, monkeypatch):
+
+        monkeypatch.setattr(trigram, "COMPACT_RATIO", 0.5)
+        rows, index = build([(MED_NAME, 1, "amoxicillin"), (MED_NAME, 2, "ampicillin")])
+
+        index.update(rows.diff([(MED_NAME, 1, None)]))
+
+        assert len(index) == 1
+        assert [m.text for m in index.search("amoxicilin")] == ["ampicillin"]
+
+        index.update(rows.diff([(MED_NAME, 3, "amoxicillin"), (MED_NAME, 2, None)]))
+
+        assert len(index) == 1
+        assert index._data.removed == 0
+        assert [m.text for m in index.search("amoxicilin")] == ["amoxicillin"]
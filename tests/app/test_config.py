@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+from medsearch_api.app.config import get_settings
+
+
+def _run_python(code: str, env: dict) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        env={"PATH": os.environ.get("PATH", ""), **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+class TestConfig:
+    def test_get_settings_is_created_once(self):
+
+        assert get_settings() is get_settings()
+
+    def test_import_has_no_side_effects_and_needs_no_environment(self):
+
+        result = _run_python(
+            "import logging\n"
+            "import medsearch_api.app.config\n"
+            "assert not logging.getLogger().handlers\n",
+            {"PYTHONPATH": os.environ.get("PYTHONPATH", "src")},
+        )
+
+        assert result.stdout == ""
+        assert result.stderr == ""
+
+    def test_configure_logging_masks_secrets(self):
+
+        env = {
+            key: value
+            for key, value in os.environ.items()
+            if key.startswith("MYSQL_") or key in ("ENV", "PYTHONPATH")
+        }
+        env.update(MYSQL_PASSWORD="app-secret", MYSQL_ADMIN_PASSWORD="admin-secret")
+
+        result = _run_python(
+            "from medsearch_api.app.config import configure_logging\n"
+            "configure_logging()\n"
+            "configure_logging()\n",
+            env,
+        )
+
+        assert "MYSQL_PASSWORD: ***" in result.stdout
+        assert f":***@{env['MYSQL_HOST']}" in result.stdout
+        assert "secret" not in result.stdout
+        assert result.stdout.count("Logging configured") == 1
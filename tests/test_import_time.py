@@ -0,0 +1,66 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+# cold import budgets, in milliseconds, of the modules processes start from:
+# roughly twice what they take today, so a heavy new import at module level
+# fails here instead of slowing every worker and one-off job
+IMPORT_BUDGETS_MS = {
+    "medsearch_api.app.config": 500,
+    "medsearch_api.app.ingestion.spl_parser": 1200,
+    "medsearch_api.run_ingest": 1500,
+    "medsearch_api.run_api": 1500,
+    "medsearch_api.run_server": 1500,
+    "medsearch_api.run_async_api": 1500,
+    "medsearch_api.run_export": 1500,
+    "medsearch_api.run_snapshot": 1500,
+    "medsearch_api.run_fetch": 1500,
+}
+ATTEMPTS = 3
+
+_IMPORT_TIME = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| +(\S+)$")
+
+
+def import_times_us(module: str) -> dict:
+    """
+    Cumulative import time in microseconds of every module loaded by
+    `import module` in a fresh interpreter, from python -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=os.environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            times[match.group(2)] = int(match.group(1))
+    return times
+
+
+class TestImportTime:
+    @pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+    def test_cold_import_is_within_budget(self, module):
+
+        # retried a few times, to ride out a busy machine
+        for _ in range(ATTEMPTS):
+            elapsed_ms = import_times_us(module)[module] / 1000
+            if elapsed_ms <= IMPORT_BUDGETS_MS[module]:
+                break
+
+        assert elapsed_ms <= IMPORT_BUDGETS_MS[module], (
+            f"importing {module} took {elapsed_ms:.0f}ms, "
+            f"over its {IMPORT_BUDGETS_MS[module]}ms budget"
+        )
+
+    def test_config_does_not_import_the_database_or_web_stack(self):
+
+        imported = import_times_us("medsearch_api.app.config")
+
+        assert not {"sqlalchemy", "flask"} & set(imported)
@@ -0,0 +1,211 @@
+from datetime import date, datetime
+
+from alembic import command
+from sqlalchemy import MetaData, Table, inspect, insert, select
+
+from medsearch_api.app.database.types import compress_text, decompress_text
+from medsearch_api.app.ingestion.hashing import content_hasher, ingredient_fingerprint
+from medsearch_api.app.ingestion.issues import error_fingerprint
+from medsearch_api.app.ingestion.ndc import NDC_CODE_SYSTEM
+
+_NOW = datetime(2024, 1, 1)
+
+
+def _indexes(engine):
+    with engine.connect() as conn:
+        inspector = inspect(conn)
+        return {
+            table: sorted(index["name"] for index in inspector.get_indexes(table))
+            for table in inspector.get_table_names()
+        }
+
+
+def _insert(engine, table_name: str, *rows) -> None:
+    # rows as the schema of the current revision takes them
+    with engine.begin() as conn:
+        table = Table(table_name, MetaData(), autoload_with=conn)
+        conn.execute(
+            insert(table),
+            [{"created_at": _NOW, "updated_at": _NOW, **row} for row in rows],
+        )
+
+
+def _select(engine, table_name: str, *columns):
+    with engine.connect() as conn:
+        table = Table(table_name, MetaData(), autoload_with=conn)
+        stmt = select(*(table.c[column] for column in columns)).order_by(table.c.id)
+        return conn.execute(stmt).all()
+
+
+def _insert_spls(engine, count: int = 1) -> None:
+    _insert(
+        engine,
+        "spls",
+        *(
+            {
+                "id": id_,
+                "set_id": f"set-{id_}",
+                "title": "Label",
+                "published_date": date(2024, 1, 1),
+            }
+            for id_ in range(1, count + 1)
+        ),
+    )
+
+
+def _med(id_: int, code: str = "0001-0001", code_system: str = NDC_CODE_SYSTEM):
+    # each med of its own spl
+    return {
+        "id": id_,
+        "spl_id": id_,
+        "code": code,
+        "code_system": code_system,
+        "name": "Testra",
+        "generic_name": "testamine",
+        "effective_date": date(2024, 1, 1),
+        "version_number": 1,
+    }
+
+
+def _parsing_issue(
+    id_: int, error: str, xml_content, xml_structure, created_at: datetime = _NOW
+):
+    return {
+        "id": id_,
+        "spl_id": 1,
+        "error": error,
+        "xml_content": xml_content,
+        "xml_structure": xml_structure,
+        "created_at": created_at,
+    }
+
+
+class TestMigrations:
+    def test_downgrade_then_upgrade_builds_the_same_indexes(
+        self, migrations_engine, migrate
+    ):
+
+        migrate(migrations_engine, command.upgrade, "head")
+        upgraded = _indexes(migrations_engine)
+        # before the indexes that downgrade replaces with foreign key ones
+        migrate(migrations_engine, command.downgrade, "a4d7e2c91b38")
+        downgraded = _indexes(migrations_engine)
+        migrate(migrations_engine, command.upgrade, "head")
+
+        assert "fk_meds_med_form_id" in downgraded["meds"]
+        assert "ix_spl_parsing_issues_spl_id" in downgraded["spl_parsing_issues"]
+        assert _indexes(migrations_engine) == upgraded
+        migrate(migrations_engine, command.downgrade, "a4d7e2c91b38")
+
+    def test_backfills_ingredient_fingerprints(self, migrations_engine, migrate):
+
+        migrate(migrations_engine, command.upgrade, "b57e1d9c4a20")
+        _insert_spls(migrations_engine, 2)
+        _insert(migrations_engine, "meds", _med(1), _med(2))
+        _insert(
+            migrations_engine,
+            "ingredients",
+            {"id": 1, "name": "A", "code": "UNII0001", "code_system": "unii"},
+            {"id": 2, "name": "B", "code": "UNII0002", "code_system": "unii"},
+        )
+        _insert(
+            migrations_engine,
+            "med_ingredient_map",
+            {"med_id": 1, "ingredient_id": 2},
+            {"med_id": 1, "ingredient_id": 1},
+        )
+        migrate(migrations_engine, command.upgrade, "e3a9c5f1d872")
+
+        fingerprints = _select(migrations_engine, "meds", "ingredient_fingerprint")
+
+        assert [row[0] for row in fingerprints] == [
+            ingredient_fingerprint([("UNII0001", "unii"), ("UNII0002", "unii")]),
+            None,
+        ]
+
+    def test_compresses_and_restores_parsing_issue_xml(
+        self, migrations_engine, migrate
+    ):
+        xml = "<document>Ünïcode</document>"
+
+        migrate(migrations_engine, command.upgrade, "5f0b7c2e9d14")
+        _insert_spls(migrations_engine)
+        _insert(
+            migrations_engine,
+            "spl_parsing_issues",
+            _parsing_issue(1, "e", xml, "document"),
+        )
+        migrate(migrations_engine, command.upgrade, "a4d7e2c91b38")
+        compressed = _select(
+            migrations_engine, "spl_parsing_issues", "xml_content", "xml_structure"
+        )
+        migrate(migrations_engine, command.downgrade, "5f0b7c2e9d14")
+        restored = _select(
+            migrations_engine, "spl_parsing_issues", "xml_content", "xml_structure"
+        )
+
+        assert [tuple(map(decompress_text, row)) for row in compressed] == [
+            (xml, "document")
+        ]
+        assert [tuple(row) for row in restored] == [(xml, "document")]
+
+    def test_folds_repeated_parsing_issues(self, migrations_engine, migrate):
+        xml, other_xml = "<document/>", "<document>2</document>"
+        structure = compress_text("document")
+
+        migrate(migrations_engine, command.upgrade, "a4d7e2c91b38")
+        _insert_spls(migrations_engine)
+        _insert(
+            migrations_engine,
+            "spl_parsing_issues",
+            # the same issue twice, its error differing only in a line number
+            _parsing_issue(1, "Bad tag at line 3", compress_text(xml), structure),
+            _parsing_issue(2, "Bad tag at line 4", compress_text(other_xml), structure),
+            _parsing_issue(
+                3,
+                "Bad tag at line 5",
+                compress_text(xml),
+                structure,
+                datetime(2024, 2, 1),
+            ),
+        )
+        migrate(migrations_engine, command.upgrade, "c81f3a5d7e26")
+
+        issues = _select(
+            migrations_engine,
+            "spl_parsing_issues",
+            "id",
+            "error_fingerprint",
+            "content_hash",
+            "occurrences",
+            "last_seen_at",
+        )
+
+        def hashed(text: str) -> str:
+            hasher = content_hasher()
+            hasher.update(text.encode())
+            return hasher.hexdigest()
+
+        fingerprint = error_fingerprint("Bad tag at line 3")
+        assert [tuple(row) for row in issues] == [
+            (1, fingerprint, hashed(xml), 2, datetime(2024, 2, 1)),
+            (2, fingerprint, hashed(other_xml), 1, _NOW),
+        ]
+
+    def test_backfills_normalized_codes(self, migrations_engine, migrate):
+
+        migrate(migrations_engine, command.upgrade, "d2b6f4a8c913")
+        _insert_spls(migrations_engine, 4)
+        _insert(
+            migrations_engine,
+            "meds",
+            _med(1, "0001-0001"),
+            _med(2, "12345-678-90"),
+            _med(3, "not-an-ndc"),
+            _med(4, "0001-0001", code_system="other"),
+        )
+        migrate(migrations_engine, command.upgrade, "7b3e9d1c5a64")
+
+        codes = _select(migrations_engine, "meds", "normalized_code")
+
+        assert [row[0] for row in codes] == ["000010001", "123450678", None, None]
@@ -0,0 +1,38 @@
+import io
+import json
+
+from sqlalchemy import create_engine
+
+from medsearch_api.app.database.models import MedSearchBaseModel
+from medsearch_api.app.ingestion.spl_parser import parse_spl
+from medsearch_api.app.ingestion.writer import SPLBatchWriter
+from medsearch_api.run_export import parse_args, write_export
+
+
+class TestRunExport:
+    def test_writes_every_med_in_batches(self, tmp_path, make_spl_xml):
+
+        uri = f"sqlite:///{tmp_path / 'export.db'}"
+        engine = create_engine(uri)
+        MedSearchBaseModel.metadata.create_all(engine)
+        SPLBatchWriter(engine).write(
+            [
+                parse_spl(io.BytesIO(make_spl_xml(set_id=f"s{i}", code=f"c{i}")))
+                for i in range(3)
+            ]
+        )
+        engine.dispose()
+        out = io.StringIO()
+
+        written = write_export(uri, "ndjson", out, batch_size=2)
+
+        lines = out.getvalue().splitlines()
+        assert [json.loads(line)["code"] for line in lines] == ["c0", "c1", "c2"]
+        assert written == len(out.getvalue())
+
+    def test_defaults_to_ndjson(self):
+
+        args = parse_args(["meds.ndjson"])
+
+        assert args.format == "ndjson"
+        assert args.output == "meds.ndjson"
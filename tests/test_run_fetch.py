@@ -0,0 +1,17 @@
+from medsearch_api.run_fetch import parse_args, read_set_ids
+
+
+class TestRunFetch:
+    def test_reads_set_ids_skipping_blanks_and_comments(self, tmp_path):
+
+        path = tmp_path / "set_ids.txt"
+        path.write_text("# weekly\na-1\n\n  b-2  # new\n")
+
+        assert list(read_set_ids(str(path))) == ["a-1", "b-2"]
+
+    def test_defaults(self):
+
+        args = parse_args(["set_ids.txt", "labels"])
+
+        assert args.workers == 8
+        assert args.base_url is None
@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock, patch
+
+from medsearch_api.app.db import db
+from medsearch_api.app.monitoring.instrumentation import MULTIPROCESS_DIR_VARIABLE
+from medsearch_api.run_server import APIServer, clear_metrics_dir, server_options
+
+
+class TestAPIServer:
+    def test_options_preload_the_app_and_use_threaded_workers(self):
+
+        options = server_options()
+
+        assert options["preload_app"] is True
+        assert options["worker_class"] == "gthread"
+        assert options["workers"] >= 1
+
+    def test_loads_the_preloaded_app_with_the_settings(self, app):
+
+        server = APIServer(app, {**server_options(), "workers": 3})
+
+        assert server.load() is app
+        assert server.cfg.workers == 3
+        assert server.cfg.post_fork == server.post_fork
+
+    @patch("medsearch_api.run_server.dispose_engines")
+    def test_workers_drop_inherited_connections_without_closing_them(
+        self, mock_dispose_engines, app
+    ):
+
+        server = APIServer(app, server_options())
+        engine = MagicMock()
+        with patch.object(type(db), "engines", {None: engine}):
+            server.post_fork(MagicMock(), MagicMock())
+
+        engine.dispose.assert_called_once_with(close=False)
+        mock_dispose_engines.assert_called_once_with(close=False)
+
+    def test_exited_workers_gauges_are_dropped_by_the_master(
+        self, app, tmp_path, monkeypatch
+    ):
+
+        monkeypatch.setenv(MULTIPROCESS_DIR_VARIABLE, str(tmp_path))
+        server = APIServer(app, server_options())
+        worker = MagicMock(pid=101)
+        (tmp_path / "gauge_liveall_101.db").touch()
+        (tmp_path / "counter_101.db").touch()
+
+        server.child_exit(MagicMock(), worker)
+
+        assert server.cfg.child_exit == server.child_exit
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["counter_101.db"]
+
+    def test_clears_the_metrics_of_a_previous_run(self, tmp_path):
+
+        (tmp_path / "counter_101.db").touch()
+        (tmp_path / "notes.txt").touch()
+
+        clear_metrics_dir(str(tmp_path))
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["notes.txt"]